@@ -0,0 +1,134 @@
+# Backend/apps/bookings/management/commands/bench_mailer.py
+
+import socketserver
+import threading
+import time
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bookings.services.batch_mailer import BatchMailer
+
+
+class _SmtpSinkHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP stand-in: accepts and discards every message"""
+
+    def _reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self._reply('220 navticket-sink ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip().upper()
+            if command.startswith('EHLO'):
+                self._reply('250-navticket-sink')
+                self._reply('250 8BITMIME')
+            elif command.startswith('HELO'):
+                self._reply('250 navticket-sink')
+            elif command == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                    pass
+                self.server.received += 1
+                self._reply('250 OK queued')
+            elif command == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                # MAIL FROM, RCPT TO, RSET, NOOP
+                self._reply('250 OK')
+
+
+class _SmtpSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    received = 0
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the pooled batch mailer against an SMTP server (built-in stand-in by default)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500, help='Messages to send')
+        parser.add_argument('--batch-size', type=int, default=50, help='Messages per connection')
+        parser.add_argument('--concurrency', type=int, default=2, help='Connections open at once')
+        parser.add_argument('--rate', type=float, default=0, help='Messages/second limit (0 = none)')
+        parser.add_argument('--body-kb', type=int, default=20, help='Size of each message body')
+        parser.add_argument('--host', default='', help='SMTP server (e.g. python -m smtpd -n -c DebuggingServer); '
+                                                      'a built-in stand-in is started if omitted')
+        parser.add_argument('--port', type=int, default=1025)
+        parser.add_argument('--compare', action='store_true', help='Also send with one connection per message')
+
+    def handle(self, *args, **options):
+        sink = None
+        host, port = options['host'], options['port']
+        if not host:
+            sink = _SmtpSink(('127.0.0.1', 0), _SmtpSinkHandler)
+            threading.Thread(target=sink.serve_forever, daemon=True).start()
+            host, port = sink.server_address
+            self.stdout.write(f'📮 SMTP stand-in listening on {host}:{port}')
+
+        def connection_factory(fail_silently=False):
+            return get_connection(
+                'django.core.mail.backends.smtp.EmailBackend',
+                host=host, port=port, username='', password='',
+                use_tls=False, use_ssl=False, timeout=10,
+                fail_silently=fail_silently
+            )
+
+        body = 'x' * (options['body_kb'] * 1024)
+
+        def messages():
+            for i in range(options['count']):
+                email = EmailMultiAlternatives(
+                    subject=f'⏰ Rappel Voyage #{i}',
+                    body=body,
+                    from_email='noreply@navticket.com',
+                    to=[f'traveler{i}@example.com']
+                )
+                email.attach_alternative(f'<p>{body}</p>', 'text/html')
+                yield email
+
+        try:
+            mailer = BatchMailer(
+                batch_size=options['batch_size'],
+                concurrency=options['concurrency'],
+                rate_limit=options['rate'],
+                connection_factory=connection_factory
+            )
+            result = mailer.send(messages())
+
+            for report in result.batches:
+                self.stdout.write(
+                    f"   batch {report['batch']:>3}: {report['sent']}/{report['size']} "
+                    f"in {report['seconds']:.3f}s ({report['per_second']}/s)"
+                )
+            self.stdout.write(
+                f'📊 Batched: {result.sent_count}/{options["count"]} sent in {result.elapsed:.3f}s '
+                f'→ {result.rate:,.0f}/s over {len(result.batches)} connection(s)'
+            )
+
+            if options['compare']:
+                started = time.perf_counter()
+                sent = 0
+                for email in messages():
+                    email.connection = connection_factory()
+                    sent += email.send()
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'📊 One connection per message: {sent} sent in {elapsed:.3f}s → {sent / elapsed:,.0f}/s'
+                )
+        finally:
+            if sink:
+                sink.shutdown()
+                sink.server_close()
+
+        if result.failed_count:
+            raise CommandError(f'{result.failed_count} message(s) failed: {next(iter(result.errors.values()))}')
+        if sink and sink.received < options['count']:
+            raise CommandError(f'SMTP stand-in received {sink.received}/{options["count"]} messages')
+
+        self.stdout.write(self.style.SUCCESS('✅ All messages delivered'))
@@ -0,0 +1,130 @@
+# Backend/apps/bookings/management/commands/bench_seat_reservation.py
+
+import random
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from apps.bookings.models import Seat
+from apps.bookings.utils import (
+    generate_seats_for_trip,
+    claim_seats,
+    lock_and_reserve_seats
+)
+from apps.transport.models import Route, Trip
+
+
+STRATEGIES = {
+    'locking': lambda trip_id, numbers, expiry: lock_and_reserve_seats(trip_id, numbers, expiry),
+    'optimistic': lambda trip_id, numbers, expiry: claim_seats(trip_id, numbers, reserved_until=expiry),
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent seat reservation (locking vs optimistic) on a throwaway trip'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--route-id', type=int, help='Route for the throwaway trip (default: first route)')
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent buyers')
+        parser.add_argument('--attempts', type=int, default=25, help='Reservation attempts per buyer')
+        parser.add_argument('--seats', type=int, default=50, help='Seats on the throwaway trip')
+        parser.add_argument('--party', type=int, default=2, help='Seats requested per attempt')
+        parser.add_argument('--strategy', choices=list(STRATEGIES), help='Only run one strategy')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                '⚠️ SQLite serializes writers; run against PostgreSQL for meaningful numbers'
+            ))
+
+        route = (
+            Route.objects.filter(pk=options['route_id']).first()
+            if options['route_id'] else Route.objects.first()
+        )
+        if route is None:
+            raise CommandError('No route available to attach the benchmark trip to')
+
+        trip = Trip.objects.create(
+            route=route,
+            departure_date=timezone.now().date() + timedelta(days=365),
+            departure_time=timezone.now().time().replace(microsecond=0),
+            arrival_time=timezone.now().time().replace(microsecond=0),
+            total_seats=options['seats'],
+            available_seats=options['seats'],
+            price=route.base_price,
+            bus_number='BENCHMARK',
+            status='draft'
+        )
+
+        try:
+            strategies = [options['strategy']] if options['strategy'] else list(STRATEGIES)
+            for name in strategies:
+                self._run(name, trip, options)
+        finally:
+            trip.delete()
+
+    def _run(self, name, trip, options):
+        """Run one strategy against freshly generated seats and verify the result"""
+        generate_seats_for_trip(trip)
+        seat_numbers = list(Seat.objects.filter(trip=trip).values_list('seat_number', flat=True))
+        reserve = STRATEGIES[name]
+        expiry = timezone.now() + timedelta(minutes=5)
+
+        results = []
+        results_lock = threading.Lock()
+        start_barrier = threading.Barrier(options['threads'])
+
+        def buyer(seed):
+            rng = random.Random(seed)
+            mine = {'attempts': 0, 'won': [], 'errors': 0, 'statements': 0}
+
+            def count_statements(execute, sql, params, many, context):
+                mine['statements'] += 1
+                return execute(sql, params, many, context)
+
+            try:
+                start_barrier.wait()
+                for _ in range(options['attempts']):
+                    wanted = rng.sample(seat_numbers, options['party'])
+                    mine['attempts'] += 1
+                    try:
+                        with connection.execute_wrapper(count_statements):
+                            claimed, _ = reserve(trip.id, wanted, expiry)
+                        mine['won'].extend(claimed)
+                    except Exception:
+                        mine['errors'] += 1
+            finally:
+                connection.close()
+                with results_lock:
+                    results.append(mine)
+
+        threads = [threading.Thread(target=buyer, args=(i,)) for i in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        attempts = sum(r['attempts'] for r in results)
+        errors = sum(r['errors'] for r in results)
+        statements = sum(r['statements'] for r in results)
+        won = Counter(number for r in results for number in r['won'])
+        double_sold = [number for number, count in won.items() if count > 1]
+        taken_in_db = Seat.objects.filter(trip=trip, is_available=False).count()
+
+        self.stdout.write(f'\n📊 {name}')
+        self.stdout.write(f'   • Attempts: {attempts} in {elapsed:.2f}s ({attempts / elapsed:.1f} req/s)')
+        self.stdout.write(f'   • Seats sold: {len(won)} / {len(seat_numbers)} (DB: {taken_in_db})')
+        self.stdout.write(f'   • SQL statements per attempt: {statements / attempts:.1f}')
+        self.stdout.write(f'   • Errors (deadlocks/timeouts): {errors}')
+
+        if double_sold or taken_in_db != len(won):
+            self.stdout.write(self.style.ERROR(f'❌ Double sale detected: {double_sold}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ No double sale'))
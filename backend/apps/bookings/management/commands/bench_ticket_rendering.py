@@ -0,0 +1,61 @@
+# Backend/apps/bookings/management/commands/bench_ticket_rendering.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bookings.models import Booking
+from apps.bookings.services import ticket_service
+from apps.bookings.services.ticket_service import TicketService
+
+
+class Command(BaseCommand):
+    help = 'Benchmark e-ticket PDF rendering (tickets per second, per booking vs batch)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trip-id', type=int, help='Render the confirmed bookings of this trip')
+        parser.add_argument('--limit', type=int, default=20, help='Bookings to render (latest first) without --trip-id')
+        parser.add_argument('--repeat', type=int, default=3, help='Rounds per mode')
+
+    def handle(self, *args, **options):
+        bookings = Booking.objects.select_related(
+            'trip__route__origin_city',
+            'trip__route__destination_city',
+            'trip__route__bus_company'
+        ).prefetch_related('passengers')
+
+        if options['trip_id']:
+            bookings = bookings.filter(trip_id=options['trip_id'], booking_status='confirmed')
+        else:
+            bookings = bookings.order_by('-created_at')[:options['limit']]
+
+        bookings = [booking for booking in bookings if booking.passengers.all()]
+        if not bookings:
+            raise CommandError('No booking with passengers to render')
+
+        tickets = sum(len(booking.passengers.all()) for booking in bookings)
+        self.stdout.write(f'📄 {len(bookings)} bookings, {tickets} tickets, {options["repeat"]} rounds')
+
+        def per_booking(cold_styles=False):
+            for booking in bookings:
+                if cold_styles:
+                    ticket_service._ticket_styles.cache_clear()
+                TicketService.generate_ticket_pdf(booking)
+
+        modes = [
+            ('Per booking, styles rebuilt', lambda: per_booking(cold_styles=True)),
+            ('Per booking, shared styles', per_booking),
+            ('Batch (one document)', lambda: TicketService.generate_tickets_pdf(bookings)),
+        ]
+
+        TicketService.generate_ticket_pdf(bookings[0])   # warm up imports and fonts
+
+        for label, run in modes:
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                run()
+            elapsed = time.perf_counter() - started
+            rate = tickets * options['repeat'] / elapsed
+            self.stdout.write(f'   {label}: {rate:,.1f} tickets/s')
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark complete'))
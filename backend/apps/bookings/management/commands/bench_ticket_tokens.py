@@ -0,0 +1,82 @@
+# Backend/apps/bookings/management/commands/bench_ticket_tokens.py
+
+import hashlib
+import time
+from datetime import timedelta
+
+import qrcode
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.bookings.services.qr_service import QRCodeService
+from apps.bookings.services.reference_service import BookingReferenceService
+from apps.bookings.services.ticket_token import encode_ticket_token, verify_ticket_token
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ticket token signing/verification and QR size/rendering (no database access)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100000, help='Tokens to sign and verify')
+        parser.add_argument('--renders', type=int, default=200, help='QR images rendered per format')
+        parser.add_argument('--min-rate', type=int, default=0, help='Fail below this many verifications/second')
+
+    def _qr_version(self, payload):
+        qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_M)
+        qr.add_data(payload)
+        qr.make(fit=True)
+        return qr.version
+
+    def _render(self, payload, count):
+        started = time.perf_counter()
+        for _ in range(count):
+            size = len(QRCodeService.render_qr_png(payload).getvalue())
+        return (time.perf_counter() - started) / count * 1000, size
+
+    def handle(self, *args, **options):
+        count = options['count']
+        departure = timezone.now() + timedelta(hours=2)
+        references = BookingReferenceService.generate(min(count, 1000))
+
+        # Sign
+        started = time.perf_counter()
+        tokens = [
+            encode_ticket_token(references[i % len(references)], 1000 + i % 50, 500000 + i, f'{i % 12 + 1}A', departure)
+            for i in range(count)
+        ]
+        sign_elapsed = time.perf_counter() - started
+
+        # Verify (pure CPU)
+        started = time.perf_counter()
+        failures = 0
+        for token in tokens:
+            decoded, error = verify_ticket_token(token)
+            if error:
+                failures += 1
+        verify_elapsed = time.perf_counter() - started
+
+        # A single flipped character must be rejected
+        tampered = tokens[0][:-1] + ('0' if tokens[0][-1] != '0' else '1')
+        if verify_ticket_token(tampered)[0] is not None:
+            raise CommandError('Tampered token accepted')
+
+        sign_rate = count / sign_elapsed if sign_elapsed else 0
+        verify_rate = count / verify_elapsed if verify_elapsed else 0
+        self.stdout.write(f'🔏 Signed {count} tokens in {sign_elapsed:.3f}s → {sign_rate:,.0f}/s')
+        self.stdout.write(f'🔍 Verified {count} tokens in {verify_elapsed:.3f}s → {verify_rate:,.0f}/s')
+
+        # QR size and rendering: token vs legacy BOOKING_REF|NAME|HASH payload
+        legacy = f"{references[0]}|Aya Kouassi-Bamba|{hashlib.sha256(b'x').hexdigest()[:16]}"
+        for label, payload in (('legacy', legacy), ('token', tokens[0])):
+            render_ms, png_size = self._render(payload, options['renders'])
+            self.stdout.write(
+                f'   {label:<6} {len(payload):>3} chars, QR version {self._qr_version(payload)}, '
+                f'{png_size:,} bytes PNG, {render_ms:.2f} ms/render'
+            )
+
+        if failures:
+            raise CommandError(f'{failures} valid tokens rejected')
+        if verify_rate < options['min_rate']:
+            raise CommandError(f'Verification {verify_rate:,.0f}/s below the required {options["min_rate"]:,}/s')
+
+        self.stdout.write(self.style.SUCCESS('✅ All tokens verified, tampering rejected'))
@@ -0,0 +1,41 @@
+# Backend/apps/bookings/management/commands/expire_pending_bookings.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.bookings.services.booking_expiry_service import (
+    PENDING_BOOKING_TTL,
+    PENDING_EXPIRY_BATCH_SIZE,
+    expire_pending_bookings
+)
+
+
+class Command(BaseCommand):
+    help = 'Cancel unpaid bookings past their payment deadline and give their seats back'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run a single sweep, then exit (cron)')
+        parser.add_argument('--batch', type=int, default=PENDING_EXPIRY_BATCH_SIZE, help='Bookings expired per transaction')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between sweeps')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'⌛ Unpaid booking sweeper started (payment deadline: {PENDING_BOOKING_TTL})')
+
+        try:
+            while True:
+                close_old_connections()
+                started = time.perf_counter()
+                expired = expire_pending_bookings(options['batch'])
+                if expired:
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(f'   {expired} booking(s) expired in {elapsed:.1f}s')
+
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping sweeper...')
+
+        self.stdout.write(self.style.SUCCESS('✅ Unpaid booking sweeper stopped'))
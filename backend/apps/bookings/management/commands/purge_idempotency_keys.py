@@ -0,0 +1,13 @@
+# Backend/apps/bookings/management/commands/purge_idempotency_keys.py
+
+from django.core.management.base import BaseCommand
+
+from apps.bookings.utils import purge_expired_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete expired idempotency keys (run periodically, e.g. hourly cron)'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_idempotency_keys()
+        self.stdout.write(self.style.SUCCESS(f'✅ {deleted} expired idempotency keys deleted'))
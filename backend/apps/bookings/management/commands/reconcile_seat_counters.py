@@ -0,0 +1,50 @@
+# Backend/apps/bookings/management/commands/reconcile_seat_counters.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.bookings.services.seat_reconciliation_service import (
+    RECONCILIATION_BATCH_SIZE,
+    drift_metrics,
+    reconcile_seat_counters
+)
+
+
+class Command(BaseCommand):
+    help = 'Check available_seats of future trips against their bookings and fix drifted counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+        parser.add_argument('--batch', type=int, default=RECONCILIATION_BATCH_SIZE, help='Trips fixed per transaction')
+        parser.add_argument('--show', type=int, default=20, help='Drifted trips listed')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        run = reconcile_seat_counters(options['batch'], dry_run=options['dry_run'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f'🔍 {run.trips_checked} future trip(s) checked in {elapsed:.2f}s: '
+            f'{run.trips_drifted} drifted ({run.drift_rate}%), {run.seats_drift} seat(s) off, '
+            f'{run.oversold_trips} oversold, {run.orphaned_seats} seat(s) held by cancelled bookings'
+        )
+        for drift in run.drifts[:options['show']]:
+            self.stdout.write(
+                f"   trip {drift['trip_id']:>6}: recorded {drift['recorded']:>3}, expected {drift['expected']:>3} "
+                f"({drift['delta']:+d})" + (' ⚠️ oversold' if drift['oversold'] else '')
+                + (f", {drift['orphaned_seats']} orphaned seat(s)" if drift['orphaned_seats'] else '')
+            )
+
+        metrics = drift_metrics()
+        self.stdout.write(
+            f"📊 Last 30 days: {metrics['runs_with_drift']}/{metrics['runs']} run(s) found drift, "
+            f"{metrics['drift_rate']}% of checked trips"
+        )
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('⚠️ Dry run: nothing fixed'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ {run.trips_fixed} trip(s) fixed, {run.seats_released} seat(s) released'
+            ))
@@ -0,0 +1,71 @@
+# Backend/apps/bookings/management/commands/run_jobs.py
+
+import os
+import socket
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.bookings.models import BackgroundJob
+from apps.bookings.services.job_queue import run_pending_jobs, retry_dead_jobs
+
+
+class Command(BaseCommand):
+    help = 'Process background jobs (booking fulfilment, ...) from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the jobs ready now, then exit')
+        parser.add_argument('--batch', type=int, default=10, help='Jobs claimed per poll')
+        parser.add_argument('--poll-interval', type=float, default=2, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--worker-id', default=f'{socket.gethostname()}:{os.getpid()}')
+        parser.add_argument('--retry-dead', action='store_true', help='Requeue dead-lettered jobs, then exit')
+        parser.add_argument('--stats', action='store_true', help='Show queue counts and average stage timings, then exit')
+
+    def handle(self, *args, **options):
+        if options['retry_dead']:
+            requeued = retry_dead_jobs()
+            self.stdout.write(self.style.SUCCESS(f'✅ {requeued} dead jobs requeued'))
+            return
+
+        if options['stats']:
+            self.show_stats()
+            return
+
+        worker_id = options['worker_id']
+        self.stdout.write(f'🚀 Worker {worker_id} started')
+
+        try:
+            while True:
+                close_old_connections()
+                completed, failed = run_pending_jobs(worker_id, options['batch'])
+                if completed or failed:
+                    self.stdout.write(f'   {completed} completed, {failed} failed')
+
+                if options['once'] and not (completed or failed):
+                    break
+                if not (completed or failed):
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping worker...')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Worker {worker_id} stopped'))
+
+    def show_stats(self):
+        for status, _ in BackgroundJob._meta.get_field('status').choices:
+            count = BackgroundJob.objects.filter(status=status).count()
+            self.stdout.write(f'   {status}: {count}')
+
+        totals = defaultdict(float)
+        counts = defaultdict(int)
+        recent = BackgroundJob.objects.filter(status='completed').order_by('-completed_at')
+        for timings in recent.values_list('stage_timings', flat=True)[:500]:
+            for stage, duration in timings.items():
+                totals[stage] += duration
+                counts[stage] += 1
+
+        if counts:
+            self.stdout.write('📊 Average stage timings (last 500 completed jobs):')
+            for stage in totals:
+                self.stdout.write(f'   {stage}: {totals[stage] / counts[stage]:.1f} ms')
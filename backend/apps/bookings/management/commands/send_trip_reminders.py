@@ -0,0 +1,41 @@
+# Backend/apps/bookings/management/commands/send_trip_reminders.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.bookings.services.batch_mailer import BatchMailer
+from apps.bookings.services.reminder_service import REMINDER_BATCH_SIZE, run_reminder_tick
+
+
+class Command(BaseCommand):
+    help = 'Send trip reminders to confirmed bookings departing within the reminder window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run a single tick, then exit (cron)')
+        parser.add_argument('--batch', type=int, default=REMINDER_BATCH_SIZE, help='Bookings claimed per batch')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between ticks')
+        parser.add_argument('--concurrency', type=int, default=None, help='SMTP connections open at once')
+        parser.add_argument('--rate', type=float, default=None, help='Messages/second limit')
+
+    def handle(self, *args, **options):
+        mailer = BatchMailer(concurrency=options['concurrency'], rate_limit=options['rate'])
+        self.stdout.write('⏰ Trip reminder scheduler started')
+
+        try:
+            while True:
+                close_old_connections()
+                started = time.perf_counter()
+                sent, failed = run_reminder_tick(options['batch'], mailer=mailer)
+                if sent or failed:
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(f'   {sent} sent, {failed} failed in {elapsed:.1f}s')
+
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping scheduler...')
+
+        self.stdout.write(self.style.SUCCESS('✅ Trip reminder scheduler stopped'))
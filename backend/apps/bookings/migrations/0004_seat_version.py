@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_booking_selected_seats_seat'),
+        ('transport', '0005_trip_seat_map_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seat',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0, help_text='Trip seat map version of the last change to this seat'),
+        ),
+        migrations.AddIndex(
+            model_name='seat',
+            index=models.Index(fields=['trip', 'version'], name='bookings_se_trip_id_dde069_idx'),
+        ),
+    ]
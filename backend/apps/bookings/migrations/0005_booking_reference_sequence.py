@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:58
+
+from django.db import migrations
+
+
+# Block allocator for booking references (see services/reference_service.py).
+# INCREMENT BY must match BLOCK_SIZE; MAXVALUE keeps values within 30 bits
+# so the sequence errors out instead of ever wrapping around.
+CREATE_SEQUENCE = """
+    CREATE SEQUENCE IF NOT EXISTS bookings_reference_block_seq
+    INCREMENT BY 1000 MINVALUE 0 MAXVALUE 1073741000 START WITH 0 NO CYCLE
+"""
+DROP_SEQUENCE = "DROP SEQUENCE IF EXISTS bookings_reference_block_seq"
+
+
+def create_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_SEQUENCE)
+
+
+def drop_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEQUENCE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_seat_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sequence, drop_sequence),
+    ]
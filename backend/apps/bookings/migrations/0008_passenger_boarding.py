@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='passenger',
+            name='boarded_at',
+            field=models.DateTimeField(blank=True, help_text='First boarding scan', null=True),
+        ),
+        migrations.AddField(
+            model_name='passenger',
+            name='boarding_device',
+            field=models.CharField(blank=True, help_text='Scanner that boarded the passenger', max_length=100),
+        ),
+    ]
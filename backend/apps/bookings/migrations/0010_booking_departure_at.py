@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:21
+
+from datetime import datetime
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_departure_at(apps, schema_editor):
+    """Copy each trip's departure onto its bookings (one UPDATE per trip)"""
+    Booking = apps.get_model('bookings', 'Booking')
+    Trip = apps.get_model('transport', 'Trip')
+
+    trips = Trip.objects.filter(bookings__isnull=False).distinct().values_list(
+        'id', 'departure_date', 'departure_time'
+    )
+    for trip_id, departure_date, departure_time in trips.iterator():
+        departure = timezone.make_aware(datetime.combine(departure_date, departure_time))
+        Booking.objects.filter(trip_id=trip_id).update(departure_at=departure)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_userstats'),
+        ('transport', '0006_trip_boarded_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='departure_at',
+            field=models.DateTimeField(blank=True, help_text='Trip departure (kept in sync with the trip)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'created_at'], name='bookings_bo_user_id_5943d6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'departure_at'], name='bookings_bo_user_id_f47f89_idx'),
+        ),
+        migrations.RunPython(backfill_departure_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_booking_departure_at'),
+        ('transport', '0006_trip_boarded_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='reminder_sent_at',
+            field=models.DateTimeField(blank=True, help_text='When the trip reminder was claimed for sending', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('booking_status', 'confirmed'), ('reminder_sent_at__isnull', True)), fields=['departure_at'], name='booking_reminder_due_idx'),
+        ),
+    ]
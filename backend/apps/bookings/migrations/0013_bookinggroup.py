@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_calendarfeed'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group_reference', models.CharField(help_text='Unique group reference (e.g., GRP-20251201-7QK2M9D)', max_length=20, unique=True)),
+                ('organization_name', models.CharField(blank=True, max_length=200)),
+                ('contact_email', models.EmailField(max_length=254)),
+                ('contact_phone', models.CharField(blank=True, max_length=20)),
+                ('total_passengers', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, help_text='Amount of the consolidated payment (all bookings)', max_digits=12)),
+                ('payment_status', models.CharField(choices=[('pending', 'Pending'), ('paid', 'Paid'), ('refunded', 'Refunded'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(help_text='Organizer who made the group booking', on_delete=django.db.models.deletion.CASCADE, related_name='booking_groups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='group',
+            field=models.ForeignKey(blank=True, help_text='Group booking paid together with this booking', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='bookings.bookinggroup'),
+        ),
+    ]
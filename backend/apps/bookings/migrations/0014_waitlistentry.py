@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:42
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0013_bookinggroup'),
+        ('transport', '0006_trip_boarded_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='backgroundjob',
+            name='job_type',
+            field=models.CharField(choices=[('fulfil_booking', 'Fulfil Booking'), ('process_waitlist', 'Process Waitlist')], max_length=50),
+        ),
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('party_size', models.PositiveSmallIntegerField(default=1, help_text='Seats wanted', validators=[django.core.validators.MinValueValidator(1)])),
+                ('contact_email', models.EmailField(max_length=254)),
+                ('contact_phone', models.CharField(blank=True, max_length=20)),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('offered', 'Offered'), ('accepted', 'Accepted'), ('expired', 'Expired'), ('cancelled', 'Cancelled')], default='waiting', max_length=20)),
+                ('offered_seats', models.JSONField(blank=True, default=list, help_text='Seat numbers held for the offer')),
+                ('offered_at', models.DateTimeField(blank=True, null=True)),
+                ('offer_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('notified_at', models.DateTimeField(blank=True, help_text='When the offer email was sent', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('booking', models.ForeignKey(blank=True, help_text='Booking made from the offer', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entries', to='bookings.booking')),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='transport.trip')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['trip', 'status', 'created_at'], name='bookings_wa_trip_id_19b633_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['waiting', 'offered'])), fields=('trip', 'user'), name='unique_active_waitlist_entry')],
+            },
+        ),
+    ]
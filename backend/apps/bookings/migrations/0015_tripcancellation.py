@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0014_waitlistentry'),
+        ('transport', '0006_trip_boarded_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='backgroundjob',
+            name='job_type',
+            field=models.CharField(choices=[('fulfil_booking', 'Fulfil Booking'), ('process_waitlist', 'Process Waitlist'), ('cancel_trip', 'Cancel Trip'), ('refund_booking', 'Refund Booking')], max_length=50),
+        ),
+        migrations.CreateModel(
+            name='TripCancellation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('total_bookings', models.PositiveIntegerField(default=0, help_text='Bookings to cancel when requested')),
+                ('cancelled_bookings', models.PositiveIntegerField(default=0)),
+                ('seats_released', models.PositiveIntegerField(default=0)),
+                ('refunds_enqueued', models.PositiveIntegerField(default=0)),
+                ('notifications_sent', models.PositiveIntegerField(default=0)),
+                ('notifications_failed', models.PositiveIntegerField(default=0)),
+                ('batches', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trip_cancellations', to=settings.AUTH_USER_MODEL)),
+                ('trip', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cancellation', to='transport.trip')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0015_tripcancellation'),
+        ('transport', '0006_trip_boarded_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('booking_status', 'pending'), ('payment_status', 'pending')), fields=['created_at'], name='booking_pending_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0016_booking_pending_expiry_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatReconciliationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('dry_run', models.BooleanField(default=False)),
+                ('trips_checked', models.PositiveIntegerField(default=0)),
+                ('trips_drifted', models.PositiveIntegerField(default=0)),
+                ('trips_fixed', models.PositiveIntegerField(default=0)),
+                ('seats_drift', models.PositiveIntegerField(default=0, help_text='Sum of |recorded - expected| over drifted trips')),
+                ('oversold_trips', models.PositiveIntegerField(default=0, help_text='Trips with more passengers than seats')),
+                ('orphaned_seats', models.PositiveIntegerField(default=0, help_text='Seats still held by cancelled bookings')),
+                ('seats_released', models.PositiveIntegerField(default=0)),
+                ('drifts', models.JSONField(blank=True, default=list)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0017_seatreconciliationrun'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='backgroundjob',
+            name='job_type',
+            field=models.CharField(choices=[('fulfil_booking', 'Fulfil Booking'), ('process_waitlist', 'Process Waitlist'), ('cancel_trip', 'Cancel Trip'), ('refund_booking', 'Refund Booking'), ('process_webhook', 'Process Webhook')], max_length=50),
+        ),
+    ]
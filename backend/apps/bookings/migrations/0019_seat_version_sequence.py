@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:10
+
+from django.db import migrations, models
+
+
+# Seat versions of the change feed (see utils/seat_feed.py). Taking a value
+# never locks a row; the sequence starts above the per-trip versions already
+# stored so resume cursors keep increasing.
+CREATE_SEQUENCE = """
+    CREATE SEQUENCE IF NOT EXISTS bookings_seat_version_seq MINVALUE 1 NO CYCLE
+"""
+START_SEQUENCE = """
+    SELECT setval('bookings_seat_version_seq', GREATEST((SELECT MAX(version) FROM bookings_seat), 1))
+"""
+DROP_SEQUENCE = "DROP SEQUENCE IF EXISTS bookings_seat_version_seq"
+
+
+def create_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_SEQUENCE)
+        schema_editor.execute(START_SEQUENCE)
+
+
+def drop_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEQUENCE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0018_backgroundjob_process_webhook'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='seat',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0, help_text='Seat version (bookings_seat_version_seq) of the last change to this seat'),
+        ),
+        migrations.RunPython(create_sequence, drop_sequence),
+    ]
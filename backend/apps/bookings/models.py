@@ -7,6 +7,8 @@ from django.utils import timezone
 from apps.bookings.services.emails_service import EmailService
 from apps.bookings.services.qr_service import QRCodeService
 from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+import secrets
 import uuid
 
 
@@ -38,6 +40,36 @@ AGE_CATEGORY_CHOICES = [
     ('infant', 'Infant'),
 ]
 
+JOB_TYPE_CHOICES = [
+    ('fulfil_booking', 'Fulfil Booking'),
+    ('process_waitlist', 'Process Waitlist'),
+    ('cancel_trip', 'Cancel Trip'),
+    ('refund_booking', 'Refund Booking'),
+    ('process_webhook', 'Process Webhook'),
+]
+
+TRIP_CANCELLATION_STATUS_CHOICES = [
+    ('pending', 'Pending'),
+    ('running', 'Running'),
+    ('completed', 'Completed'),
+    ('failed', 'Failed'),
+]
+
+WAITLIST_STATUS_CHOICES = [
+    ('waiting', 'Waiting'),
+    ('offered', 'Offered'),
+    ('accepted', 'Accepted'),
+    ('expired', 'Expired'),
+    ('cancelled', 'Cancelled'),
+]
+
+JOB_STATUS_CHOICES = [
+    ('pending', 'Pending'),
+    ('running', 'Running'),
+    ('completed', 'Completed'),
+    ('dead', 'Dead'),
+]
+
 
 class Booking(models.Model):
     """Core booking entity linking users, trips, and passengers"""
@@ -131,6 +163,20 @@ class Booking(models.Model):
     qr_code_data = models.TextField(blank=True, help_text="QR code data for verification")
     qr_code_generated_at = models.DateTimeField(null=True, blank=True)
     ticket_sent_at = models.DateTimeField(null=True, blank=True, help_text="When e-ticket was emailed")
+    reminder_sent_at = models.DateTimeField(null=True, blank=True, help_text="When the trip reminder was claimed for sending")
+    
+    # Group/corporate booking this booking belongs to (one booking per trip of the group)
+    group = models.ForeignKey(
+        'BookingGroup',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bookings',
+        help_text="Group booking paid together with this booking"
+    )
+    
+    # Trip departure, copied from the trip so upcoming trips come from one index
+    departure_at = models.DateTimeField(null=True, blank=True, help_text="Trip departure (kept in sync with the trip)")
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
@@ -144,11 +190,40 @@ class Booking(models.Model):
             models.Index(fields=['trip', 'booking_status']),
             models.Index(fields=['booking_reference']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['user', 'departure_at']),
+            # Trip reminder scheduler: only bookings still waiting for their reminder
+            models.Index(
+                fields=['departure_at'],
+                condition=models.Q(booking_status='confirmed', reminder_sent_at__isnull=True),
+                name='booking_reminder_due_idx'
+            ),
+            # Unpaid booking sweeper: only bookings still waiting for payment
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(booking_status='pending', payment_status='pending'),
+                name='booking_pending_expiry_idx'
+            ),
         ]
     
     def __str__(self):
         return f"{self.booking_reference} - {self.user.email}"
     
+    @staticmethod
+    def trip_departure_at(trip):
+        """Aware departure datetime of a trip (Trip stores a naive date and time)"""
+        departure = trip.departure_datetime
+        if timezone.is_naive(departure):
+            departure = timezone.make_aware(departure)
+        return departure
+    
+    def save(self, *args, **kwargs):
+        if self.departure_at is None and self.trip_id:
+            self.departure_at = Booking.trip_departure_at(self.trip)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'departure_at'}
+        super().save(*args, **kwargs)
+    
     def generate_and_save_qr(self):
         """Generate QR code data and save to model"""
         
@@ -156,29 +231,28 @@ class Booking(models.Model):
         self.qr_code_generated_at = timezone.now()
         self.save(update_fields=['qr_code_data', 'qr_code_generated_at'])
     
-    def send_confirmation_email(self):
+    def send_confirmation_email(self, timings=None):
         """Send booking confirmation email with ticket and calendar"""
        
-        success = EmailService.send_booking_confirmation(self)
+        success = EmailService.send_booking_confirmation(self, timings)
         if success:
             self.ticket_sent_at = timezone.now()
             self.save(update_fields=['ticket_sent_at'])
         return success
     
-    def cancel(self):
-        """Cancel booking and release seats"""
-        if self.booking_status == 'cancelled':
-            return False
-        
-        self.booking_status = 'cancelled'
-        self.cancelled_at = timezone.now()
-        self.save()
-        
-        # Release seats back to trip
-        self.trip.available_seats += self.total_passengers
-        self.trip.save()
+    @property
+    def payment_deadline(self):
+        """Time after which the booking is released if still unpaid (None once paid or cancelled)"""
+        from apps.bookings.services.booking_expiry_service import PENDING_BOOKING_TTL
         
-        return True
+        if self.booking_status != 'pending' or self.payment_status != 'pending' or not self.created_at:
+            return None
+        return self.created_at + PENDING_BOOKING_TTL
+    
+    def is_payment_expired(self):
+        """Unpaid past the payment deadline (the sweeper may not have released it yet)"""
+        deadline = self.payment_deadline
+        return deadline is not None and deadline <= timezone.now()
     
     def is_cancellable(self):
         """Check if booking can be cancelled"""
@@ -204,6 +278,7 @@ class Booking(models.Model):
         
         # Import here to avoid circular import
         from apps.bookings.models import Seat
+        from apps.bookings.utils.seat_reservation import claim_seats
         
         # Validate seat count matches passengers
         if len(seat_numbers) != self.total_passengers:
@@ -212,45 +287,37 @@ class Booking(models.Model):
             )
         
         with transaction.atomic():
-            # Get seats and lock them
-            seats = Seat.objects.select_for_update().filter(
-                trip=self.trip,
-                seat_number__in=seat_numbers
-            )
-            
-            # Check all seats exist
-            if seats.count() != len(seat_numbers):
-                missing = set(seat_numbers) - set(seats.values_list('seat_number', flat=True))
-                raise ValueError(f"Seats do not exist: {missing}")
+            # Claim all seats in one conditional UPDATE (no row locks)
+            claimed, lost = claim_seats(self.trip_id, seat_numbers, booking=self)
             
-            # Check all seats are available
-            unavailable = seats.filter(is_available=False)
-            if unavailable.exists():
-                unavailable_numbers = list(unavailable.values_list('seat_number', flat=True))
-                raise ValueError(f"Seats already taken: {unavailable_numbers}")
-            
-            # Assign seats to this booking
-            seats.update(
-                booking=self,
-                is_available=False,
-                reserved_until=None,
-                passenger_name=None  # Will be updated when passengers are added
-            )
+            if lost:
+                existing = set(
+                    Seat.objects.filter(
+                        trip_id=self.trip_id,
+                        seat_number__in=lost
+                    ).values_list('seat_number', flat=True)
+                )
+                missing = set(lost) - existing
+                if missing:
+                    raise ValueError(f"Seats do not exist: {missing}")
+                raise ValueError(f"Seats already taken: {lost}")
             
             # Save seat numbers to booking
             self.selected_seats = seat_numbers
             self.save(update_fields=['selected_seats'])
             
-            return seats
+            return Seat.objects.filter(booking=self)
     
     def release_seats(self):
         """Release all seats assigned to this booking"""
         
         # Import here to avoid circular import
         from apps.bookings.models import Seat
+        from apps.bookings.utils.seat_feed import update_seats
         
         seats = Seat.objects.filter(booking=self)
-        seats.update(
+        update_seats(
+            seats,
             booking=None,
             is_available=True,
             reserved_until=None,
@@ -261,21 +328,28 @@ class Booking(models.Model):
         self.save(update_fields=['selected_seats'])
     
     def cancel(self):
-        """Cancel booking and release seats"""
+        """Cancel booking and release seats (no cancellation deadline, see cancel_booking)"""
+        from django.db.models import F
+        from apps.transport.models import Trip
+        from apps.bookings.services.waitlist_service import notify_seats_released
+        
         if self.booking_status == 'cancelled':
             return False
         
-        self.booking_status = 'cancelled'
-        self.cancelled_at = timezone.now()
-        
-        # Release seats when cancelling
-        self.release_seats()
-        
-        # Release seats back to trip
-        self.trip.available_seats += self.total_passengers
-        self.trip.save()
-        
-        self.save(update_fields=['booking_status', 'cancelled_at'])
+        with transaction.atomic():
+            self.booking_status = 'cancelled'
+            self.cancelled_at = timezone.now()
+            self.save(update_fields=['booking_status', 'cancelled_at', 'updated_at'])
+            
+            # Release seats when cancelling
+            self.release_seats()
+            
+            # Release seats back to trip (atomic increment, no lost update)
+            Trip.objects.filter(pk=self.trip_id).update(
+                available_seats=F('available_seats') + self.total_passengers
+            )
+            
+            notify_seats_released(self.trip_id)
         
         return True
 
@@ -335,6 +409,11 @@ class Seat(models.Model):
         help_text="Expiration de la réservation temporaire"
     )
     
+    version = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Seat version (bookings_seat_version_seq) of the last change to this seat"
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -343,6 +422,7 @@ class Seat(models.Model):
         ordering = ['row', 'position']
         indexes = [
             models.Index(fields=['trip', 'is_available']),
+            models.Index(fields=['trip', 'version']),
         ]
     
     def __str__(self):
@@ -399,6 +479,10 @@ class Passenger(models.Model):
     emergency_contact_name = models.CharField(max_length=100, blank=True)
     emergency_contact_phone = models.CharField(max_length=20, blank=True)
     
+    # Boarding
+    boarded_at = models.DateTimeField(null=True, blank=True, help_text="First boarding scan")
+    boarding_device = models.CharField(max_length=100, blank=True, help_text="Scanner that boarded the passenger")
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -411,3 +495,365 @@ class Passenger(models.Model):
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    First response of a retried POST (booking creation, payment init).
+    Retries with the same Idempotency-Key header replay it instead of
+    running the pipeline again.
+    """
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys'
+    )
+    key = models.CharField(max_length=255, help_text="Idempotency-Key header sent by the client")
+    scope = models.CharField(max_length=50, help_text="Endpoint the key was used on")
+    request_hash = models.CharField(max_length=64, help_text="SHA-256 of scope and request body")
+    
+    # Stored response (null while the first request is still running)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=JSONEncoder)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(
+        db_index=True,
+        help_text="Lock expiry while in progress, replay expiry once completed"
+    )
+    
+    class Meta:
+        unique_together = ['user', 'key']
+    
+    def __str__(self):
+        return f"{self.scope} - {self.key}"
+    
+    @property
+    def is_completed(self):
+        return self.response_status is not None
+
+
+
+class BackgroundJob(models.Model):
+    """
+    Database-backed job queue, processed by `manage.py run_jobs`.
+    Jobs that keep failing end up as 'dead' (dead-letter) after max_attempts.
+    """
+    
+    job_type = models.CharField(max_length=50, choices=JOB_TYPE_CHOICES)
+    status = models.CharField(
+        max_length=20,
+        choices=JOB_STATUS_CHOICES,
+        default='pending'
+    )
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.CASCADE,
+        related_name='jobs',
+        null=True,
+        blank=True
+    )
+    payload = models.JSONField(default=dict, blank=True)
+    
+    # Retries
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now, help_text="Not picked up before this time")
+    last_error = models.TextField(blank=True)
+    
+    # Worker lock
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    
+    # Duration of each stage of the last run, in milliseconds
+    stage_timings = models.JSONField(default=dict, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['run_after']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['job_type', 'booking'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='unique_active_job_per_booking'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.job_type} #{self.id} ({self.status})"
+
+
+class UserStats(models.Model):
+    """
+    Per-user booking and payment totals shown on the profile page.
+    Refreshed after each booking/payment change (see services/stats_service),
+    so reading them costs one row whatever the user's history.
+    """
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='booking_stats'
+    )
+    
+    # Bookings
+    total_bookings = models.PositiveIntegerField(default=0)
+    pending_bookings = models.PositiveIntegerField(default=0)
+    confirmed_bookings = models.PositiveIntegerField(default=0)
+    cancelled_bookings = models.PositiveIntegerField(default=0)
+    completed_bookings = models.PositiveIntegerField(default=0)
+    total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Sum of paid bookings")
+    
+    # Payments
+    total_payments = models.PositiveIntegerField(default=0)
+    completed_payments = models.PositiveIntegerField(default=0)
+    pending_payments = models.PositiveIntegerField(default=0)
+    failed_payments = models.PositiveIntegerField(default=0)
+    payments_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Sum of completed payments")
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'user stats'
+    
+    def __str__(self):
+        return f"Stats {self.user_id}"
+
+
+def generate_feed_token():
+    return secrets.token_urlsafe(32)
+
+
+class CalendarFeed(models.Model):
+    """
+    Secret token of a user's iCalendar subscription URL.
+    Calendar apps can't send a JWT, so the token in the URL is the credential.
+    """
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='calendar_feed'
+    )
+    token = models.CharField(max_length=64, unique=True, default=generate_feed_token)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Calendar feed {self.user_id}"
+    
+    def rotate(self):
+        """Replace the token (the old subscription URL stops working)"""
+        self.token = generate_feed_token()
+        self.save(update_fields=['token'])
+
+
+class BookingGroup(models.Model):
+    """
+    Group or corporate booking (church groups, companies, schools):
+    one Booking per trip, all paid with a single payment.
+    """
+    
+    group_reference = models.CharField(
+        max_length=20,
+        unique=True,
+        help_text="Unique group reference (e.g., GRP-20251201-7QK2M9D)"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='booking_groups',
+        help_text="Organizer who made the group booking"
+    )
+    organization_name = models.CharField(max_length=200, blank=True)
+    contact_email = models.EmailField()
+    contact_phone = models.CharField(max_length=20, blank=True)
+    
+    total_passengers = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text="Amount of the consolidated payment (all bookings)"
+    )
+    payment_status = models.CharField(
+        max_length=20,
+        choices=PAYMENT_STATUS_CHOICES,
+        default='pending',
+        db_index=True
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.group_reference} - {self.total_passengers} passengers"
+
+
+class WaitlistEntry(models.Model):
+    """
+    Traveler waiting for seats on a full trip (FIFO per trip).
+    When seats are released the next entry gets a time-limited offer:
+    its seats are held (counted out of available_seats) until it books
+    or the offer expires (see services/waitlist_service).
+    """
+    
+    trip = models.ForeignKey(
+        'transport.Trip',
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries'
+    )
+    party_size = models.PositiveSmallIntegerField(
+        default=1,
+        validators=[MinValueValidator(1)],
+        help_text="Seats wanted"
+    )
+    contact_email = models.EmailField()
+    contact_phone = models.CharField(max_length=20, blank=True)
+    
+    status = models.CharField(
+        max_length=20,
+        choices=WAITLIST_STATUS_CHOICES,
+        default='waiting'
+    )
+    
+    # Current offer
+    offered_seats = models.JSONField(default=list, blank=True, help_text="Seat numbers held for the offer")
+    offered_at = models.DateTimeField(null=True, blank=True)
+    offer_expires_at = models.DateTimeField(null=True, blank=True)
+    notified_at = models.DateTimeField(null=True, blank=True, help_text="When the offer email was sent")
+    
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='waitlist_entries',
+        help_text="Booking made from the offer"
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['trip', 'status', 'created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['trip', 'user'],
+                condition=models.Q(status__in=['waiting', 'offered']),
+                name='unique_active_waitlist_entry'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Waitlist {self.trip_id} - {self.user_id} ({self.status})"
+
+
+class TripCancellation(models.Model):
+    """
+    Cancellation of a trip by the operator and its progress: bookings are
+    cancelled, refunded and notified in batches by a background job
+    (see services/trip_cancellation_service).
+    """
+    
+    trip = models.OneToOneField(
+        'transport.Trip',
+        on_delete=models.CASCADE,
+        related_name='cancellation'
+    )
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='trip_cancellations'
+    )
+    reason = models.CharField(max_length=255, blank=True)
+    
+    status = models.CharField(
+        max_length=20,
+        choices=TRIP_CANCELLATION_STATUS_CHOICES,
+        default='pending',
+        db_index=True
+    )
+    
+    # Progress
+    total_bookings = models.PositiveIntegerField(default=0, help_text="Bookings to cancel when requested")
+    cancelled_bookings = models.PositiveIntegerField(default=0)
+    seats_released = models.PositiveIntegerField(default=0)
+    refunds_enqueued = models.PositiveIntegerField(default=0)
+    notifications_sent = models.PositiveIntegerField(default=0)
+    notifications_failed = models.PositiveIntegerField(default=0)
+    batches = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Cancellation trip {self.trip_id} ({self.status})"
+    
+    @property
+    def progress(self):
+        """Share of bookings processed, in percent"""
+        if not self.total_bookings:
+            return 100 if self.status == 'completed' else 0
+        return min(100, round(self.cancelled_bookings / self.total_bookings * 100))
+
+
+class SeatReconciliationRun(models.Model):
+    """
+    One run of the seat counter reconciliation (see
+    services/seat_reconciliation_service): how many trips had an
+    available_seats counter out of line with their bookings, by how much,
+    and whether it was fixed. Kept as drift metrics over time.
+    """
+    
+    started_at = models.DateTimeField(default=timezone.now, db_index=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    dry_run = models.BooleanField(default=False)
+    
+    trips_checked = models.PositiveIntegerField(default=0)
+    trips_drifted = models.PositiveIntegerField(default=0)
+    trips_fixed = models.PositiveIntegerField(default=0)
+    seats_drift = models.PositiveIntegerField(default=0, help_text="Sum of |recorded - expected| over drifted trips")
+    oversold_trips = models.PositiveIntegerField(default=0, help_text="Trips with more passengers than seats")
+    orphaned_seats = models.PositiveIntegerField(default=0, help_text="Seats still held by cancelled bookings")
+    seats_released = models.PositiveIntegerField(default=0)
+    
+    # [{'trip_id', 'recorded', 'expected', 'delta', 'orphaned_seats'}], largest drifts first
+    drifts = models.JSONField(default=list, blank=True)
+    
+    class Meta:
+        ordering = ['-started_at']
+    
+    def __str__(self):
+        return f"Seat reconciliation {self.started_at:%Y-%m-%d %H:%M} ({self.trips_drifted}/{self.trips_checked} drifted)"
+    
+    @property
+    def drift_rate(self):
+        """Share of checked trips that had drifted, in percent"""
+        if not self.trips_checked:
+            return 0
+        return round(self.trips_drifted / self.trips_checked * 100, 2)
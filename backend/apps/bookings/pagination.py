@@ -0,0 +1,29 @@
+# Backend/apps/bookings/pagination.py
+
+from rest_framework.pagination import CursorPagination
+
+
+class BookingCursorPagination(CursorPagination):
+    """
+    Cursor pagination for booking history.
+
+    Pages are read straight from the (user, created_at) index whatever the
+    page depth, and stay stable while new bookings are added. Only indexed
+    orderings listed in ORDERINGS are accepted; anything else falls back
+    to newest first.
+    """
+
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
+
+    ORDERING_PARAM = 'ordering'
+    ORDERINGS = {'created_at', '-created_at'}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = request.query_params.get(self.ORDERING_PARAM, self.ordering)
+        if ordering not in self.ORDERINGS:
+            ordering = self.ordering
+        # Deterministic order when created_at values tie
+        return (ordering, '-id' if ordering.startswith('-') else 'id')
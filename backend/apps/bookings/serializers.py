@@ -3,13 +3,15 @@
 from rest_framework import serializers
 from django.utils import timezone
 from datetime import datetime
-from .models import Booking, Passenger, Seat
+from .models import Booking, BookingGroup, Passenger, Seat, TripCancellation, WaitlistEntry
 from apps.transport.models import Trip
-from apps.bookings.services.booking_services import (
-    validate_trip_bookable,
-    check_seat_availability,
-    create_booking_with_passengers
+from apps.bookings.services.booking_services import create_booking_with_passengers
+from apps.bookings.services.group_booking_service import (
+    create_group_booking,
+    GROUP_BOOKING_MAX_PASSENGERS,
+    GROUP_BOOKING_MAX_TRIPS
 )
+from apps.bookings.services.waitlist_service import WAITLIST_MAX_PARTY_SIZE
 
 
 class PassengerSerializer(serializers.ModelSerializer):
@@ -130,6 +132,7 @@ class BookingDetailSerializer(serializers.ModelSerializer):
     trip = TripBasicSerializer(read_only=True)
     passengers = PassengerSerializer(many=True, read_only=True)
     is_cancellable = serializers.BooleanField(read_only=True)
+    payment_deadline = serializers.DateTimeField(read_only=True)
     
     class Meta:
         model = Booking
@@ -148,6 +151,7 @@ class BookingDetailSerializer(serializers.ModelSerializer):
             'contact_phone',
             'qr_code_data',
             'is_cancellable',
+            'payment_deadline',
             'created_at',
             'updated_at',
             'cancelled_at'
@@ -163,20 +167,6 @@ class BookingCreateSerializer(serializers.Serializer):
     contact_email = serializers.EmailField(required=True)
     contact_phone = serializers.CharField(max_length=20, required=True)
     
-    def validate_trip_id(self, value):
-        """Validate trip exists and is bookable"""
-        try:
-            trip = Trip.objects.get(id=value)
-        except Trip.DoesNotExist:
-            raise serializers.ValidationError("Trip not found")
-        
-        # Check if trip is bookable
-        is_valid, error = validate_trip_bookable(trip)
-        if not is_valid:
-            raise serializers.ValidationError(error)
-        
-        return value
-    
     def validate_passengers(self, value):
         """Validate passengers list"""
         if not value:
@@ -187,40 +177,23 @@ class BookingCreateSerializer(serializers.Serializer):
         
         return value
     
-    def validate(self, attrs):
-        """Cross-field validation"""
-        trip_id = attrs.get('trip_id')
-        passengers = attrs.get('passengers', [])
-        
-        # Get trip
-        try:
-            trip = Trip.objects.get(id=trip_id)
-        except Trip.DoesNotExist:
-            raise serializers.ValidationError({"trip_id": "Trip not found"})
-        
-        # Check seat availability
-        is_available, error = check_seat_availability(trip, len(passengers))
-        if not is_available:
-            raise serializers.ValidationError({"passengers": error})
-        
-        return attrs
-    
     def create(self, validated_data):
-        """Create booking with passengers"""
+        """
+        Create booking with passengers.
+        Trip existence, bookability and seat availability are checked by the
+        service in the same transaction that reads the trip (read once).
+        """
         trip_id = validated_data['trip_id']
         passengers_data = validated_data['passengers']
         contact_email = validated_data['contact_email']
         contact_phone = validated_data['contact_phone']
         
-        # Get trip
-        trip = Trip.objects.get(id=trip_id)
-        
         # Get user from context
         user = self.context['request'].user
         
         # Create booking
         booking, error = create_booking_with_passengers(
-            trip=trip,
+            trip_id=trip_id,
             user=user,
             passengers_data=passengers_data,
             contact_email=contact_email,
@@ -233,6 +206,92 @@ class BookingCreateSerializer(serializers.Serializer):
         return booking
 
 
+class GroupBookingLegSerializer(serializers.Serializer):
+    """Passengers of a group travelling on one trip"""
+    
+    trip_id = serializers.IntegerField(required=True)
+    passengers = PassengerCreateSerializer(many=True, allow_empty=False)
+    prefer_window = serializers.BooleanField(default=False)
+
+
+class GroupBookingCreateSerializer(serializers.Serializer):
+    """Serializer for creating a group/corporate booking over one or more trips"""
+    
+    organization_name = serializers.CharField(max_length=200, required=False, allow_blank=True, default='')
+    contact_email = serializers.EmailField(required=True)
+    contact_phone = serializers.CharField(max_length=20, required=True)
+    trips = GroupBookingLegSerializer(many=True, allow_empty=False)
+    
+    def validate_trips(self, value):
+        """Validate group size and trips"""
+        if len(value) > GROUP_BOOKING_MAX_TRIPS:
+            raise serializers.ValidationError(f"Maximum {GROUP_BOOKING_MAX_TRIPS} trips per group booking")
+        
+        trip_ids = [leg['trip_id'] for leg in value]
+        if len(set(trip_ids)) != len(trip_ids):
+            raise serializers.ValidationError("Each trip can only appear once")
+        
+        total = sum(len(leg['passengers']) for leg in value)
+        if total > GROUP_BOOKING_MAX_PASSENGERS:
+            raise serializers.ValidationError(f"Maximum {GROUP_BOOKING_MAX_PASSENGERS} passengers per group booking")
+        
+        return value
+    
+    def create(self, validated_data):
+        group, error = create_group_booking(
+            user=self.context['request'].user,
+            legs=validated_data['trips'],
+            contact_email=validated_data['contact_email'],
+            contact_phone=validated_data['contact_phone'],
+            organization_name=validated_data['organization_name']
+        )
+        
+        if error:
+            raise serializers.ValidationError(error)
+        
+        return group
+
+
+class GroupMemberBookingSerializer(serializers.ModelSerializer):
+    """Booking of a group (one per trip)"""
+    
+    trip = TripBasicSerializer(read_only=True)
+    
+    class Meta:
+        model = Booking
+        fields = [
+            'booking_reference',
+            'trip',
+            'total_passengers',
+            'selected_seats',
+            'total_amount',
+            'booking_status',
+            'payment_status'
+        ]
+        read_only_fields = fields
+
+
+class BookingGroupSerializer(serializers.ModelSerializer):
+    """Group booking with its per-trip bookings"""
+    
+    bookings = GroupMemberBookingSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = BookingGroup
+        fields = [
+            'group_reference',
+            'organization_name',
+            'contact_email',
+            'contact_phone',
+            'total_passengers',
+            'total_amount',
+            'payment_status',
+            'bookings',
+            'created_at'
+        ]
+        read_only_fields = fields
+
+
 class BookingCancelSerializer(serializers.Serializer):
     """Serializer for cancelling a booking"""
     
@@ -260,10 +319,19 @@ class SeatSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'reserved_until']
 
 
+class SeatChangeSerializer(SeatSerializer):
+    """Serializer for seat state deltas in the seat map change feed"""
+    
+    class Meta(SeatSerializer.Meta):
+        fields = SeatSerializer.Meta.fields + ['version']
+        read_only_fields = fields
+
+
 class SeatMapSerializer(serializers.Serializer):
     """Serializer for complete seat map with trip context"""
     
     trip_id = serializers.IntegerField()
+    version = serializers.IntegerField()
     seat_layout = serializers.CharField()
     total_seats = serializers.IntegerField()
     available_seats = serializers.IntegerField()
@@ -319,6 +387,27 @@ class SeatReservationSerializer(serializers.Serializer):
         return data
 
 
+class SeatAutoAssignSerializer(serializers.Serializer):
+    """Serializer for best-available seat auto-assignment requests"""
+    
+    trip_id = serializers.IntegerField()
+    count = serializers.IntegerField(
+        min_value=1,
+        max_value=10,
+        help_text="Number of seats to assign together"
+    )
+    prefer_window = serializers.BooleanField(default=False)
+    
+    def validate(self, data):
+        """Validate trip exists"""
+        try:
+            data['trip'] = Trip.objects.get(id=data['trip_id'])
+        except Trip.DoesNotExist:
+            raise serializers.ValidationError({"trip_id": "Trip not found"})
+        
+        return data
+
+
 class SeatReleaseSerializer(serializers.Serializer):
     """Serializer for releasing reserved seats"""
     
@@ -330,6 +419,115 @@ class SeatReleaseSerializer(serializers.Serializer):
     )
 
 
+class BoardingScanSerializer(serializers.Serializer):
+    """One QR scan: a ticket token, or a booking reference + verification hash"""
+    
+    token = serializers.CharField(max_length=200, required=False)
+    booking_reference = serializers.CharField(max_length=20, required=False)
+    verification_hash = serializers.CharField(max_length=64, required=False)
+    passenger_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        help_text="Passengers boarding (all passengers of the booking if omitted)"
+    )
+    scanned_at = serializers.DateTimeField(required=False)
+    
+    def validate_scanned_at(self, value):
+        """Device clocks drift: never accept a scan time in the future"""
+        return min(value, timezone.now())
+    
+    def validate(self, data):
+        """Require a token or a reference with its hash"""
+        if not data.get('token') and not (data.get('booking_reference') and data.get('verification_hash')):
+            raise serializers.ValidationError("Provide a token, or booking_reference and verification_hash")
+        return data
+
+
+class BoardingUploadSerializer(serializers.Serializer):
+    """Check-in submission from a scanner device (live or offline batch)"""
+    
+    device_id = serializers.CharField(max_length=100)
+    scans = BoardingScanSerializer(many=True, allow_empty=False, max_length=1000)
+
+
+class BoardingCheckInSerializer(BoardingScanSerializer):
+    """Single live scan from a scanner device"""
+    
+    device_id = serializers.CharField(max_length=100)
+
+
+class WaitlistJoinSerializer(serializers.Serializer):
+    """Join the waitlist of a full trip"""
+    
+    party_size = serializers.IntegerField(min_value=1, max_value=WAITLIST_MAX_PARTY_SIZE, default=1)
+    contact_email = serializers.EmailField(required=True)
+    contact_phone = serializers.CharField(max_length=20, required=False, allow_blank=True, default='')
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    """Waitlist entry with its queue position"""
+    
+    position = serializers.SerializerMethodField()
+    booking_reference = serializers.CharField(source='booking.booking_reference', read_only=True, default=None)
+    
+    class Meta:
+        model = WaitlistEntry
+        fields = [
+            'id',
+            'trip',
+            'party_size',
+            'status',
+            'position',
+            'offered_seats',
+            'offer_expires_at',
+            'booking_reference',
+            'created_at'
+        ]
+        read_only_fields = fields
+    
+    def get_position(self, obj):
+        return self.context.get('position')
+
+
+class WaitlistAcceptSerializer(serializers.Serializer):
+    """Book the seats offered from the waitlist"""
+    
+    passengers = PassengerCreateSerializer(many=True, allow_empty=False, max_length=WAITLIST_MAX_PARTY_SIZE)
+
+
+class TripCancellationSerializer(serializers.ModelSerializer):
+    """Progress of a trip cancellation"""
+    
+    progress = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = TripCancellation
+        fields = [
+            'id',
+            'trip',
+            'reason',
+            'status',
+            'progress',
+            'total_bookings',
+            'cancelled_bookings',
+            'seats_released',
+            'refunds_enqueued',
+            'notifications_sent',
+            'notifications_failed',
+            'batches',
+            'last_error',
+            'created_at',
+            'completed_at'
+        ]
+        read_only_fields = fields
+
+
+class TripCancelSerializer(serializers.Serializer):
+    """Cancel a trip or a whole day of service"""
+    
+    reason = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+
+
 class BookingWithSeatsSerializer(serializers.ModelSerializer):
     """Extended booking serializer with seat information"""
     
@@ -0,0 +1,160 @@
+# Backend/apps/bookings/services/batch_mailer.py
+
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.mail import get_connection
+import smtplib
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+EMAIL_BATCH_SIZE = getattr(settings, 'EMAIL_BATCH_SIZE', 50)                 # messages per SMTP connection
+EMAIL_BATCH_CONCURRENCY = getattr(settings, 'EMAIL_BATCH_CONCURRENCY', 2)   # connections open at once
+EMAIL_RATE_LIMIT = getattr(settings, 'EMAIL_RATE_LIMIT', 0)                 # messages/second, 0 = unlimited
+
+
+class RateLimiter:
+    """Spread sends evenly to stay under the provider's messages/second quota (shared by threads)"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class BatchResult:
+    """Outcome of BatchMailer.send()"""
+
+    def __init__(self, count):
+        self.sent = [False] * count   # per message, in input order
+        self.errors = {}              # message index -> error
+        self.batches = []             # per-batch report dicts
+        self.elapsed = 0.0
+
+    @property
+    def sent_count(self):
+        return sum(self.sent)
+
+    @property
+    def failed_count(self):
+        return len(self.sent) - self.sent_count
+
+    @property
+    def rate(self):
+        return self.sent_count / self.elapsed if self.elapsed else 0
+
+
+class BatchMailer:
+    """
+    Send many emails over a few reused SMTP connections.
+
+    Messages are split into batches; each batch is sent over a single
+    connection (one SMTP handshake and login instead of one per message),
+    with up to `concurrency` batches in flight and an optional global
+    messages/second limit. A failing message does not stop its batch,
+    and a dropped connection is reopened once.
+
+    Example:
+        result = BatchMailer().send(messages)
+        result.sent_count, result.errors, result.batches
+    """
+
+    def __init__(self, batch_size=None, concurrency=None, rate_limit=None, connection_factory=None):
+        self.batch_size = max(1, batch_size or EMAIL_BATCH_SIZE)
+        self.concurrency = max(1, concurrency or EMAIL_BATCH_CONCURRENCY)
+        self.rate_limiter = RateLimiter(EMAIL_RATE_LIMIT if rate_limit is None else rate_limit)
+        self.connection_factory = connection_factory or get_connection
+
+    def _send_batch(self, number, indexed_messages, result):
+        started = time.perf_counter()
+        sent = failed = 0
+        connection = self.connection_factory(fail_silently=False)
+
+        try:
+            connection.open()
+            for index, message in indexed_messages:
+                self.rate_limiter.wait()
+                message.connection = connection
+                try:
+                    try:
+                        connection.send_messages([message])
+                    except smtplib.SMTPServerDisconnected:
+                        # Server closed an idle/long connection: reconnect once
+                        connection.close()
+                        connection.open()
+                        connection.send_messages([message])
+                    result.sent[index] = True
+                    sent += 1
+                except Exception as e:
+                    result.errors[index] = str(e)
+                    failed += 1
+        except Exception as e:
+            # Could not connect: the whole batch fails
+            for index, _ in indexed_messages:
+                if not result.sent[index] and index not in result.errors:
+                    result.errors[index] = str(e)
+                    failed += 1
+        finally:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+        elapsed = time.perf_counter() - started
+        report = {
+            'batch': number,
+            'size': len(indexed_messages),
+            'sent': sent,
+            'failed': failed,
+            'seconds': round(elapsed, 3),
+            'per_second': round(sent / elapsed, 1) if elapsed else 0,
+        }
+        logger.info(f"📧 Mail batch {number}: {sent}/{len(indexed_messages)} sent in {elapsed:.2f}s ({report['per_second']}/s)")
+        return report
+
+    def send(self, messages):
+        """
+        Send messages (EmailMessage / EmailMultiAlternatives instances)
+
+        Returns:
+            BatchResult
+        """
+        messages = list(messages)
+        result = BatchResult(len(messages))
+        if not messages:
+            return result
+
+        indexed = list(enumerate(messages))
+        batches = [indexed[i:i + self.batch_size] for i in range(0, len(indexed), self.batch_size)]
+
+        started = time.perf_counter()
+        if self.concurrency == 1 or len(batches) == 1:
+            reports = [self._send_batch(number, batch, result) for number, batch in enumerate(batches, 1)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as executor:
+                futures = [
+                    executor.submit(self._send_batch, number, batch, result)
+                    for number, batch in enumerate(batches, 1)
+                ]
+                reports = [future.result() for future in futures]
+        result.elapsed = time.perf_counter() - started
+        result.batches = reports
+
+        logger.info(
+            f"📧 {result.sent_count}/{len(messages)} emails sent in {len(batches)} batch(es), "
+            f"{result.elapsed:.2f}s ({result.rate:.1f}/s)"
+        )
+        return result
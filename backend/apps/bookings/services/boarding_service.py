@@ -0,0 +1,264 @@
+# Backend/apps/bookings/services/boarding_service.py
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, Value, When
+from django.utils import timezone
+from .qr_service import QRCodeService
+from .ticket_token import verify_ticket_token
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+MANIFEST_VERSION = 2                      # 2: entries by passenger id for ticket tokens
+MANIFEST_VALIDITY = timedelta(hours=12)   # after departure, scanners discard the file
+
+
+def manifest_key():
+    """HMAC key shared with scanner devices"""
+    key = getattr(settings, 'BOARDING_MANIFEST_KEY', '')
+    if key:
+        return key.encode()
+    return hashlib.sha256(f"boarding-manifest|{settings.SECRET_KEY}".encode()).digest()
+
+
+def sign_manifest(content):
+    """HMAC-SHA256 hex signature of the manifest file bytes"""
+    return hmac.new(manifest_key(), content, hashlib.sha256).hexdigest()
+
+
+def build_boarding_manifest(trip):
+    """
+    Build the offline boarding manifest of a trip.
+
+    The file is gzipped compact JSON and deterministic: the same bookings
+    give the same bytes and signature. It lists, by passenger id:
+        passengers: [[passenger_id, booking_reference, name, seat, boarded], ...]
+            for confirmed bookings
+        revoked: [passenger_id, ...] for cancelled bookings
+    Scanners check the NT: ticket token offline (signature with the ticket
+    token key, validity window, trip id, see ticket_token), then look up
+    its passenger id: revoked means cancelled, absent means booked after
+    the download (check online).
+
+    Args:
+        trip: Trip instance
+
+    Returns:
+        tuple: (content bytes, signature hex, passenger count)
+    """
+    from apps.bookings.models import Passenger
+
+    rows = Passenger.objects.filter(
+        booking__trip=trip,
+        booking__booking_status__in=['confirmed', 'cancelled']
+    ).order_by('id').values_list(
+        'id', 'booking__booking_reference', 'booking__booking_status',
+        'first_name', 'last_name', 'seat_number', 'boarded_at'
+    )
+
+    passengers = []
+    revoked = []
+    for passenger_id, reference, booking_status, first_name, last_name, seat_number, boarded_at in rows:
+        if booking_status == 'cancelled':
+            revoked.append(passenger_id)
+            continue
+        passengers.append([
+            passenger_id,
+            reference,
+            f"{first_name} {last_name}",
+            seat_number or '',
+            bool(boarded_at)
+        ])
+
+    payload = {
+        'v': MANIFEST_VERSION,
+        'trip': trip.id,
+        'departure': trip.departure_datetime.isoformat(),
+        'expires_at': (trip.departure_datetime + MANIFEST_VALIDITY).isoformat(),
+        'passengers': passengers,
+        'revoked': revoked,
+    }
+
+    content = gzip.compress(
+        json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode(),
+        mtime=0
+    )
+    return content, sign_manifest(content), len(passengers)
+
+
+def get_boarding_counts(trip_id):
+    """
+    Live boarding counters of a trip, read from the trip row (no recount)
+
+    Returns:
+        dict: boarded, expected (seats sold) and remaining passengers
+    """
+    from apps.transport.models import Trip
+
+    total, available, boarded = Trip.objects.filter(id=trip_id).values_list(
+        'total_seats', 'available_seats', 'boarded_count'
+    ).get()
+    expected = total - available
+    return {
+        'boarded': boarded,
+        'expected': expected,
+        'remaining': max(expected - boarded, 0),
+    }
+
+
+def _resolve_scans(trip, scans):
+    """
+    Turn scans into (booking_reference, passenger_ids, scanned_at) claims.
+
+    Ticket tokens are checked without a database lookup; legacy
+    reference + hash scans need their bookings (one query for all).
+
+    Returns:
+        list: (claim or None, error message) per scan
+    """
+    from apps.bookings.models import Booking
+
+    legacy_references = {
+        scan['booking_reference'] for scan in scans
+        if not scan.get('token') and scan.get('booking_reference')
+    }
+    bookings = {}
+    if legacy_references:
+        bookings = {
+            booking.booking_reference: booking
+            for booking in Booking.objects.filter(
+                trip=trip,
+                booking_reference__in=legacy_references
+            ).prefetch_related('passengers')
+        }
+
+    resolved = []
+    for scan in scans:
+        scanned_at = scan.get('scanned_at') or timezone.now()
+
+        if scan.get('token'):
+            token, error = verify_ticket_token(scan['token'], now=scanned_at)
+            if error:
+                resolved.append((None, error))
+            elif token.trip_id != trip.id:
+                resolved.append((None, 'Ticket is for another trip'))
+            else:
+                resolved.append(((token.booking_reference, [token.passenger_id], scanned_at), None))
+            continue
+
+        reference = scan['booking_reference']
+        booking = bookings.get(reference)
+        passengers = sorted(booking.passengers.all(), key=lambda p: p.id) if booking else []
+        if not passengers:
+            resolved.append((None, 'Unknown booking for this trip'))
+            continue
+
+        expected_hash = QRCodeService.verification_hash(reference, passengers[0].phone)
+        if not hmac.compare_digest(scan['verification_hash'], expected_hash):
+            resolved.append((None, 'Verification failed'))
+            continue
+
+        ids = scan.get('passenger_ids') or [p.id for p in passengers]
+        resolved.append(((reference, ids, scanned_at), None))
+
+    return resolved
+
+
+def apply_boarding_scans(trip, scans, device_id):
+    """
+    Check in scanned passengers, first scan wins.
+
+    Works for a single live scan or a batch uploaded by a scanner: all
+    scans are applied in one transaction. Passenger rows are locked and
+    only those not boarded yet are updated, so two devices scanning the
+    same ticket can never both board it; Trip.boarded_count moves by
+    exactly the number of passengers boarded.
+
+    Args:
+        trip: Trip instance
+        scans: List of dicts with either token, or booking_reference +
+            verification_hash (+ optional passenger_ids), and scanned_at
+        device_id: Scanner identifier
+
+    Returns:
+        tuple: (results list, summary dict with live counts)
+    """
+    from apps.bookings.models import Passenger
+    from apps.transport.models import Trip
+
+    resolved = _resolve_scans(trip, scans)
+    claimed_ids = {pid for claim, _ in resolved if claim for pid in claim[1]}
+
+    with transaction.atomic():
+        rows = {}
+        if claimed_ids:
+            rows = {
+                row[0]: row
+                for row in Passenger.objects.select_for_update(of=('self',)).filter(
+                    id__in=claimed_ids,
+                    booking__trip=trip,
+                    booking__booking_status='confirmed'
+                ).values_list(
+                    'id', 'booking__booking_reference', 'boarded_at',
+                    'first_name', 'last_name', 'seat_number'
+                )
+            }
+
+        results = []
+        to_board = {}   # passenger_id -> scanned_at
+        for scan, (claim, error) in zip(scans, resolved):
+            reference = claim[0] if claim else scan.get('booking_reference', '')
+            if error:
+                results.append({'booking_reference': reference, 'status': 'invalid', 'error': error})
+                continue
+
+            _, ids, scanned_at = claim
+            if any(pid not in rows or rows[pid][1] != reference for pid in ids):
+                results.append({
+                    'booking_reference': reference,
+                    'status': 'invalid',
+                    'error': 'Ticket not valid for this trip (cancelled or unknown passenger)'
+                })
+                continue
+
+            newly = [pid for pid in ids if rows[pid][2] is None and pid not in to_board]
+            for pid in newly:
+                to_board[pid] = scanned_at
+            results.append({
+                'booking_reference': reference,
+                'status': 'boarded' if newly else 'already_boarded',
+                'passenger_ids': sorted(ids),
+                'boarded_passenger_ids': sorted(newly),
+                'passengers': [
+                    {'id': pid, 'name': f"{rows[pid][3]} {rows[pid][4]}", 'seat_number': rows[pid][5]}
+                    for pid in sorted(ids)
+                ],
+            })
+
+        if to_board:
+            Passenger.objects.filter(id__in=to_board, boarded_at__isnull=True).update(
+                boarded_at=Case(
+                    *[When(id=pid, then=Value(scanned_at)) for pid, scanned_at in to_board.items()],
+                    output_field=DateTimeField()
+                ),
+                boarding_device=device_id
+            )
+            Trip.objects.filter(id=trip.id).update(boarded_count=F('boarded_count') + len(to_board))
+
+        counts = get_boarding_counts(trip.id)
+
+    summary = {'received': len(scans), 'boarded': 0, 'already_boarded': 0, 'invalid': 0}
+    for result in results:
+        summary[result['status']] += 1
+    summary['passengers_boarded'] = len(to_board)
+    summary['counts'] = counts
+
+    logger.info(f"Boarding trip {trip.id} from {device_id}: {len(to_board)} boarded, {counts}")
+    return results, summary
@@ -0,0 +1,126 @@
+# Backend/apps/bookings/services/booking_expiry_service.py
+
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+from .stats_service import schedule_stats_refresh
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+PENDING_BOOKING_TTL = getattr(settings, 'PENDING_BOOKING_TTL', timedelta(minutes=30))   # unpaid bookings are released after this
+PENDING_EXPIRY_BATCH_SIZE = 200
+CHECKOUT_GRACE = timedelta(minutes=5)   # after the checkout session expires, before its booking does
+
+
+def expired_pending_bookings(now=None):
+    """
+    Unpaid bookings past their payment deadline, oldest first.
+
+    Served by the booking_pending_expiry_idx partial index. Bookings with
+    a checkout still open are kept until the checkout itself expires
+    (a group is paid through the payment of its first booking).
+
+    Returns:
+        QuerySet of Booking
+    """
+    from apps.bookings.models import Booking
+    from apps.payments.models import Payment
+    from apps.payments.services import CHECKOUT_SESSION_TTL
+
+    now = now or timezone.now()
+    open_checkout = Payment.objects.filter(
+        Q(booking_id=OuterRef('pk')) | Q(booking__group_id=OuterRef('group_id')),
+        status__in=['pending', 'processing'],
+        created_at__gt=now - CHECKOUT_SESSION_TTL - CHECKOUT_GRACE
+    )
+    return Booking.objects.filter(
+        booking_status='pending',
+        payment_status='pending',
+        created_at__lt=now - PENDING_BOOKING_TTL
+    ).filter(~Exists(open_checkout)).order_by('created_at')
+
+
+def expire_pending_batch(limit=PENDING_EXPIRY_BATCH_SIZE, now=None):
+    """
+    Cancel one batch of expired unpaid bookings and give their seats back.
+
+    Rows are claimed with SKIP LOCKED, so several sweepers (or a payment
+    confirming a booking at the same moment) never process a booking twice.
+    Seats are restored with one F() UPDATE per trip, trips in id order.
+
+    Returns:
+        list: Booking ids expired
+    """
+    from apps.bookings.models import Booking, Seat
+    from apps.bookings.utils import update_seats
+    from apps.transport.models import Trip
+    from .waitlist_service import notify_seats_released
+
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        rows = list(
+            expired_pending_bookings(now).select_for_update(skip_locked=True)
+            .values_list('id', 'trip_id', 'user_id', 'total_passengers')[:limit]
+        )
+        if not rows:
+            return []
+
+        ids = [row[0] for row in rows]
+        Booking.objects.filter(id__in=ids).update(
+            booking_status='cancelled',
+            cancelled_at=now,
+            updated_at=now
+        )
+
+        seats_by_trip = Counter()
+        for _, trip_id, _, passengers in rows:
+            seats_by_trip[trip_id] += passengers
+
+        seat_map_trips = set(
+            Seat.objects.filter(booking_id__in=ids).values_list('trip_id', flat=True).distinct()
+        )
+        for trip_id in sorted(seats_by_trip):
+            Trip.objects.filter(pk=trip_id).update(available_seats=F('available_seats') + seats_by_trip[trip_id])
+            if trip_id in seat_map_trips:
+                update_seats(
+                    Seat.objects.filter(trip_id=trip_id, booking_id__in=ids),
+                    booking=None,
+                    is_available=True,
+                    reserved_until=None,
+                    passenger_name=None
+                )
+            notify_seats_released(trip_id)
+
+        # Bulk UPDATE sends no post_save signal
+        for user_id in {row[2] for row in rows}:
+            schedule_stats_refresh(user_id)
+
+    return ids
+
+
+def expire_pending_bookings(batch_size=PENDING_EXPIRY_BATCH_SIZE, max_batches=None, now=None):
+    """
+    One sweeper tick: expire unpaid bookings batch by batch until none
+    are left (or max_batches is reached).
+
+    Returns:
+        int: Number of bookings expired
+    """
+    expired = batches = 0
+
+    while max_batches is None or batches < max_batches:
+        ids = expire_pending_batch(batch_size, now)
+        if not ids:
+            break
+        expired += len(ids)
+        batches += 1
+
+    if expired:
+        logger.info(f"⌛ {expired} unpaid booking(s) expired in {batches} batch(es), seats released")
+    return expired
@@ -3,19 +3,17 @@
 from django.db import transaction
 from django.utils import timezone
 from datetime import datetime
-import random
-import string
+from .reference_service import BookingReferenceService
+from .ticket_artifacts import TicketArtifacts
 
 
 def generate_booking_reference():
     """
     Generate unique booking reference code
-    Format: NVT-YYYYMMDD-XXXXX
-    Example: NVT-20251201-A1B2C
+    Format: NVT-YYYYMMDD-XXXXXXC (counter-derived, with check symbol)
+    Example: NVT-20251201-7QK2M9D
     """
-    date_str = timezone.now().strftime('%Y%m%d')
-    random_code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=5))
-    return f"NVT-{date_str}-{random_code}"
+    return BookingReferenceService.generate()[0]
 
 
 def check_seat_availability(trip, requested_seats):
@@ -35,12 +33,13 @@ def check_seat_availability(trip, requested_seats):
     return True, ""
 
 
-def validate_trip_bookable(trip):
+def validate_trip_bookable(trip, check_seats=True):
     """
     Validate if trip can accept bookings
     
     Args:
         trip: Trip instance
+        check_seats: Also require free seats (off for seats already held, e.g. waitlist offers)
     
     Returns:
         tuple: (bool, str) - (is_valid, error_message)
@@ -60,7 +59,7 @@ def validate_trip_bookable(trip):
         return False, "Cannot book trips in the past"
     
     # Check if seats available
-    if trip.available_seats <= 0:
+    if check_seats and trip.available_seats <= 0:
         return False, "No seats available for this trip"
     
     return True, ""
@@ -110,52 +109,78 @@ def calculate_booking_price(trip, num_passengers):
 
 
 @transaction.atomic
-def create_booking_with_passengers(trip, user, passengers_data, contact_email, contact_phone):
+def create_booking_with_passengers(trip_id, user, passengers_data, contact_email, contact_phone, seats_held=False):
     """
     Create booking with passengers atomically
     All operations succeed or all rollback
     
+    Fixed query budget, whatever the number of passengers:
+    1 SELECT trip (with route, cities and company for the response),
+    1 conditional UPDATE of available seats (takes the trip row lock),
+    1 INSERT booking, 1 bulk INSERT passengers.
+    
     Args:
-        trip: Trip instance
+        trip_id: ID of the trip to book
         user: User making the booking
         passengers_data: List of passenger dictionaries
         contact_email: Contact email for booking
         contact_phone: Contact phone for booking
+        seats_held: Seats were already taken out of available_seats
+            (waitlist offer), don't decrement them again
     
     Returns:
         tuple: (Booking instance or None, error_message or None)
     """
     from apps.bookings.models import Booking, Passenger
+    from apps.transport.models import Trip
     from django.db.models import F
     
     num_passengers = len(passengers_data)
     
+    # Read the trip once
+    try:
+        trip = Trip.objects.select_related(
+            'route__origin_city',
+            'route__destination_city',
+            'route__bus_company'
+        ).get(id=trip_id)
+    except Trip.DoesNotExist:
+        return None, "Trip not found"
+    
     # Validate trip is bookable
-    is_valid, error = validate_trip_bookable(trip)
+    is_valid, error = validate_trip_bookable(trip, check_seats=not seats_held)
     if not is_valid:
         return None, error
     
-    # Check seat availability
-    is_available, error = check_seat_availability(trip, num_passengers)
-    if not is_available:
-        return None, error
+    if not seats_held:
+        # Check seat availability
+        is_available, error = check_seat_availability(trip, num_passengers)
+        if not is_available:
+            return None, error
+        
+        # Decrement seats only if they are still there and the trip is still
+        # bookable; fails atomically when a concurrent booking took them or
+        # the trip was cancelled since the read above
+        decremented = Trip.objects.filter(
+            pk=trip.pk,
+            status__in=['scheduled', 'on_time'],
+            available_seats__gte=num_passengers
+        ).update(available_seats=F('available_seats') - num_passengers)
+        
+        if not decremented:
+            return None, f"Trip no longer bookable or not enough seats for {num_passengers} passengers"
+        
+        trip.available_seats -= num_passengers
     
     # Calculate pricing
     pricing = calculate_booking_price(trip, num_passengers)
     
-    # Generate unique booking reference
-    booking_reference = generate_booking_reference()
-    
-    # Ensure uniqueness
-    while Booking.objects.filter(booking_reference=booking_reference).exists():
-        booking_reference = generate_booking_reference()
-    
     try:
-        # Create booking
+        # Create booking (references are unique by construction)
         booking = Booking.objects.create(
             trip=trip,
             user=user,
-            booking_reference=booking_reference,
+            booking_reference=generate_booking_reference(),
             ticket_price=pricing['ticket_price'],
             platform_fee=pricing['platform_fee'],
             total_amount=pricing['total_amount'],
@@ -166,9 +191,9 @@ def create_booking_with_passengers(trip, user, passengers_data, contact_email, c
             payment_status='pending'
         )
         
-        # Create passengers
-        for passenger_data in passengers_data:
-            Passenger.objects.create(
+        # Create passengers in one query
+        Passenger.objects.bulk_create([
+            Passenger(
                 booking=booking,
                 first_name=passenger_data['first_name'],
                 last_name=passenger_data['last_name'],
@@ -182,18 +207,14 @@ def create_booking_with_passengers(trip, user, passengers_data, contact_email, c
                 emergency_contact_name=passenger_data.get('emergency_contact_name', ''),
                 emergency_contact_phone=passenger_data.get('emergency_contact_phone', '')
             )
-        
-        # Update trip available seats using F() to avoid race conditions
-        trip.available_seats = F('available_seats') - num_passengers
-        trip.save(update_fields=['available_seats'])
-        
-        # Refresh to get actual value
-        trip.refresh_from_db()
+            for passenger_data in passengers_data
+        ])
         
         return booking, None
         
     except Exception as e:
-        # Transaction will automatically rollback
+        # Undo the seat decrement along with everything else
+        transaction.set_rollback(True)
         return None, f"Booking creation failed: {str(e)}"
 
 
@@ -209,6 +230,7 @@ def cancel_booking(booking):
         tuple: (bool, str) - (success, message)
     """
     from django.db.models import F
+    from .waitlist_service import notify_seats_released
     
     # Check if cancellable
     if not booking.is_cancellable():
@@ -220,11 +242,20 @@ def cancel_booking(booking):
         booking.cancelled_at = timezone.now()
         booking.save()
         
+        # Free the seat map too, or the waitlist finds no seat to offer
+        booking.release_seats()
+        
         # Release seats back to trip using F() expression
         trip = booking.trip
         trip.available_seats = F('available_seats') + booking.total_passengers
         trip.save(update_fields=['available_seats'])
         
+        # Cached e-ticket must not be served anymore
+        transaction.on_commit(lambda: TicketArtifacts.invalidate(booking))
+        
+        # Offer the released seats to the trip's waitlist (background worker)
+        notify_seats_released(booking.trip_id)
+        
         return True, "Booking cancelled successfully"
         
     except Exception as e:
@@ -0,0 +1,69 @@
+# Backend/apps/bookings/services/calendar_feed_service.py
+
+from django.core.cache import cache
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils import timezone
+from .calendar_service import CalendarService
+import hashlib
+
+
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def feed_bookings(user_id):
+    """
+    Upcoming confirmed bookings of a user, with everything the feed shows,
+    in a single query (lead passenger through subqueries)
+    """
+    from apps.bookings.models import Booking, Passenger
+
+    lead = Passenger.objects.filter(booking=OuterRef('pk')).order_by('id')
+
+    return Booking.objects.filter(
+        user_id=user_id,
+        booking_status='confirmed',
+        departure_at__gte=timezone.now()
+    ).select_related(
+        'trip__route__origin_city',
+        'trip__route__destination_city',
+        'trip__route__bus_company'
+    ).annotate(
+        lead_first_name=Subquery(lead.values('first_name')[:1]),
+        lead_last_name=Subquery(lead.values('last_name')[:1]),
+        lead_seat=Subquery(lead.values('seat_number')[:1]),
+    ).order_by('departure_at')
+
+
+def feed_etag(user_id):
+    """
+    Version of a user's feed from one aggregate on the (user, departure_at)
+    index: changes when an upcoming booking is added, updated, cancelled
+    or departs
+    """
+    from apps.bookings.models import Booking
+
+    version = Booking.objects.filter(
+        user_id=user_id,
+        booking_status='confirmed',
+        departure_at__gte=timezone.now()
+    ).aggregate(count=Count('id'), updated=Max('updated_at'), last=Max('departure_at'))
+
+    fingerprint = f"{user_id}|{version['count']}|{version['updated']}|{version['last']}"
+    return hashlib.sha256(fingerprint.encode()).hexdigest()[:32]
+
+
+def get_feed(user_id, etag=None):
+    """
+    Calendar feed of a user, rendered once per version
+
+    Returns:
+        tuple: (etag, .ics bytes)
+    """
+    etag = etag or feed_etag(user_id)
+    cache_key = f"calendar-feed:{user_id}:{etag}"
+
+    content = cache.get(cache_key)
+    if content is None:
+        content = CalendarService.generate_feed(feed_bookings(user_id))
+        cache.set(cache_key, content, FEED_CACHE_TIMEOUT)
+    return etag, content
@@ -9,22 +9,23 @@ class CalendarService:
     """Generate .ics calendar files for bookings"""
     
     @staticmethod
-    def generate_calendar_event(booking):
-        """
-        Generate .ics calendar file for a booking
-        
-        Args:
-            booking: Booking instance
-            
-        Returns:
-            bytes: .ics file content
-        """
+    def _calendar():
         cal = Calendar()
         cal.add('prodid', '-//Navticket//Bus Booking//EN')
         cal.add('version', '2.0')
-        cal.add('method', 'REQUEST')
+        return cal
+    
+    @staticmethod
+    def _build_event(booking, passenger_name, passenger_seat, dtstamp):
+        """
+        Calendar event of one booking
         
-        # Create event
+        Args:
+            booking: Booking instance (trip route, cities and company selected)
+            passenger_name: Lead passenger name
+            passenger_seat: Lead passenger seat
+            dtstamp: Event timestamp
+        """
         event = Event()
         
         # Event details
@@ -35,17 +36,12 @@ class CalendarService:
         event.add('summary', f'Bus Trip: {route.origin_city.name} → {route.destination_city.name}')
         event.add('dtstart', trip.departure_datetime)
         event.add('dtend', trip.arrival_datetime)
-        event.add('dtstamp', timezone.now())
+        event.add('dtstamp', dtstamp)
         event.add('uid', f'booking-{booking.booking_reference}@navticket.com')
         
         # ✅ FIXED: Use origin_city
         event.add('location', f'{route.origin_city.name}, Côte d\'Ivoire')
         
-        # Get passenger info
-        passenger = booking.passengers.first()
-        passenger_name = f"{passenger.first_name} {passenger.last_name}" if passenger else "Unknown"
-        passenger_seat = passenger.seat_number if passenger else "Not assigned"
-        
         # Description with all trip details
         description = f"""
 🎫 Booking Reference: {booking.booking_reference}
@@ -88,8 +84,60 @@ Please arrive 30 minutes before departure time.
         alarm_30m.add('trigger', timedelta(minutes=-30))
         event.add_component(alarm_30m)
         
+        return event
+    
+    @staticmethod
+    def generate_calendar_event(booking):
+        """
+        Generate .ics calendar file for a booking
+        
+        Args:
+            booking: Booking instance
+            
+        Returns:
+            bytes: .ics file content
+        """
+        cal = CalendarService._calendar()
+        cal.add('method', 'REQUEST')
+        
+        # Get passenger info
+        passenger = booking.passengers.first()
+        passenger_name = f"{passenger.first_name} {passenger.last_name}" if passenger else "Unknown"
+        passenger_seat = passenger.seat_number if passenger else "Not assigned"
+        
         # Add event to calendar
-        cal.add_component(event)
+        cal.add_component(
+            CalendarService._build_event(booking, passenger_name, passenger_seat, timezone.now())
+        )
+        
+        return cal.to_ical()
+    
+    @staticmethod
+    def generate_feed(bookings):
+        """
+        Generate a subscription calendar with one event per booking
+        
+        Args:
+            bookings: Bookings annotated with lead_first_name, lead_last_name
+                and lead_seat (see calendar_feed_service.feed_bookings)
+            
+        Returns:
+            bytes: .ics file content
+        """
+        cal = CalendarService._calendar()
+        cal.add('x-wr-calname', 'Navticket - Mes voyages')
+        cal.add('x-published-ttl', 'PT1H')
+        
+        dtstamp = timezone.now()
+        for booking in bookings:
+            if booking.lead_first_name is None:
+                passenger_name, passenger_seat = "Unknown", "Not assigned"
+            else:
+                passenger_name = f"{booking.lead_first_name} {booking.lead_last_name}"
+                passenger_seat = booking.lead_seat
+            cal.add_component(
+                CalendarService._build_event(booking, passenger_name, passenger_seat, dtstamp)
+            )
         
         return cal.to_ical()
     
@@ -5,8 +5,10 @@ from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils.html import strip_tags
 from .ticket_service import TicketService
+from .ticket_artifacts import TicketArtifacts
 from .calendar_service import CalendarService
-from .qr_service import QRCodeService
+from .timings import StageTimings
+from .batch_mailer import BatchMailer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,88 +18,213 @@ class EmailService:
     """Send booking confirmation emails with tickets and calendar invites"""
     
     @staticmethod
-    def send_booking_confirmation(booking):
+    def _recipient(booking):
+        """Lead passenger and their email, or (passenger, '') if there is none"""
+        passenger = booking.passengers.first()
+        if not passenger:
+            logger.warning(f"No passenger for booking {booking.booking_reference}")
+            return None, ''
+        return passenger, passenger.email
+    
+    @staticmethod
+    def _context(booking, passenger):
+        trip = booking.trip
+        route = trip.route
+        return {
+            'booking': booking,
+            'passenger': passenger,
+            'trip': trip,
+            'route': route,
+            'company': route.bus_company.name,
+            'company_name': settings.COMPANY_NAME,
+            'support_email': settings.COMPANY_SUPPORT_EMAIL,
+            'support_phone': getattr(settings, 'COMPANY_PHONE', '+225 XX XX XX XX XX'),
+        }
+    
+    @staticmethod
+    def _message(template, subject, context, recipient_email):
+        html_content = render_to_string(template, context)
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=strip_tags(html_content),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[recipient_email]
+        )
+        email.attach_alternative(html_content, "text/html")
+        return email
+    
+    @staticmethod
+    def build_booking_confirmation(booking, timings=None):
         """
-        Send complete booking confirmation email with:
+        Build the booking confirmation email with:
         - HTML email with trip details
         - PDF ticket attachment
         - Calendar .ics file
         - QR code as attachment
         
-        Args:
-            booking: Booking instance
-            
         Returns:
-            bool: True if sent successfully, False otherwise
+            EmailMultiAlternatives, or None if there is no recipient
         """
-        try:
-            # Get passenger email
-            passenger = booking.passengers.first()
-            if not passenger:
-                logger.warning(f"No passenger for booking {booking.booking_reference}")
-                return False
-            recipient_email = passenger.email
-            
-            if not recipient_email:
-                logger.warning(f"No email for booking {booking.booking_reference}")
-                return False
-            
-            # Prepare context for email template
-            trip = booking.trip
-            route = trip.route
-            
-            context = {
-                'booking': booking,
-                'passenger': passenger,
-                'trip': trip,
-                'route': route,
-                'company': route.bus_company.name,
-                'company_name': settings.COMPANY_NAME,
-                'support_email': settings.COMPANY_SUPPORT_EMAIL,
-                'support_phone': getattr(settings, 'COMPANY_PHONE', '+225 XX XX XX XX XX'),
-            }
-            
-            # Render email templates
-            html_content = render_to_string('bookings/emails/booking_confirmation.html', context)
-            text_content = strip_tags(html_content)
-            
-            # Create email
-            subject = f'🎫 Réservation Confirmée - {route.origin_city.name} → {route.destination_city.name}'
-            from_email = settings.DEFAULT_FROM_EMAIL
-            to_email = [recipient_email]
-            
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=from_email,
-                to=to_email
+        if timings is None:
+            timings = StageTimings()
+        
+        passenger, recipient_email = EmailService._recipient(booking)
+        if not recipient_email:
+            logger.warning(f"No email for booking {booking.booking_reference}")
+            return None
+        
+        route = booking.trip.route
+        
+        # Render email templates
+        with timings.stage('render'):
+            email = EmailService._message(
+                'bookings/emails/booking_confirmation.html',
+                f'🎫 Réservation Confirmée - {route.origin_city.name} → {route.destination_city.name}',
+                EmailService._context(booking, passenger),
+                recipient_email
             )
-            
-            # Attach HTML version
-            email.attach_alternative(html_content, "text/html")
-            
-            # Generate and attach PDF ticket
-            pdf_buffer = TicketService.generate_ticket_pdf(booking)
-            pdf_filename = TicketService.get_ticket_filename(booking)
-            email.attach(pdf_filename, pdf_buffer.getvalue(), 'application/pdf')
-            
-            # Generate and attach calendar file
-            calendar_data = CalendarService.generate_calendar_event(booking)
-            calendar_filename = CalendarService.get_calendar_filename(booking)
-            email.attach(calendar_filename, calendar_data, 'text/calendar')
+        
+        # PDF ticket, calendar file and QR code (rendered once per booking version)
+        with timings.stage('artifacts'):
+            bundle = TicketArtifacts.get_bundle(booking)
+        
+        with timings.stage('attachments'):
+            email.attach(TicketService.get_ticket_filename(booking), bundle.read('pdf'), 'application/pdf')
+            email.attach(CalendarService.get_calendar_filename(booking), bundle.read('ics'), 'text/calendar')
             
             # Attach QR code as regular attachment (not inline)
-            qr_image = QRCodeService.generate_qr_code_image(booking, size=250)
             email.attach(
                 f'qr_code_{booking.booking_reference}.png',
-                qr_image.getvalue(),
+                bundle.read('qr'),
                 'image/png'
             )
+        
+        return email
+    
+    @staticmethod
+    def build_booking_cancellation(booking):
+        """
+        Build the booking cancellation notification
+        
+        Returns:
+            EmailMultiAlternatives, or None if there is no recipient
+        """
+        passenger, recipient_email = EmailService._recipient(booking)
+        if not recipient_email:
+            return None
+        
+        return EmailService._message(
+            'bookings/emails/booking_cancellation.html',
+            f'❌ Réservation Annulée - {booking.booking_reference}',
+            EmailService._context(booking, passenger),
+            recipient_email
+        )
+    
+    @staticmethod
+    def build_trip_cancellation(booking):
+        """
+        Build the notification of a booking cancelled because the operator
+        cancelled the trip (refund announced when the booking was paid)
+        
+        Returns:
+            EmailMultiAlternatives, or None if there is no recipient
+        """
+        passenger, recipient_email = EmailService._recipient(booking)
+        if not recipient_email:
+            return None
+        
+        route = booking.trip.route
+        context = EmailService._context(booking, passenger)
+        context['trip_cancelled'] = True
+        return EmailService._message(
+            'bookings/emails/booking_cancellation.html',
+            f'❌ Voyage Annulé - {route.origin_city.name} → {route.destination_city.name}',
+            context,
+            recipient_email
+        )
+    
+    @staticmethod
+    def build_trip_reminder(booking):
+        """
+        Build the trip reminder sent 24 hours before departure
+        (ticket and QR code attached again)
+        
+        Returns:
+            EmailMultiAlternatives, or None if there is no recipient
+        """
+        passenger, recipient_email = EmailService._recipient(booking)
+        if not recipient_email:
+            return None
+        
+        route = booking.trip.route
+        email = EmailService._message(
+            'bookings/emails/trip_reminder.html',
+            f'⏰ Rappel Voyage - Demain: {route.origin_city.name} → {route.destination_city.name}',
+            EmailService._context(booking, passenger),
+            recipient_email
+        )
+        
+        # Re-attach ticket and QR code
+        bundle = TicketArtifacts.get_bundle(booking)
+        email.attach(TicketService.get_ticket_filename(booking), bundle.read('pdf'), 'application/pdf')
+        email.attach(
+            f'qr_code_{booking.booking_reference}.png',
+            bundle.read('qr'),
+            'image/png'
+        )
+        return email
+    
+    @staticmethod
+    def build_waitlist_offer(entry):
+        """
+        Build the waitlist offer: seats are held for the traveler until
+        entry.offer_expires_at
+        
+        Returns:
+            EmailMultiAlternatives
+        """
+        trip = entry.trip
+        route = trip.route
+        return EmailService._message(
+            'bookings/emails/waitlist_offer.html',
+            f'🎟️ Places Disponibles - {route.origin_city.name} → {route.destination_city.name}',
+            {
+                'entry': entry,
+                'user': entry.user,
+                'trip': trip,
+                'route': route,
+                'company': route.bus_company.name,
+                'company_name': settings.COMPANY_NAME,
+                'support_email': settings.COMPANY_SUPPORT_EMAIL,
+            },
+            entry.contact_email
+        )
+    
+    @staticmethod
+    def send_booking_confirmation(booking, timings=None):
+        """
+        Send complete booking confirmation email (see build_booking_confirmation)
+        
+        Args:
+            booking: Booking instance
+            timings: Optional StageTimings filled with per-stage durations
+            
+        Returns:
+            bool: True if sent successfully, False otherwise
+        """
+        if timings is None:
+            timings = StageTimings()
+        
+        try:
+            email = EmailService.build_booking_confirmation(booking, timings)
+            if email is None:
+                return False
             
             # Send email
-            email.send(fail_silently=False)
+            with timings.stage('smtp'):
+                email.send(fail_silently=False)
             
-            logger.info(f"Booking confirmation sent to {recipient_email} for {booking.booking_reference}")
+            logger.info(f"Booking confirmation sent to {email.to[0]} for {booking.booking_reference}")
             return True
             
         except Exception as e:
@@ -116,42 +243,10 @@ class EmailService:
             bool: True if sent successfully
         """
         try:
-            passenger = booking.passengers.first()
-            if not passenger:
-                logger.warning(f"No passenger for booking {booking.booking_reference}")
-                return False
-            recipient_email = passenger.email
-            
-            if not recipient_email:
+            email = EmailService.build_booking_cancellation(booking)
+            if email is None:
                 return False
             
-            trip = booking.trip
-            route = trip.route
-            
-            context = {
-                'booking': booking,
-                'passenger': passenger,
-                'trip': trip,
-                'route': route,
-                'company_name': settings.COMPANY_NAME,
-                'support_email': settings.COMPANY_SUPPORT_EMAIL,
-            }
-            
-            html_content = render_to_string('bookings/emails/booking_cancellation.html', context)
-            text_content = strip_tags(html_content)
-            
-            subject = f'❌ Réservation Annulée - {booking.booking_reference}'
-            from_email = settings.DEFAULT_FROM_EMAIL
-            to_email = [recipient_email]
-            
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=from_email,
-                to=to_email
-            )
-            
-            email.attach_alternative(html_content, "text/html")
             email.send(fail_silently=False)
             
             logger.info(f"Cancellation email sent for {booking.booking_reference}")
@@ -173,55 +268,10 @@ class EmailService:
             bool: True if sent successfully
         """
         try:
-            passenger = booking.passengers.first()
-            if not passenger:
-                logger.warning(f"No passenger for booking {booking.booking_reference}")
-                return False
-            recipient_email = passenger.email
-            
-            if not recipient_email:
+            email = EmailService.build_trip_reminder(booking)
+            if email is None:
                 return False
             
-            trip = booking.trip
-            route = trip.route
-            
-            context = {
-                'booking': booking,
-                'passenger': passenger,
-                'trip': trip,
-                'route': route,
-                'company_name': settings.COMPANY_NAME,
-                'support_email': settings.COMPANY_SUPPORT_EMAIL,
-            }
-            
-            html_content = render_to_string('bookings/emails/trip_reminder.html', context)
-            text_content = strip_tags(html_content)
-            
-            subject = f'⏰ Rappel Voyage - Demain: {route.origin_city.name} → {route.destination_city.name}'
-            from_email = settings.DEFAULT_FROM_EMAIL
-            to_email = [recipient_email]
-            
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=from_email,
-                to=to_email
-            )
-            
-            email.attach_alternative(html_content, "text/html")
-            
-            # Re-attach ticket and QR code
-            pdf_buffer = TicketService.generate_ticket_pdf(booking)
-            pdf_filename = TicketService.get_ticket_filename(booking)
-            email.attach(pdf_filename, pdf_buffer.getvalue(), 'application/pdf')
-            
-            qr_image = QRCodeService.generate_qr_code_image(booking, size=250)
-            email.attach(
-                f'qr_code_{booking.booking_reference}.png',
-                qr_image.getvalue(),
-                'image/png'
-            )
-            
             email.send(fail_silently=False)
             
             logger.info(f"Trip reminder sent for {booking.booking_reference}")
@@ -229,4 +279,49 @@ class EmailService:
             
         except Exception as e:
             logger.error(f"Failed to send trip reminder: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+    
+    BUILDERS = {
+        'confirmation': 'build_booking_confirmation',
+        'cancellation': 'build_booking_cancellation',
+        'reminder': 'build_trip_reminder',
+        'trip_cancellation': 'build_trip_cancellation',
+    }
+    
+    @staticmethod
+    def send_bulk(kind, bookings, mailer=None):
+        """
+        Send one kind of email to many bookings over pooled SMTP connections
+        
+        Args:
+            kind: 'confirmation', 'cancellation', 'reminder' or 'trip_cancellation'
+            bookings: Iterable of Booking instances (prefetch passengers and
+                select the trip route, cities and company)
+            mailer: BatchMailer instance (default settings if omitted)
+            
+        Returns:
+            tuple: ({booking_reference: sent bool}, BatchResult)
+        """
+        build = getattr(EmailService, EmailService.BUILDERS[kind])
+        
+        outcome = {}
+        messages = []
+        references = []
+        for booking in bookings:
+            outcome[booking.booking_reference] = False
+            try:
+                email = build(booking)
+            except Exception as e:
+                logger.error(f"Failed to build {kind} email for {booking.booking_reference}: {str(e)}")
+                continue
+            if email is not None:
+                messages.append(email)
+                references.append(booking.booking_reference)
+        
+        result = (mailer or BatchMailer()).send(messages)
+        for reference, sent in zip(references, result.sent):
+            outcome[reference] = sent
+        for index, error in result.errors.items():
+            logger.error(f"Failed to send {kind} email for {references[index]}: {error}")
+        
+        return outcome, result
@@ -0,0 +1,52 @@
+# Backend/apps/bookings/services/fulfilment_service.py
+
+from .job_queue import enqueue_job
+from .ticket_artifacts import TicketArtifacts
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_booking_fulfilment(booking):
+    """
+    Queue QR generation and the confirmation email of a paid booking.
+    Payment paths call this instead of doing the work inline.
+
+    Returns:
+        BackgroundJob instance
+    """
+    return enqueue_job('fulfil_booking', booking=booking)
+
+
+def fulfil_booking(job, timings):
+    """
+    Job handler: render the ticket artifacts and send the confirmation email.
+    Safe to retry: finished stages are skipped.
+
+    Args:
+        job: BackgroundJob instance (job.booking is the paid booking)
+        timings: StageTimings filled with per-stage durations
+    """
+    booking = job.booking
+    if booking is None:
+        return
+
+    if booking.booking_status == 'cancelled':
+        logger.info(f"Booking {booking.booking_reference} cancelled, nothing to fulfil")
+        return
+
+    # QR code, PDF ticket and calendar file, stored once for this booking version
+    with timings.stage('artifacts'):
+        TicketArtifacts.get_bundle(booking)
+
+    if booking.ticket_sent_at:
+        return
+
+    # The confirmation goes to the first passenger (see EmailService)
+    passenger = booking.passengers.first()
+    if passenger is None or not passenger.email:
+        logger.warning(f"No passenger email for booking {booking.booking_reference}, email skipped")
+        return
+
+    if not booking.send_confirmation_email(timings):
+        raise RuntimeError(f"Confirmation email not sent for {booking.booking_reference}")
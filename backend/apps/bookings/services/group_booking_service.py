@@ -0,0 +1,240 @@
+# Backend/apps/bookings/services/group_booking_service.py
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, F
+from django.utils import timezone
+from .booking_services import validate_trip_bookable, check_seat_availability, calculate_booking_price
+from .reference_service import BookingReferenceService
+from .stats_service import schedule_stats_refresh
+
+
+GROUP_BOOKING_MAX_PASSENGERS = getattr(settings, 'GROUP_BOOKING_MAX_PASSENGERS', 500)
+GROUP_BOOKING_MAX_TRIPS = getattr(settings, 'GROUP_BOOKING_MAX_TRIPS', 10)
+GROUP_REFERENCE_PREFIX = 'GRP'
+
+
+def generate_group_reference():
+    """
+    Group reference from the booking reference counter
+    Format: GRP-YYYYMMDD-XXXXXXC
+    """
+    reference = BookingReferenceService.generate()[0]
+    return GROUP_REFERENCE_PREFIX + reference[len(BookingReferenceService.PREFIX):]
+
+
+def _seat_maps(trip_ids):
+    """
+    Seats of several trips in one query
+
+    Returns:
+        dict: trip_id -> list of (seat_number, row, position) of free seats
+            as claim_seats sees them (expired holds count as free), only
+            for trips that have a seat map
+    """
+    from apps.bookings.models import Seat
+    from apps.bookings.utils import claimable_seats
+
+    maps = {}
+    seats = Seat.objects.filter(trip_id__in=trip_ids).annotate(
+        claimable=ExpressionWrapper(claimable_seats(timezone.now()), output_field=BooleanField())
+    ).values_list('trip_id', 'seat_number', 'row', 'position', 'claimable')
+    for trip_id, seat_number, row, position, claimable in seats:
+        free = maps.setdefault(trip_id, [])
+        if claimable:
+            free.append((seat_number, row, position))
+    return maps
+
+
+def _claim_allocation(booking, seat_numbers, free_seats, layout_code, prefer_window):
+    """
+    Claim the seats allocated to a booking. When a concurrent buyer took
+    some of them, allocate once more without the lost seats.
+
+    Returns:
+        list: Claimed seat numbers, or None if the party can't be seated
+    """
+    from apps.bookings.utils import find_best_seat_block, claim_seats
+
+    for attempt in range(2):
+        claimed, lost = claim_seats(booking.trip_id, seat_numbers, booking=booking)
+        if claimed:
+            return claimed
+        if attempt:
+            break
+        free_seats = [seat for seat in free_seats if seat[0] not in lost]
+        seat_numbers = find_best_seat_block(free_seats, len(seat_numbers), layout_code, prefer_window)
+        if not seat_numbers:
+            break
+    return None
+
+
+def _passenger(booking, data, seat_number):
+    from apps.bookings.models import Passenger
+
+    return Passenger(
+        booking=booking,
+        first_name=data['first_name'],
+        last_name=data['last_name'],
+        phone=data.get('phone', ''),
+        email=data.get('email', ''),
+        id_type=data.get('id_type', ''),
+        id_number=data.get('id_number', ''),
+        date_of_birth=data.get('date_of_birth'),
+        age_category=data.get('age_category', 'adult'),
+        seat_number=seat_number,
+        emergency_contact_name=data.get('emergency_contact_name', ''),
+        emergency_contact_phone=data.get('emergency_contact_phone', '')
+    )
+
+
+@transaction.atomic
+def create_group_booking(user, legs, contact_email, contact_phone, organization_name=''):
+    """
+    Book a group over one or more trips atomically: every trip gets its
+    seats or nothing is booked.
+
+    Trips are locked in a single SELECT ... FOR UPDATE, in id order so
+    concurrent group bookings can't deadlock; seats come from one query
+    and are auto-allocated as tight blocks; bookings and passengers are
+    inserted with one bulk INSERT each. Query count grows with the
+    number of trips, not passengers.
+
+    Args:
+        user: Organizer
+        legs: List of {'trip_id', 'passengers': [...], 'prefer_window'}
+        contact_email: Contact email for the group
+        contact_phone: Contact phone for the group
+        organization_name: Church, company, school... (optional)
+
+    Returns:
+        tuple: (BookingGroup instance or None, error_message or None)
+    """
+    from apps.bookings.models import Booking, BookingGroup, Passenger
+    from apps.bookings.utils import find_best_seat_block
+    from apps.transport.models import Trip
+
+    trip_ids = sorted(leg['trip_id'] for leg in legs)
+
+    # One lock acquisition for all trips of the group
+    trips = {
+        trip.id: trip
+        for trip in Trip.objects.select_for_update(of=('self',)).select_related(
+            'route__origin_city',
+            'route__destination_city',
+            'route__bus_company'
+        ).filter(id__in=trip_ids).order_by('id')
+    }
+    missing = [trip_id for trip_id in trip_ids if trip_id not in trips]
+    if missing:
+        return None, f"Trip not found: {', '.join(map(str, missing))}"
+
+    # Validate every trip and allocate seats before writing anything
+    seat_maps = _seat_maps(trip_ids)
+    allocations = {}
+    for leg in legs:
+        trip = trips[leg['trip_id']]
+        count = len(leg['passengers'])
+
+        is_valid, error = validate_trip_bookable(trip)
+        if not is_valid:
+            return None, f"Trip {trip.id}: {error}"
+
+        is_available, error = check_seat_availability(trip, count)
+        if not is_available:
+            return None, f"Trip {trip.id}: {error}"
+
+        if trip.id in seat_maps:
+            seat_numbers = find_best_seat_block(
+                seat_maps[trip.id], count, trip.seat_layout, leg.get('prefer_window', False)
+            )
+            if not seat_numbers:
+                return None, f"Trip {trip.id}: not enough free seats for {count} passengers"
+        else:
+            # No seat map for this trip: seats are assigned at boarding
+            seat_numbers = [''] * count
+        allocations[trip.id] = seat_numbers
+
+    try:
+        references = BookingReferenceService.generate(len(legs))
+        total_passengers = sum(len(leg['passengers']) for leg in legs)
+        pricing = {leg['trip_id']: calculate_booking_price(trips[leg['trip_id']], len(leg['passengers'])) for leg in legs}
+
+        group = BookingGroup.objects.create(
+            group_reference=generate_group_reference(),
+            user=user,
+            organization_name=organization_name,
+            contact_email=contact_email,
+            contact_phone=contact_phone,
+            total_passengers=total_passengers,
+            total_amount=sum((price['total_amount'] for price in pricing.values()), Decimal('0'))
+        )
+
+        for leg in legs:
+            count = len(leg['passengers'])
+            decremented = Trip.objects.filter(
+                pk=leg['trip_id'],
+                status__in=['scheduled', 'on_time'],
+                available_seats__gte=count
+            ).update(available_seats=F('available_seats') - count)
+            if not decremented:
+                transaction.set_rollback(True)
+                return None, f"Trip {leg['trip_id']}: no longer bookable or not enough seats for {count} passengers"
+            trips[leg['trip_id']].available_seats -= count
+
+        # bulk_create skips Booking.save(), so departure_at is set here
+        bookings = Booking.objects.bulk_create([
+            Booking(
+                trip=trips[leg['trip_id']],
+                user=user,
+                group=group,
+                booking_reference=reference,
+                ticket_price=pricing[leg['trip_id']]['ticket_price'],
+                platform_fee=pricing[leg['trip_id']]['platform_fee'],
+                total_amount=pricing[leg['trip_id']]['total_amount'],
+                total_passengers=len(leg['passengers']),
+                selected_seats=[number for number in allocations[leg['trip_id']] if number],
+                contact_email=contact_email,
+                contact_phone=contact_phone,
+                departure_at=Booking.trip_departure_at(trips[leg['trip_id']]),
+                booking_status='pending',
+                payment_status='pending'
+            )
+            for leg, reference in zip(legs, references)
+        ])
+
+        # Trip locks don't cover seats: lock-free buyers (claim_seats) may
+        # have taken allocated seats since the seat maps were read
+        for leg, booking in zip(legs, bookings):
+            if not booking.selected_seats:
+                continue
+            claimed = _claim_allocation(
+                booking,
+                booking.selected_seats,
+                seat_maps[booking.trip_id],
+                trips[booking.trip_id].seat_layout,
+                leg.get('prefer_window', False)
+            )
+            if not claimed:
+                transaction.set_rollback(True)
+                return None, f"Trip {booking.trip_id}: not enough free seats for {len(booking.selected_seats)} passengers"
+            if claimed != booking.selected_seats:
+                booking.selected_seats = claimed
+                Booking.objects.filter(pk=booking.pk).update(selected_seats=claimed)
+                allocations[booking.trip_id] = claimed
+
+        Passenger.objects.bulk_create([
+            _passenger(booking, data, seat_number)
+            for leg, booking in zip(legs, bookings)
+            for data, seat_number in zip(leg['passengers'], allocations[leg['trip_id']])
+        ], batch_size=500)
+
+        # Bulk inserts send no post_save signal
+        schedule_stats_refresh(user.id)
+
+        return group, None
+
+    except Exception as e:
+        transaction.set_rollback(True)
+        return None, f"Group booking failed: {str(e)}"
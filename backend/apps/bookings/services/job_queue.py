@@ -0,0 +1,223 @@
+# Backend/apps/bookings/services/job_queue.py
+
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .timings import StageTimings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# job_type -> handler(job, timings), resolved lazily
+JOB_HANDLERS = {
+    'fulfil_booking': 'apps.bookings.services.fulfilment_service.fulfil_booking',
+    'process_waitlist': 'apps.bookings.services.waitlist_service.process_waitlist',
+    'cancel_trip': 'apps.bookings.services.trip_cancellation_service.process_trip_cancellation',
+    'refund_booking': 'apps.payments.services.refund_booking',
+    'process_webhook': 'apps.payments.services.process_webhook_event',
+}
+
+JOB_RETRY_BASE_DELAY = timedelta(seconds=30)   # doubled on each failed attempt
+JOB_RETRY_MAX_DELAY = timedelta(hours=1)
+JOB_LOCK_TIMEOUT = timedelta(minutes=10)       # running jobs of a dead worker are picked up again
+
+
+def enqueue_job(job_type, booking=None, payload=None, delay=None):
+    """
+    Add a job to the queue.
+    Only one pending/running job per (job_type, booking): enqueueing again
+    returns the job already waiting.
+
+    Args:
+        job_type: Key of JOB_HANDLERS
+        booking: Related booking (optional)
+        payload: JSON-serializable job arguments
+        delay: timedelta before the job may run
+
+    Returns:
+        BackgroundJob instance
+    """
+    from apps.bookings.models import BackgroundJob
+
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job type: {job_type}")
+
+    fields = {
+        'job_type': job_type,
+        'booking': booking,
+        'payload': payload or {},
+        'run_after': timezone.now() + (delay or timedelta()),
+    }
+
+    try:
+        with transaction.atomic():
+            return BackgroundJob.objects.create(**fields)
+    except IntegrityError:
+        existing = BackgroundJob.objects.filter(
+            job_type=job_type,
+            booking=booking,
+            status__in=['pending', 'running']
+        ).first()
+        if existing is None:
+            # The active job finished in between
+            return BackgroundJob.objects.create(**fields)
+        return existing
+
+
+def enqueue_jobs(job_type, bookings, payload=None):
+    """
+    Add one job per booking with a single INSERT.
+    Bookings that already have an active job of this type are skipped.
+
+    Returns:
+        int: Number of bookings passed (skipped ones included)
+    """
+    from apps.bookings.models import BackgroundJob
+
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job type: {job_type}")
+
+    now = timezone.now()
+    BackgroundJob.objects.bulk_create(
+        [
+            BackgroundJob(job_type=job_type, booking=booking, payload=payload or {}, run_after=now)
+            for booking in bookings
+        ],
+        ignore_conflicts=True
+    )
+    return len(bookings)
+
+
+def claim_jobs(worker_id, limit=10):
+    """
+    Lock the next runnable jobs for a worker.
+    SKIP LOCKED lets several workers poll the same table without blocking.
+
+    Returns:
+        list: Claimed BackgroundJob instances
+    """
+    from apps.bookings.models import BackgroundJob
+
+    now = timezone.now()
+    runnable = (
+        Q(status='pending', run_after__lte=now) |
+        Q(status='running', locked_at__lt=now - JOB_LOCK_TIMEOUT)
+    )
+
+    with transaction.atomic():
+        job_ids = list(
+            BackgroundJob.objects.select_for_update(skip_locked=True)
+            .filter(runnable)
+            .order_by('run_after')
+            .values_list('id', flat=True)[:limit]
+        )
+        if not job_ids:
+            return []
+
+        BackgroundJob.objects.filter(id__in=job_ids).update(
+            status='running',
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F('attempts') + 1
+        )
+
+    return list(BackgroundJob.objects.filter(id__in=job_ids).select_related('booking'))
+
+
+def run_job(job):
+    """
+    Run one claimed job and record the outcome.
+    Failures are retried with exponential backoff, then dead-lettered.
+
+    Returns:
+        bool: True if the job completed
+    """
+    from apps.bookings.models import BackgroundJob
+
+    timings = StageTimings()
+    owned = BackgroundJob.objects.filter(pk=job.pk, locked_by=job.locked_by)
+
+    try:
+        handler = import_string(JOB_HANDLERS[job.job_type])
+        handler(job, timings)
+    except Exception as e:
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            owned.update(
+                status='dead',
+                last_error=str(e),
+                stage_timings=timings,
+                locked_by='',
+                locked_at=None
+            )
+            logger.error(f"💀 Job {job.id} ({job.job_type}) dead after {job.attempts} attempts: {e}")
+        else:
+            delay = min(JOB_RETRY_BASE_DELAY * 2 ** (job.attempts - 1), JOB_RETRY_MAX_DELAY)
+            owned.update(
+                status='pending',
+                run_after=now + delay,
+                last_error=str(e),
+                stage_timings=timings,
+                locked_by='',
+                locked_at=None
+            )
+            logger.warning(f"⚠️ Job {job.id} ({job.job_type}) failed, retry in {delay}: {e}")
+        return False
+
+    owned.update(
+        status='completed',
+        completed_at=timezone.now(),
+        last_error='',
+        stage_timings=timings,
+        locked_by='',
+        locked_at=None
+    )
+    logger.info(f"✅ Job {job.id} ({job.job_type}) completed {dict(timings)}")
+    return True
+
+
+def run_pending_jobs(worker_id, limit=10):
+    """
+    Claim and run a batch of jobs.
+
+    Returns:
+        tuple: (completed count, failed count)
+    """
+    completed = failed = 0
+    for job in claim_jobs(worker_id, limit):
+        if run_job(job):
+            completed += 1
+        else:
+            failed += 1
+    return completed, failed
+
+
+def retry_dead_jobs(job_type=None):
+    """
+    Put dead-lettered jobs back in the queue with a fresh attempt budget.
+
+    Returns:
+        int: Number of jobs requeued
+    """
+    from apps.bookings.models import BackgroundJob
+
+    jobs = BackgroundJob.objects.filter(status='dead')
+    if job_type:
+        jobs = jobs.filter(job_type=job_type)
+
+    requeued = 0
+    for job in jobs:
+        try:
+            with transaction.atomic():
+                requeued += BackgroundJob.objects.filter(pk=job.pk, status='dead').update(
+                    status='pending',
+                    attempts=0,
+                    run_after=timezone.now()
+                )
+        except IntegrityError:
+            # A newer job for the same booking is already active
+            continue
+    return requeued
@@ -0,0 +1,266 @@
+# Backend/apps/bookings/services/manifest_service.py
+
+from django.db.models.functions import Length
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+from io import BytesIO
+import csv
+
+
+MANIFEST_CHUNK_SIZE = 2000
+
+# One joined query: passenger + booking + trip + route/station names.
+# Rows are tuples in this order (see ROW_*)
+MANIFEST_FIELDS = (
+    'booking__trip_id',
+    'booking__trip__departure_date',
+    'booking__trip__departure_time',
+    'booking__trip__route__origin_city__name',
+    'booking__trip__route__destination_city__name',
+    'booking__trip__departure_station__name',
+    'booking__trip__bus_number',
+    'seat_number',
+    'last_name',
+    'first_name',
+    'phone',
+    'id_number',
+    'booking__booking_reference',
+    'booking__payment_status',
+    'boarded_at',
+)
+(ROW_TRIP, ROW_DATE, ROW_TIME, ROW_ORIGIN, ROW_DESTINATION, ROW_STATION, ROW_BUS,
+ ROW_SEAT, ROW_LAST_NAME, ROW_FIRST_NAME, ROW_PHONE, ROW_ID_NUMBER, ROW_REFERENCE,
+ ROW_PAYMENT, ROW_BOARDED) = range(len(MANIFEST_FIELDS))
+
+CSV_HEADER = [
+    'trip_id', 'departure_date', 'departure_time', 'origin', 'destination', 'station',
+    'bus_number', 'seat', 'last_name', 'first_name', 'phone', 'id_number',
+    'booking_reference', 'payment_status', 'boarded_at',
+]
+
+
+def station_day_trips(date, station_id=None):
+    """
+    Departures of a day, optionally from one station, in departure order
+
+    Returns:
+        QuerySet of Trip
+    """
+    from apps.transport.models import Trip
+
+    trips = Trip.objects.filter(departure_date=date)
+    if station_id:
+        trips = trips.filter(departure_station_id=station_id)
+    return trips.select_related(
+        'route__origin_city',
+        'route__destination_city',
+        'route__bus_company',
+        'departure_station'
+    ).order_by('departure_time', 'id')
+
+
+def manifest_rows(trip_ids):
+    """
+    Confirmed passengers of trips as tuples, from a single joined query
+    read in chunks (server-side cursor on PostgreSQL), ordered by
+    departure then seat ("2A" before "10A").
+
+    Args:
+        trip_ids: Trip ids (list or values_list queryset)
+
+    Returns:
+        Iterator of tuples, fields in MANIFEST_FIELDS order
+    """
+    from apps.bookings.models import Passenger
+
+    return Passenger.objects.filter(
+        booking__trip_id__in=trip_ids,
+        booking__booking_status='confirmed'
+    ).order_by(
+        'booking__trip__departure_date',
+        'booking__trip__departure_time',
+        'booking__trip_id',
+        Length('seat_number').asc(),
+        'seat_number',
+        'id'
+    ).values_list(*MANIFEST_FIELDS).iterator(chunk_size=MANIFEST_CHUNK_SIZE)
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for csv.writer streaming"""
+
+    def write(self, value):
+        return value
+
+
+def stream_manifest_csv(trip_ids):
+    """
+    CSV manifest lines, produced while the rows are read
+
+    Returns:
+        Generator of str (one CSV line each)
+    """
+    writer = csv.writer(_Echo())
+    yield '﻿'   # BOM: Excel opens accents correctly
+    yield writer.writerow(CSV_HEADER)
+
+    for row in manifest_rows(trip_ids):
+        row = list(row)
+        row[ROW_DATE] = row[ROW_DATE].isoformat()
+        row[ROW_TIME] = row[ROW_TIME].strftime('%H:%M')
+        row[ROW_STATION] = row[ROW_STATION] or ''
+        row[ROW_BOARDED] = timezone.localtime(row[ROW_BOARDED]).isoformat() if row[ROW_BOARDED] else ''
+        yield writer.writerow(row)
+
+
+class ManifestPDF:
+    """
+    Printable manifests drawn straight on the canvas, page by page:
+    one section per departure (starting on a new page), a fixed-height
+    row per passenger and a check-box column for boarding. No flowable
+    layout pass, so 30 departures render in well under a second.
+    """
+
+    PAGE_SIZE = landscape(A4)
+    MARGIN = 12 * mm
+    ROW_HEIGHT = 6.5 * mm
+    COLUMNS = (
+        # (title, width, row index or callable)
+        ('#', 10 * mm, None),
+        ('Siège', 16 * mm, ROW_SEAT),
+        ('Nom', 70 * mm, lambda row: f"{row[ROW_LAST_NAME].upper()} {row[ROW_FIRST_NAME]}"),
+        ('Téléphone', 34 * mm, ROW_PHONE),
+        ('Pièce d\'identité', 38 * mm, ROW_ID_NUMBER),
+        ('Référence', 30 * mm, ROW_REFERENCE),
+        ('Paiement', 24 * mm, ROW_PAYMENT),
+        ('Embarqué', 24 * mm, ROW_BOARDED),
+    )
+
+    def __init__(self, title):
+        self.buffer = BytesIO()
+        self.canvas = canvas.Canvas(self.buffer, pagesize=self.PAGE_SIZE, pageCompression=1)
+        self.canvas.setTitle(title)
+        self.width, self.height = self.PAGE_SIZE
+        self.page = 0
+        self.generated_at = timezone.localtime().strftime('%d/%m/%Y %H:%M')
+
+    def _fit(self, text, width, font, size):
+        """Clip text to a column width"""
+        text = str(text or '')
+        while text and self.canvas.stringWidth(text, font, size) > width - 2 * mm:
+            text = text[:-1]
+        return text
+
+    def _new_page(self, trip, continued=False):
+        c = self.canvas
+        if self.page:
+            c.showPage()
+        self.page += 1
+
+        # Standard PDF fonts have no arrow glyph
+        route = f"{trip.route.origin_city.name} - {trip.route.destination_city.name}"
+        station = trip.departure_station.name if trip.departure_station else trip.route.origin_city.name
+        top = self.height - self.MARGIN
+
+        c.setFillColor(colors.HexColor('#1e40af'))
+        c.setFont('Helvetica-Bold', 15)
+        c.drawString(self.MARGIN, top - 5 * mm, f"Manifeste passagers — {route}" + (' (suite)' if continued else ''))
+        c.setFillColor(colors.black)
+        c.setFont('Helvetica', 10)
+        c.drawString(
+            self.MARGIN, top - 11 * mm,
+            f"{trip.route.bus_company.name} · Gare : {station} · "
+            f"Départ {trip.departure_date.strftime('%d/%m/%Y')} à {trip.departure_time.strftime('%H:%M')} · "
+            f"Car {trip.bus_number or '—'} · Voyage #{trip.id}"
+        )
+        c.setFont('Helvetica', 8)
+        c.drawRightString(self.width - self.MARGIN, self.MARGIN - 5 * mm, f"Page {self.page} · Édité le {self.generated_at}")
+
+        # Column headers
+        y = top - 20 * mm
+        c.setFillColor(colors.HexColor('#e0e7ff'))
+        c.rect(self.MARGIN, y - 1.8 * mm, self.width - 2 * self.MARGIN, self.ROW_HEIGHT, stroke=0, fill=1)
+        c.setFillColor(colors.black)
+        c.setFont('Helvetica-Bold', 9)
+        x = self.MARGIN
+        for title, width, _ in self.COLUMNS:
+            c.drawString(x + 1 * mm, y, title)
+            x += width
+        return y - self.ROW_HEIGHT
+
+    def _draw_row(self, y, number, row):
+        c = self.canvas
+        c.setFont('Helvetica', 9)
+        x = self.MARGIN
+        for title, width, value in self.COLUMNS:
+            if value is None:
+                text = number
+            elif value == ROW_BOARDED:
+                # Pre-ticked when scanned, empty box to tick by hand otherwise
+                c.rect(x + 1 * mm, y - 0.5 * mm, 3.5 * mm, 3.5 * mm)
+                text = f"X  {timezone.localtime(row[ROW_BOARDED]).strftime('%H:%M')}" if row[ROW_BOARDED] else ''
+            elif callable(value):
+                text = value(row)
+            else:
+                text = row[value]
+            c.drawString(x + 1 * mm, y, self._fit(text, width, 'Helvetica', 9))
+            x += width
+        c.setStrokeColor(colors.lightgrey)
+        c.line(self.MARGIN, y - 2 * mm, self.width - self.MARGIN, y - 2 * mm)
+        c.setStrokeColor(colors.black)
+
+    def add_trip(self, trip, rows):
+        """Draw the manifest of one departure; rows are its passengers in seat order"""
+        y = self._new_page(trip)
+        bottom = self.MARGIN + self.ROW_HEIGHT
+        count = 0
+
+        for count, row in enumerate(rows, 1):
+            if y < bottom:
+                y = self._new_page(trip, continued=True)
+            self._draw_row(y, count, row)
+            y -= self.ROW_HEIGHT
+
+        self.canvas.setFont('Helvetica-Bold', 10)
+        if count:
+            self.canvas.drawString(self.MARGIN, max(y - 2 * mm, self.MARGIN), f"Total : {count} passager(s) confirmé(s) / {trip.total_seats} places")
+        else:
+            self.canvas.drawString(self.MARGIN, y, "Aucun passager confirmé")
+        return count
+
+    def finish(self):
+        """
+        Returns:
+            BytesIO: PDF file content
+        """
+        if not self.page:
+            self.canvas.setFont('Helvetica', 12)
+            self.canvas.drawString(self.MARGIN, self.height - self.MARGIN - 10 * mm, "Aucun départ")
+        self.canvas.save()
+        self.buffer.seek(0)
+        return self.buffer
+
+
+def generate_manifest_pdf(trips, title='Manifeste passagers'):
+    """
+    Manifest PDF of several departures from one passenger query,
+    each departure starting on a new page
+
+    Args:
+        trips: Trips in print order (select route cities, company and station)
+
+    Returns:
+        tuple: (BytesIO PDF content, passenger count)
+    """
+    trips = list(trips)
+    rows_by_trip = {trip.id: [] for trip in trips}
+
+    for row in manifest_rows(list(rows_by_trip)):
+        rows_by_trip[row[ROW_TRIP]].append(row)
+
+    pdf = ManifestPDF(title)
+    total = sum(pdf.add_trip(trip, rows_by_trip[trip.id]) for trip in trips)
+    return pdf.finish(), total
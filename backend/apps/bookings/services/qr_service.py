@@ -4,60 +4,76 @@ import qrcode
 import hashlib
 from io import BytesIO
 from django.conf import settings
+from .ticket_token import encode_ticket_token, is_ticket_token, verify_ticket_token
 
 
 class QRCodeService:
     """Generate and verify QR codes for bookings"""
     
     @staticmethod
-    def generate_qr_data(booking):
+    def verification_hash(booking_reference, phone):
+        """Hash printed in the QR code (lead passenger's phone + secret)"""
+        secret_key = settings.SECRET_KEY
+        data_to_hash = f"{booking_reference}|{phone}|{secret_key}"
+        return hashlib.sha256(data_to_hash.encode()).hexdigest()[:16]
+    
+    @staticmethod
+    def build_qr_data(booking, passenger):
         """
-        Generate secure QR code data with hash verification
+        Build the QR payload of one passenger's ticket
         
-        Format: BOOKING_REF|PASSENGER_NAME|HASH
+        Format: signed ticket token (see ticket_token), verifiable
+        offline without a database lookup
+        """
+        return encode_ticket_token(
+            booking.booking_reference,
+            booking.trip_id,
+            passenger.id,
+            passenger.seat_number,
+            booking.trip.departure_datetime
+        )
+    
+    @staticmethod
+    def generate_qr_data(booking):
+        """
+        Generate secure QR code data of the booking's lead passenger
         """
         # Get first passenger from the booking
         passenger = booking.passengers.first()
         if not passenger:
             raise ValueError("No passenger found for booking")
         
-        secret_key = settings.SECRET_KEY
-        data_to_hash = f"{booking.booking_reference}|{passenger.phone}|{secret_key}"
-        verification_hash = hashlib.sha256(data_to_hash.encode()).hexdigest()[:16]
-        
-        qr_data = f"{booking.booking_reference}|{passenger.first_name} {passenger.last_name}|{verification_hash}"
-        
-        return qr_data
+        return QRCodeService.build_qr_data(booking, passenger)
     
     @staticmethod
-    def generate_qr_code_image(booking, size=300):
+    def render_qr_png(qr_data, size=300):
         """
-        Generate QR code image
+        Render a QR payload as a PNG image
         
         Args:
-            booking: Booking instance
+            qr_data: QR payload string
             size: Image size in pixels
             
         Returns:
             BytesIO: QR code image as PNG
         """
-        qr_data = QRCodeService.generate_qr_data(booking)
-        
-        # Create QR code
+        # Smallest QR version that fits (tokens are alphanumeric: version 3)
         qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
+            version=None,
+            error_correction=qrcode.constants.ERROR_CORRECT_M,
             box_size=10,
             border=4,
         )
         qr.add_data(qr_data)
         qr.make(fit=True)
         
-        # Generate image
+        # Draw modules at the final scale instead of resampling a large image
+        if size:
+            qr.box_size = max(1, size // (qr.modules_count + 2 * qr.border))
         img = qr.make_image(fill_color="black", back_color="white")
         
         # Resize if needed
-        if size:
+        if size and img.size != (size, size):
             img = img.resize((size, size))
         
         # Save to BytesIO
@@ -67,14 +83,47 @@ class QRCodeService:
         
         return buffer
     
+    @staticmethod
+    def generate_qr_code_image(booking, size=300):
+        """
+        Generate QR code image
+        
+        Args:
+            booking: Booking instance
+            size: Image size in pixels
+            
+        Returns:
+            BytesIO: QR code image as PNG
+        """
+        return QRCodeService.render_qr_png(QRCodeService.generate_qr_data(booking), size)
+    
     @staticmethod
     def verify_qr_data(qr_data_string):
         """
-        Verify QR code authenticity
+        Verify QR code authenticity and booking status
+        
+        Ticket tokens are checked without a database lookup (see
+        ticket_token.verify_ticket_token for the offline-only check);
+        legacy BOOKING_REF|NAME|HASH codes still need the lead passenger.
         
         Returns:
             tuple: (is_valid, booking_reference, error_message)
         """
+        if is_ticket_token(qr_data_string):
+            token, error = verify_ticket_token(qr_data_string)
+            if error:
+                return False, None, error
+            
+            from apps.bookings.models import Booking
+            booking_status = Booking.objects.filter(
+                booking_reference=token.booking_reference
+            ).values_list('booking_status', flat=True).first()
+            if booking_status is None:
+                return False, None, "Booking not found"
+            if booking_status != 'confirmed':
+                return False, token.booking_reference, f"Booking status is {booking_status}"
+            return True, token.booking_reference, None
+        
         try:
             parts = qr_data_string.split('|')
             if len(parts) != 3:
@@ -95,9 +144,7 @@ class QRCodeService:
                 return False, None, "No passenger found"
             
             # Verify hash
-            secret_key = settings.SECRET_KEY
-            data_to_hash = f"{booking.booking_reference}|{passenger.phone}|{secret_key}"
-            expected_hash = hashlib.sha256(data_to_hash.encode()).hexdigest()[:16]
+            expected_hash = QRCodeService.verification_hash(booking.booking_reference, passenger.phone)
             
             if provided_hash != expected_hash:
                 return False, None, "Invalid QR code - tampering detected"
@@ -0,0 +1,109 @@
+# Backend/apps/bookings/services/reminder_service.py
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .batch_mailer import BatchMailer
+from .emails_service import EmailService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+REMINDER_WINDOW = getattr(settings, 'TRIP_REMINDER_WINDOW', timedelta(hours=24))   # before departure
+REMINDER_BATCH_SIZE = 200
+
+
+def claim_due_reminders(limit=REMINDER_BATCH_SIZE, window=REMINDER_WINDOW):
+    """
+    Claim confirmed bookings departing within the reminder window.
+
+    Rows come from the booking_reminder_due_idx partial index and are
+    marked (reminder_sent_at) in a short transaction; SKIP LOCKED lets
+    several schedulers run without sending the same reminder twice.
+
+    Returns:
+        list: Booking ids claimed
+    """
+    from apps.bookings.models import Booking
+
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Booking.objects.select_for_update(skip_locked=True)
+            .filter(
+                booking_status='confirmed',
+                reminder_sent_at__isnull=True,
+                departure_at__gt=now,
+                departure_at__lte=now + window
+            )
+            .order_by('departure_at')
+            .values_list('id', flat=True)[:limit]
+        )
+        if ids:
+            Booking.objects.filter(id__in=ids, reminder_sent_at__isnull=True).update(reminder_sent_at=now)
+    return ids
+
+
+def send_reminder_batch(booking_ids, mailer=None):
+    """
+    Send the reminders of claimed bookings over pooled SMTP connections.
+    Bookings whose email could not be delivered are released for the next tick.
+
+    Returns:
+        tuple: (sent count, failed count)
+    """
+    from apps.bookings.models import Booking
+
+    bookings = list(
+        Booking.objects.filter(id__in=booking_ids).select_related(
+            'trip__route__origin_city',
+            'trip__route__destination_city',
+            'trip__route__bus_company'
+        ).prefetch_related('passengers')
+    )
+
+    outcome, result = EmailService.send_bulk('reminder', bookings, mailer)
+
+    # Only delivery failures are retried: a booking without email stays claimed
+    reachable = {
+        booking.booking_reference for booking in bookings
+        if booking.passengers.all() and booking.passengers.all()[0].email
+    }
+    failed_references = [
+        reference for reference, sent in outcome.items()
+        if not sent and reference in reachable
+    ]
+    if failed_references:
+        Booking.objects.filter(booking_reference__in=failed_references).update(reminder_sent_at=None)
+
+    return result.sent_count, len(failed_references)
+
+
+def run_reminder_tick(batch_size=REMINDER_BATCH_SIZE, max_batches=None, mailer=None):
+    """
+    One scheduler tick: claim and send due reminders batch by batch
+    until none are left (or max_batches is reached).
+
+    Returns:
+        tuple: (sent count, failed count)
+    """
+    mailer = mailer or BatchMailer()
+    sent = failed = batches = 0
+
+    while max_batches is None or batches < max_batches:
+        ids = claim_due_reminders(batch_size)
+        if not ids:
+            break
+        batch_sent, batch_failed = send_reminder_batch(ids, mailer)
+        sent += batch_sent
+        failed += batch_failed
+        batches += 1
+        if batch_failed == len(ids):
+            # Mail server down: stop hammering it, the next tick retries
+            break
+
+    if sent or failed:
+        logger.info(f"⏰ Trip reminders: {sent} sent, {failed} failed in {batches} batch(es)")
+    return sent, failed
@@ -0,0 +1,235 @@
+# Backend/apps/bookings/services/seat_reconciliation_service.py
+
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+RECONCILIATION_BATCH_SIZE = 200
+OCCUPYING_BOOKING_STATUSES = ('pending', 'confirmed', 'completed')
+MAX_RECORDED_DRIFTS = 500
+
+
+def _occupied_by_trip(trip_ids):
+    """
+    Seats taken on each trip: passengers of live bookings plus seats held
+    for waitlist offers. One grouped query per table.
+
+    Returns:
+        dict: trip_id -> seats taken
+    """
+    from apps.bookings.models import Booking, WaitlistEntry
+
+    occupied = dict(
+        Booking.objects.filter(trip_id__in=trip_ids, booking_status__in=OCCUPYING_BOOKING_STATUSES)
+        .values('trip_id').order_by()
+        .annotate(seats=Sum('total_passengers'))
+        .values_list('trip_id', 'seats')
+    )
+    offered = (
+        WaitlistEntry.objects.filter(trip_id__in=trip_ids, status='offered')
+        .values('trip_id').order_by()
+        .annotate(seats=Sum('party_size'))
+        .values_list('trip_id', 'seats')
+    )
+    for trip_id, seats in offered:
+        occupied[trip_id] = occupied.get(trip_id, 0) + seats
+    return occupied
+
+
+def _orphaned_seats_by_trip(trip_ids):
+    """
+    Seats still assigned to bookings that were cancelled, in one grouped query
+
+    Returns:
+        dict: trip_id -> seat count
+    """
+    from apps.bookings.models import Seat
+
+    return dict(
+        Seat.objects.filter(trip_id__in=trip_ids, booking__booking_status='cancelled')
+        .values('trip_id').order_by()
+        .annotate(seats=Count('id'))
+        .values_list('trip_id', 'seats')
+    )
+
+
+def compute_drift(trips, trip_ids=None):
+    """
+    Compare recorded counters with the ones expected from bookings
+
+    Args:
+        trips: List of (trip_id, total_seats, available_seats)
+        trip_ids: Id list or subquery selecting the same trips (default:
+            ids of `trips`); a subquery keeps large scans out of IN lists
+
+    Returns:
+        list: {'trip_id', 'recorded', 'expected', 'delta', 'oversold',
+            'orphaned_seats'} for trips out of line, largest drift first
+    """
+    if trip_ids is None:
+        trip_ids = [trip_id for trip_id, _, _ in trips]
+    occupied = _occupied_by_trip(trip_ids)
+    orphaned = _orphaned_seats_by_trip(trip_ids)
+
+    drifts = []
+    for trip_id, total_seats, available_seats in trips:
+        free = total_seats - occupied.get(trip_id, 0)
+        expected = min(max(free, 0), total_seats)
+        if expected == available_seats and not orphaned.get(trip_id):
+            continue
+        drifts.append({
+            'trip_id': trip_id,
+            'recorded': available_seats,
+            'expected': expected,
+            'delta': available_seats - expected,
+            'oversold': free < 0,
+            'orphaned_seats': orphaned.get(trip_id, 0),
+        })
+
+    drifts.sort(key=lambda drift: (-abs(drift['delta']), drift['trip_id']))
+    return drifts
+
+
+def future_trips(today=None):
+    """
+    Trips that still sell or board: departing today or later
+
+    Returns:
+        QuerySet of Trip
+    """
+    from apps.transport.models import Trip
+
+    return Trip.objects.filter(departure_date__gte=today or timezone.localdate())
+
+
+def fix_drift_batch(trip_ids):
+    """
+    Recompute and fix the counters of a batch of trips.
+
+    The trips are locked (id order) and their drift computed again inside
+    the transaction, so bookings made since the scan are taken into account.
+    Counters are written with one UPDATE; seats of cancelled bookings are
+    released through update_seats.
+
+    Returns:
+        tuple: (trips fixed, seats released)
+    """
+    from apps.bookings.models import Seat
+    from apps.bookings.utils import update_seats
+    from apps.transport.models import Trip
+    from .waitlist_service import notify_seats_released
+
+    with transaction.atomic():
+        trips = list(
+            Trip.objects.select_for_update()
+            .filter(id__in=trip_ids)
+            .order_by('id')
+            .values_list('id', 'total_seats', 'available_seats')
+        )
+        drifts = compute_drift(trips)
+        if not drifts:
+            return 0, 0
+
+        changed = [drift for drift in drifts if drift['delta']]
+        if changed:
+            Trip.objects.bulk_update(
+                [Trip(id=drift['trip_id'], available_seats=drift['expected']) for drift in changed],
+                ['available_seats']
+            )
+
+        released = 0
+        for drift in drifts:
+            if drift['orphaned_seats']:
+                released += update_seats(
+                    Seat.objects.filter(trip_id=drift['trip_id'], booking__booking_status='cancelled'),
+                    booking=None,
+                    is_available=True,
+                    reserved_until=None,
+                    passenger_name=None
+                )
+            if drift['delta'] < 0 or drift['orphaned_seats']:
+                # Seats came back: the waitlist may take them
+                notify_seats_released(drift['trip_id'])
+
+    return len(drifts), released
+
+
+def reconcile_seat_counters(batch_size=RECONCILIATION_BATCH_SIZE, dry_run=False, today=None):
+    """
+    Check available_seats of every future trip against bookings, waitlist
+    offers and seat rows, fix the drifted ones in batches and record the
+    run (drift metrics).
+
+    The scan is four queries whatever the number of trips: trips,
+    bookings grouped by trip, waitlist offers grouped by trip and
+    orphaned seats grouped by trip.
+
+    Returns:
+        SeatReconciliationRun instance
+    """
+    from apps.bookings.models import SeatReconciliationRun
+
+    run = SeatReconciliationRun(started_at=timezone.now(), dry_run=dry_run)
+
+    scope = future_trips(today)
+    trips = list(scope.order_by('id').values_list('id', 'total_seats', 'available_seats'))
+    drifts = compute_drift(trips, scope.values('id'))
+
+    run.trips_checked = len(trips)
+    run.trips_drifted = len(drifts)
+    run.seats_drift = sum(abs(drift['delta']) for drift in drifts)
+    run.oversold_trips = sum(1 for drift in drifts if drift['oversold'])
+    run.orphaned_seats = sum(drift['orphaned_seats'] for drift in drifts)
+    run.drifts = drifts[:MAX_RECORDED_DRIFTS]
+
+    if not dry_run:
+        trip_ids = sorted(drift['trip_id'] for drift in drifts)
+        for start in range(0, len(trip_ids), batch_size):
+            fixed, released = fix_drift_batch(trip_ids[start:start + batch_size])
+            run.trips_fixed += fixed
+            run.seats_released += released
+
+    run.finished_at = timezone.now()
+    run.save()
+
+    if drifts:
+        logger.warning(
+            f"🔧 Seat counters: {run.trips_drifted}/{run.trips_checked} trip(s) drifted "
+            f"({run.seats_drift} seats, {run.oversold_trips} oversold), {run.trips_fixed} fixed"
+        )
+    return run
+
+
+def drift_metrics(days=30):
+    """
+    Drift frequency over the last days, from the recorded runs
+
+    Returns:
+        dict: runs, runs_with_drift, trips_checked, trips_drifted,
+            drift_rate (% of checked trips), seats_drift, oversold_trips,
+            last_run_at
+    """
+    from apps.bookings.models import SeatReconciliationRun
+
+    runs = SeatReconciliationRun.objects.filter(started_at__gte=timezone.now() - timedelta(days=days))
+    totals = runs.aggregate(
+        runs=Count('id'),
+        runs_with_drift=Count('id', filter=Q(trips_drifted__gt=0)),
+        trips_checked=Sum('trips_checked'),
+        trips_drifted=Sum('trips_drifted'),
+        seats_drift=Sum('seats_drift'),
+        oversold_trips=Sum('oversold_trips'),
+    )
+    totals = {key: value or 0 for key, value in totals.items()}
+    totals['drift_rate'] = (
+        round(totals['trips_drifted'] / totals['trips_checked'] * 100, 2)
+        if totals['trips_checked'] else 0
+    )
+    last_run = runs.order_by('-started_at').values_list('started_at', flat=True).first()
+    totals['last_run_at'] = last_run
+    return totals
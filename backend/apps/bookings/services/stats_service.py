@@ -0,0 +1,116 @@
+# Backend/apps/bookings/services/stats_service.py
+
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _money_sum(field, condition):
+    return Coalesce(
+        Sum(field, filter=condition),
+        Value(Decimal('0')),
+        output_field=DecimalField(max_digits=12, decimal_places=2)
+    )
+
+
+def aggregate_booking_stats(user_id):
+    """
+    Booking counts by status and amount spent, in one query
+
+    Returns:
+        dict: total_bookings, pending, confirmed, cancelled, completed, total_spent
+    """
+    from apps.bookings.models import Booking
+
+    return Booking.objects.filter(user_id=user_id).aggregate(
+        total_bookings=Count('id'),
+        pending=Count('id', filter=Q(booking_status='pending')),
+        confirmed=Count('id', filter=Q(booking_status='confirmed')),
+        cancelled=Count('id', filter=Q(booking_status='cancelled')),
+        completed=Count('id', filter=Q(booking_status='completed')),
+        total_spent=_money_sum('total_amount', Q(payment_status='paid')),
+    )
+
+
+def aggregate_payment_stats(user_id):
+    """
+    Payment counts by status and amount paid, in one query
+
+    Returns:
+        dict: total_payments, completed, pending, failed, total_spent
+    """
+    from apps.payments.models import Payment
+
+    return Payment.objects.filter(user_id=user_id).aggregate(
+        total_payments=Count('id'),
+        completed=Count('id', filter=Q(status='completed')),
+        pending=Count('id', filter=Q(status='pending')),
+        failed=Count('id', filter=Q(status='failed')),
+        total_spent=_money_sum('amount', Q(status='completed')),
+    )
+
+
+def refresh_user_stats(user_id):
+    """
+    Recompute a user's stats row (two aggregate queries and one upsert).
+    Called after the user's bookings or payments change.
+
+    Returns:
+        UserStats instance
+    """
+    from apps.bookings.models import UserStats
+
+    bookings = aggregate_booking_stats(user_id)
+    payments = aggregate_payment_stats(user_id)
+
+    stats, _ = UserStats.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            'total_bookings': bookings['total_bookings'],
+            'pending_bookings': bookings['pending'],
+            'confirmed_bookings': bookings['confirmed'],
+            'cancelled_bookings': bookings['cancelled'],
+            'completed_bookings': bookings['completed'],
+            'total_spent': bookings['total_spent'],
+            'total_payments': payments['total_payments'],
+            'completed_payments': payments['completed'],
+            'pending_payments': payments['pending'],
+            'failed_payments': payments['failed'],
+            'payments_spent': payments['total_spent'],
+        }
+    )
+    return stats
+
+
+def schedule_stats_refresh(user_id):
+    """Refresh a user's stats once the current transaction commits"""
+    if not user_id:
+        return
+
+    def refresh():
+        try:
+            refresh_user_stats(user_id)
+        except Exception as e:
+            # Stale stats are fixed by the user's next change
+            logger.error(f"Stats refresh failed for user {user_id}: {e}")
+
+    transaction.on_commit(refresh)
+
+
+def get_user_stats(user):
+    """
+    Stats row of a user, computed on first access
+
+    Returns:
+        UserStats instance
+    """
+    from apps.bookings.models import UserStats
+
+    stats = UserStats.objects.filter(user=user).first()
+    if stats is None:
+        stats = refresh_user_stats(user.id)
+    return stats
@@ -0,0 +1,173 @@
+# Backend/apps/bookings/services/ticket_artifacts.py
+
+import hashlib
+import json
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from .ticket_service import TicketService
+from .calendar_service import CalendarService
+from .qr_service import QRCodeService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Bump when the ticket layout changes so every cached artifact is re-rendered
+TICKET_TEMPLATE_VERSION = 3
+
+QR_IMAGE_SIZE = 300
+
+
+class ArtifactBundle:
+    """Stored artifacts (PDF ticket, QR PNG, calendar ICS) of one booking version"""
+    
+    EXTENSIONS = {
+        'pdf': 'pdf',
+        'qr': 'png',
+        'ics': 'ics',
+    }
+    CONTENT_TYPES = {
+        'pdf': 'application/pdf',
+        'qr': 'image/png',
+        'ics': 'text/calendar',
+    }
+    
+    def __init__(self, directory, fingerprint, qr_data):
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.qr_data = qr_data
+    
+    def name(self, kind):
+        """Storage name of an artifact ('pdf', 'qr' or 'ics')"""
+        return f"{self.directory}/{self.fingerprint}.{self.EXTENSIONS[kind]}"
+    
+    def read(self, kind):
+        """Bytes of an artifact"""
+        with default_storage.open(self.name(kind), 'rb') as stored_file:
+            return stored_file.read()
+
+
+class TicketArtifacts:
+    """
+    Everything a traveler receives for a booking, computed once per version.
+
+    The lead passenger's QR payload is built once and reused for the PNG,
+    which is itself embedded in the PDF; the PDF, PNG and ICS are stored together under a
+    hash of every field they show. Any change to the booking, its
+    passengers or its trip yields a new bundle, and older ones are deleted.
+    """
+
+    DIRECTORY = getattr(settings, 'TICKET_CACHE_DIR', 'tickets')
+
+    @staticmethod
+    def fingerprint(booking):
+        """
+        Hash of the fields shown on the ticket, QR code and calendar event
+        (used as file name and ETag)
+
+        Args:
+            booking: Booking instance (prefetch passengers and select the
+                trip route, cities and company to avoid extra queries)
+        """
+        trip = booking.trip
+        route = trip.route
+        fields = {
+            'template': TICKET_TEMPLATE_VERSION,
+            'booking': [
+                booking.booking_reference,
+                booking.payment_status,
+                str(booking.ticket_price),
+                str(booking.platform_fee),
+                str(booking.total_amount),
+            ],
+            'trip': [
+                route.origin_city.name,
+                route.destination_city.name,
+                route.bus_company.name,
+                route.estimated_duration_minutes,
+                trip.id,
+                trip.departure_datetime.isoformat(),
+                trip.arrival_datetime.isoformat(),
+            ],
+            'passengers': [
+                [p.id, p.first_name, p.last_name, p.phone, p.email, p.seat_number]
+                for p in booking.passengers.all()
+            ],
+        }
+        encoded = json.dumps(fields, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    @staticmethod
+    def _directory(booking):
+        return f"{TicketArtifacts.DIRECTORY}/{booking.booking_reference}"
+
+    @staticmethod
+    def get_bundle(booking):
+        """
+        Get the artifact bundle of a booking, rendering missing artifacts.
+        Also keeps booking.qr_code_data in sync with the lead passenger.
+
+        Returns:
+            ArtifactBundle instance
+        """
+        passengers = list(booking.passengers.all())
+        if not passengers:
+            raise ValueError(f"No passenger for booking {booking.booking_reference}")
+
+        qr_data = QRCodeService.build_qr_data(booking, passengers[0])
+        if booking.qr_code_data != qr_data:
+            booking.qr_code_data = qr_data
+            booking.qr_code_generated_at = timezone.now()
+            booking.save(update_fields=['qr_code_data', 'qr_code_generated_at'])
+
+        bundle = ArtifactBundle(
+            TicketArtifacts._directory(booking),
+            TicketArtifacts.fingerprint(booking),
+            qr_data
+        )
+
+        missing = [kind for kind in ArtifactBundle.EXTENSIONS if not default_storage.exists(bundle.name(kind))]
+        if not missing:
+            return bundle
+
+        contents = {}
+        if 'qr' in missing or 'pdf' in missing:
+            contents['qr'] = QRCodeService.render_qr_png(qr_data, QR_IMAGE_SIZE).getvalue()
+        if 'pdf' in missing:
+            contents['pdf'] = TicketService.generate_ticket_pdf(
+                booking,
+                qr_pngs={passengers[0].id: contents['qr']}
+            ).getvalue()
+        if 'ics' in missing:
+            contents['ics'] = CalendarService.generate_calendar_event(booking)
+
+        for kind in missing:
+            name = bundle.name(kind)
+            saved_name = default_storage.save(name, ContentFile(contents[kind]))
+            if saved_name != name:
+                # Rendered concurrently by another request: same content, keep theirs
+                default_storage.delete(saved_name)
+
+        TicketArtifacts._purge_old_versions(booking, keep=bundle.fingerprint)
+        logger.info(f"Ticket artifacts rendered for {booking.booking_reference}: {', '.join(missing)}")
+        return bundle
+
+    @staticmethod
+    def _purge_old_versions(booking, keep=None):
+        """Delete stored artifacts of a booking, except the `keep` version"""
+        directory = TicketArtifacts._directory(booking)
+        try:
+            _, files = default_storage.listdir(directory)
+        except FileNotFoundError:
+            return
+
+        for filename in files:
+            if keep is None or not filename.startswith(f"{keep}."):
+                default_storage.delete(f"{directory}/{filename}")
+
+    @staticmethod
+    def invalidate(booking):
+        """Delete every stored artifact of a booking (e.g. on cancellation)"""
+        TicketArtifacts._purge_old_versions(booking)
@@ -3,9 +3,10 @@
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.units import inch
 from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from functools import lru_cache
 from io import BytesIO
 from .qr_service import QRCodeService
 import logging
@@ -13,194 +14,255 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class TicketService:
-    """Generate PDF e-tickets"""
-    
-    @staticmethod
-    def generate_ticket_pdf(booking):
-        """
-        Generate beautiful PDF ticket with QR code
-        
-        Args:
-            booking: Booking instance
-            
-        Returns:
-            BytesIO: PDF file content
-        """
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        elements = []
-        
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = ParagraphStyle(
+INSTRUCTIONS = """
+<b>Important Information:</b><br/>
+• Please arrive at the departure location 30 minutes before departure time<br/>
+• Keep this e-ticket on your phone or print it<br/>
+• Present the QR code at boarding<br/>
+• Carry a valid ID document<br/>
+• Contact support@navticket.com for any issues
+"""
+
+
+@lru_cache(maxsize=None)
+def _ticket_styles():
+    """
+    Paragraph and table styles, built once per process.
+    Styles are only read while rendering, so they are shared by all documents.
+    Spacing is tuned so a ticket fits on one A4 page.
+    """
+    styles = getSampleStyleSheet()
+
+    info_table_commands = [
+        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e0e7ff')),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+    ]
+
+    return {
+        'title': ParagraphStyle(
             'CustomTitle',
             parent=styles['Heading1'],
             fontSize=24,
             textColor=colors.HexColor('#1e40af'),
-            spaceAfter=30,
+            spaceAfter=12,
             alignment=TA_CENTER,
             fontName='Helvetica-Bold'
-        )
-        
-        heading_style = ParagraphStyle(
+        ),
+        'heading': ParagraphStyle(
             'CustomHeading',
             parent=styles['Heading2'],
             fontSize=14,
             textColor=colors.HexColor('#1e40af'),
-            spaceAfter=12,
+            spaceAfter=8,
             fontName='Helvetica-Bold'
-        )
-        
-        normal_style = ParagraphStyle(
+        ),
+        'normal': ParagraphStyle(
             'CustomNormal',
             parent=styles['Normal'],
             fontSize=11,
             spaceAfter=6,
-        )
-        
-        # Title
-        elements.append(Paragraph("🎫 NAVTICKET E-TICKET", title_style))
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Booking Reference (prominent)
-        ref_style = ParagraphStyle(
+        ),
+        'reference': ParagraphStyle(
             'Reference',
             parent=styles['Normal'],
             fontSize=16,
             alignment=TA_CENTER,
             textColor=colors.HexColor('#dc2626'),
             fontName='Helvetica-Bold',
-            spaceAfter=20
-        )
-        elements.append(Paragraph(f"Booking Reference: {booking.booking_reference}", ref_style))
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Trip Information
+            spaceAfter=10
+        ),
+        'footer': ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=9,
+            textColor=colors.grey,
+            alignment=TA_CENTER
+        ),
+        'info_table': TableStyle(info_table_commands),
+        'payment_table': TableStyle(info_table_commands + [
+            ('BACKGROUND', (0, 3), (1, 3), colors.HexColor('#86efac')),  # Highlight status
+        ]),
+        'qr_table': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]),
+    }
+
+
+class TicketService:
+    """Generate PDF e-tickets"""
+
+    @staticmethod
+    def _info_table(rows, style):
+        table = Table(rows, colWidths=[2*inch, 4*inch])
+        table.setStyle(style)
+        return table
+
+    @staticmethod
+    def _passenger_page(booking, passenger, trip_rows, payment_rows, qr_png):
+        """Flowables of one passenger's ticket page"""
+        styles = _ticket_styles()
+
+        passenger_rows = [
+            ['Passenger Name', f"{passenger.first_name} {passenger.last_name}"],
+            ['Phone', passenger.phone],
+            ['Email', passenger.email or 'N/A'],
+            ['Seat Number', passenger.seat_number or 'Will be assigned'],
+        ]
+
+        qr_table = Table([[Image(BytesIO(qr_png), width=1.7*inch, height=1.7*inch)]], colWidths=[6*inch])
+        qr_table.setStyle(styles['qr_table'])
+
+        return [
+            Paragraph("🎫 NAVTICKET E-TICKET", styles['title']),
+            Paragraph(f"Booking Reference: {booking.booking_reference}", styles['reference']),
+            Paragraph("Trip Details", styles['heading']),
+            TicketService._info_table(trip_rows, styles['info_table']),
+            Spacer(1, 0.2*inch),
+            Paragraph("Passenger Details", styles['heading']),
+            TicketService._info_table(passenger_rows, styles['info_table']),
+            Spacer(1, 0.2*inch),
+            Paragraph("Payment Details", styles['heading']),
+            TicketService._info_table(payment_rows, styles['payment_table']),
+            Spacer(1, 0.2*inch),
+            Paragraph("Boarding QR Code", styles['heading']),
+            qr_table,
+            Spacer(1, 0.1*inch),
+            Paragraph(INSTRUCTIONS, styles['normal']),
+            Spacer(1, 0.2*inch),
+            Paragraph("Thank you for choosing Navticket! Have a safe journey.", styles['footer']),
+            Paragraph("www.navticket.com | support@navticket.com", styles['footer']),
+        ]
+
+    @staticmethod
+    def _booking_pages(booking, qr_pngs=None):
+        """
+        Flowables of a booking: one page per passenger, each with its own
+        ticket token QR code. Trip and payment data are computed once.
+        """
+        passengers = list(booking.passengers.all())
+        if not passengers:
+            logger.warning(f"No passenger for booking {booking.booking_reference}")
+            return []
+
         trip = booking.trip
         route = trip.route
-        
-        trip_data = [
+
+        trip_rows = [
             ['Route', f"{route.origin_city.name} → {route.destination_city.name}"],
             ['Transport Company', route.bus_company.name],
             ['Departure', trip.departure_datetime.strftime('%d %B %Y at %H:%M')],
             ['Arrival', trip.arrival_datetime.strftime('%d %B %Y at %H:%M')],
             ['Duration', f"{route.estimated_duration_minutes}m"],
         ]
-        
-        elements.append(Paragraph("Trip Details", heading_style))
-        trip_table = Table(trip_data, colWidths=[2*inch, 4*inch])
-        trip_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e0e7ff')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        ]))
-        elements.append(trip_table)
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Passenger Information
-        passenger = booking.passengers.first()
-        if not passenger:
-            logger.warning(f"No passenger for booking {booking.booking_reference}")
-            return False
-        passenger_data = [
-            ['Passenger Name', f"{passenger.first_name} {passenger.last_name}"],
-            ['Phone', passenger.phone],
-            ['Email', passenger.email or 'N/A'],
-            ['Seat Number', passenger.seat_number or 'Will be assigned'],
-        ]
-        
-        elements.append(Paragraph("Passenger Details", heading_style))
-        passenger_table = Table(passenger_data, colWidths=[2*inch, 4*inch])
-        passenger_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e0e7ff')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        ]))
-        elements.append(passenger_table)
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Payment Information
-        payment_data = [
+        payment_rows = [
             ['Ticket Price', f"{booking.ticket_price} XOF"],
             ['Platform Fee', f"{booking.platform_fee} XOF"],
             ['Total Amount', f"{booking.total_amount} XOF"],
             ['Payment Status', booking.payment_status.upper()],
         ]
-        
-        elements.append(Paragraph("Payment Details", heading_style))
-        payment_table = Table(payment_data, colWidths=[2*inch, 4*inch])
-        payment_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e0e7ff')),
-            ('BACKGROUND', (0, 3), (1, 3), colors.HexColor('#86efac')),  # Highlight status
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        ]))
-        elements.append(payment_table)
-        elements.append(Spacer(1, 0.4*inch))
-        
-        # QR Code
-        qr_image = QRCodeService.generate_qr_code_image(booking, size=200)
-        qr_img = Image(qr_image, width=2*inch, height=2*inch)
-        
-        elements.append(Paragraph("Boarding QR Code", heading_style))
-        qr_table = Table([[qr_img]], colWidths=[6*inch])
-        qr_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
-        elements.append(qr_table)
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Instructions
-        instructions = """
-        <b>Important Information:</b><br/>
-        • Please arrive at the departure location 30 minutes before departure time<br/>
-        • Keep this e-ticket on your phone or print it<br/>
-        • Present the QR code at boarding<br/>
-        • Carry a valid ID document<br/>
-        • Contact support@navticket.com for any issues
+        qr_pngs = qr_pngs or {}
+
+        elements = []
+        for passenger in passengers:
+            qr_png = qr_pngs.get(passenger.id)
+            if qr_png is None:
+                qr_png = QRCodeService.render_qr_png(
+                    QRCodeService.build_qr_data(booking, passenger),
+                    size=200
+                ).getvalue()
+            if elements:
+                elements.append(PageBreak())
+            elements.extend(
+                TicketService._passenger_page(booking, passenger, trip_rows, payment_rows, qr_png)
+            )
+        return elements
+
+    @staticmethod
+    def generate_tickets_pdf(bookings):
         """
-        elements.append(Paragraph(instructions, normal_style))
-        
-        # Footer
-        elements.append(Spacer(1, 0.5*inch))
-        footer_style = ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=9,
-            textColor=colors.grey,
-            alignment=TA_CENTER
-        )
-        elements.append(Paragraph("Thank you for choosing Navticket! Have a safe journey.", footer_style))
-        elements.append(Paragraph("www.navticket.com | support@navticket.com", footer_style))
-        
-        # Build PDF
+        Render the tickets of several bookings in a single document
+        (e.g. a whole trip), one page per passenger
+
+        Args:
+            bookings: Iterable of Booking instances (select the trip route,
+                cities and company and prefetch passengers for batches)
+
+        Returns:
+            BytesIO: PDF file content, or False if there is no passenger
+        """
+        elements = []
+        for booking in bookings:
+            pages = TicketService._booking_pages(booking)
+            if pages and elements:
+                elements.append(PageBreak())
+            elements.extend(pages)
+
+        if not elements:
+            return False
+
+        return TicketService._build(elements)
+
+    @staticmethod
+    def _build(elements):
+        """Lay out flowables into an A4 PDF"""
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
         doc.build(elements)
         buffer.seek(0)
-        
+
         return buffer
-    
+
+    @staticmethod
+    def generate_ticket_pdf(booking, qr_pngs=None):
+        """
+        Generate beautiful PDF ticket with QR code, one page per passenger
+
+        Args:
+            booking: Booking instance
+            qr_pngs: Already rendered QR code PNG bytes by passenger id (optional)
+
+        Returns:
+            BytesIO: PDF file content, or False if there is no passenger
+        """
+        pages = TicketService._booking_pages(booking, qr_pngs)
+        if not pages:
+            return False
+
+        return TicketService._build(pages)
+
+    @staticmethod
+    def generate_trip_tickets_pdf(trip):
+        """
+        Render every confirmed ticket of a trip in one pass
+
+        Args:
+            trip: Trip instance
+
+        Returns:
+            BytesIO: PDF file content, or False if the trip has no passenger
+        """
+        from apps.bookings.models import Booking
+
+        bookings = Booking.objects.filter(
+            trip=trip,
+            booking_status='confirmed'
+        ).select_related(
+            'trip__route__origin_city',
+            'trip__route__destination_city',
+            'trip__route__bus_company'
+        ).prefetch_related('passengers').order_by('created_at')
+
+        return TicketService.generate_tickets_pdf(bookings)
+
     @staticmethod
     def get_ticket_filename(booking):
         """Generate filename for ticket PDF"""
-        return f'navticket_ticket_{booking.booking_reference}.pdf'
\ No newline at end of file
+        return f'navticket_ticket_{booking.booking_reference}.pdf'
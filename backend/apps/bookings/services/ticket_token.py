@@ -0,0 +1,245 @@
+# Backend/apps/bookings/services/ticket_token.py
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+from .reference_service import ALPHABET, CODE_LENGTH, BookingReferenceService, _check_symbol
+from functools import lru_cache
+import hashlib
+import hmac
+import struct
+
+
+# Token layout (big-endian), then base45 so the QR code uses alphanumeric mode:
+#   header      1B   version << 4 | flags
+#   trip_id     4B
+#   passenger   4B
+#   valid_from  4B   minutes since TOKEN_EPOCH
+#   valid_for   2B   minutes
+#   reference   6B   days since TOKEN_EPOCH (2B) + 30-bit code (4B), check symbol recomputed
+#               or 1B length + ASCII for references in another format (FLAG_RAW_REFERENCE)
+#   seat        1B length + ASCII
+#   mac         10B  truncated HMAC-SHA256 over everything above
+TOKEN_PREFIX = 'NT:'
+TOKEN_VERSION = 1
+FLAG_RAW_REFERENCE = 0x01
+MAC_LENGTH = 10
+
+TOKEN_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+TOKEN_VALID_BEFORE = timedelta(hours=24)    # before departure
+TOKEN_VALID_AFTER = timedelta(hours=12)     # after departure (delays, multi-stop trips)
+
+_HEADER = struct.Struct('>BIIIH')
+
+# RFC 9285: exactly the QR alphanumeric character set
+BASE45_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
+_BASE45_INDEX = {char: index for index, char in enumerate(BASE45_ALPHABET)}
+
+
+class TokenError(ValueError):
+    """Ticket token is malformed, forged or outside its validity window"""
+
+
+def _b45encode(data):
+    chars = []
+    for i in range(0, len(data) - 1, 2):
+        value = data[i] * 256 + data[i + 1]
+        value, c = divmod(value, 45)
+        e, d = divmod(value, 45)
+        chars.extend((BASE45_ALPHABET[c], BASE45_ALPHABET[d], BASE45_ALPHABET[e]))
+    if len(data) % 2:
+        d, c = divmod(data[-1], 45)
+        chars.extend((BASE45_ALPHABET[c], BASE45_ALPHABET[d]))
+    return ''.join(chars)
+
+
+def _b45decode(text):
+    index = _BASE45_INDEX
+    try:
+        values = [index[char] for char in text]
+    except KeyError:
+        raise TokenError("Invalid token encoding")
+
+    remainder = len(values) % 3
+    if remainder == 1:
+        raise TokenError("Invalid token encoding")
+
+    words = [
+        a + b * 45 + c * 2025
+        for a, b, c in zip(values[0::3], values[1::3], values[2::3])
+    ]
+    if any(word > 0xFFFF for word in words):
+        raise TokenError("Invalid token encoding")
+    data = struct.pack(f'>{len(words)}H', *words)
+
+    if remainder:
+        last = values[-2] + values[-1] * 45
+        if last > 0xFF:
+            raise TokenError("Invalid token encoding")
+        data += bytes([last])
+    return data
+
+
+@lru_cache(maxsize=1)
+def token_key():
+    """HMAC key shared with scanner devices"""
+    key = getattr(settings, 'TICKET_TOKEN_KEY', '')
+    if key:
+        return key.encode()
+    return hashlib.sha256(f"ticket-token|{settings.SECRET_KEY}".encode()).digest()
+
+
+def _minutes(moment):
+    if timezone.is_naive(moment):
+        # Trip.departure_datetime is naive, in TIME_ZONE
+        moment = timezone.make_aware(moment)
+    return int((moment - TOKEN_EPOCH).total_seconds() // 60)
+
+
+def _pack_reference(reference):
+    """
+    Returns:
+        tuple: (flags, bytes) - 6 bytes for NVT-YYYYMMDD-XXXXXXC references
+    """
+    if BookingReferenceService.is_valid(reference):
+        _, date_str, body = reference.upper().split('-')
+        day = datetime.strptime(date_str, '%Y%m%d').replace(tzinfo=dt_timezone.utc)
+        days = (day - TOKEN_EPOCH).days
+        if 0 <= days <= 0xFFFF:
+            code = 0
+            for char in body[:CODE_LENGTH]:
+                code = code * 32 + ALPHABET.index(char)
+            return 0, struct.pack('>HI', days, code)
+
+    raw = reference.encode('ascii')
+    return FLAG_RAW_REFERENCE, bytes([len(raw)]) + raw
+
+
+def _unpack_reference(flags, data, offset):
+    """
+    Returns:
+        tuple: (reference, new offset)
+    """
+    if flags & FLAG_RAW_REFERENCE:
+        length = data[offset]
+        raw = data[offset + 1:offset + 1 + length]
+        if len(raw) != length:
+            raise TokenError("Truncated token")
+        return raw.decode('ascii'), offset + 1 + length
+
+    days, code = struct.unpack_from('>HI', data, offset)
+    return _compact_reference(days, code), offset + 6
+
+
+@lru_cache(maxsize=4096)
+def _compact_reference(days, code):
+    """Rebuild NVT-YYYYMMDD-XXXXXXC (cached: scanners see the same bookings repeatedly)"""
+    date_str = (TOKEN_EPOCH + timedelta(days=days)).strftime('%Y%m%d')
+    symbols = []
+    for _ in range(CODE_LENGTH):
+        code, index = divmod(code, 32)
+        symbols.append(ALPHABET[index])
+    body = ''.join(reversed(symbols))
+    return f"{BookingReferenceService.PREFIX}-{date_str}-{body}{_check_symbol(date_str + body)}"
+
+
+class TicketToken:
+    """Decoded ticket token (one passenger's seat on one trip)"""
+
+    __slots__ = ('booking_reference', 'trip_id', 'passenger_id', 'seat_number', 'valid_from', 'valid_until')
+
+    def __init__(self, booking_reference, trip_id, passenger_id, seat_number, valid_from, valid_until):
+        self.booking_reference = booking_reference
+        self.trip_id = trip_id
+        self.passenger_id = passenger_id
+        self.seat_number = seat_number
+        self.valid_from = valid_from
+        self.valid_until = valid_until
+
+    def __repr__(self):
+        return f"<TicketToken {self.booking_reference} trip={self.trip_id} passenger={self.passenger_id} seat={self.seat_number}>"
+
+
+def encode_ticket_token(booking_reference, trip_id, passenger_id, seat_number, departure, key=None):
+    """
+    Build a signed ticket token
+
+    Args:
+        booking_reference: Booking reference
+        trip_id: Trip id
+        passenger_id: Passenger id
+        seat_number: Seat number ('' if not assigned)
+        departure: Trip departure datetime
+        key: HMAC key (defaults to token_key())
+
+    Returns:
+        str: QR payload, e.g. 'NT:...' (about 56 alphanumeric characters)
+    """
+    valid_from = _minutes(departure - TOKEN_VALID_BEFORE)
+    valid_for = _minutes(departure + TOKEN_VALID_AFTER) - valid_from
+
+    flags, reference = _pack_reference(booking_reference)
+    seat = (seat_number or '').encode('ascii')
+
+    body = (
+        _HEADER.pack(TOKEN_VERSION << 4 | flags, trip_id, passenger_id, valid_from, valid_for)
+        + reference
+        + bytes([len(seat)]) + seat
+    )
+    mac = hmac.new(key or token_key(), body, hashlib.sha256).digest()[:MAC_LENGTH]
+    return TOKEN_PREFIX + _b45encode(body + mac)
+
+
+def is_ticket_token(qr_data):
+    return qr_data.startswith(TOKEN_PREFIX)
+
+
+def verify_ticket_token(qr_data, now=None, key=None):
+    """
+    Check a ticket token's signature and validity window.
+    Pure CPU: no database access, so scanners can run it offline.
+
+    Args:
+        qr_data: Scanned QR payload
+        now: Scan time (defaults to now)
+        key: HMAC key (defaults to token_key())
+
+    Returns:
+        tuple: (TicketToken, error_message) - token is None on error
+    """
+    try:
+        if not is_ticket_token(qr_data):
+            raise TokenError("Not a ticket token")
+
+        data = _b45decode(qr_data[len(TOKEN_PREFIX):])
+        if len(data) < _HEADER.size + MAC_LENGTH + 2:
+            raise TokenError("Truncated token")
+
+        body, mac = data[:-MAC_LENGTH], data[-MAC_LENGTH:]
+        expected = hmac.new(key or token_key(), body, hashlib.sha256).digest()[:MAC_LENGTH]
+        if not hmac.compare_digest(mac, expected):
+            raise TokenError("Invalid ticket - tampering detected")
+
+        header, trip_id, passenger_id, valid_from, valid_for = _HEADER.unpack_from(body)
+        if header >> 4 != TOKEN_VERSION:
+            raise TokenError("Unsupported token version")
+
+        reference, offset = _unpack_reference(header & 0x0F, body, _HEADER.size)
+        seat_length = body[offset]
+        seat = body[offset + 1:offset + 1 + seat_length]
+        if len(seat) != seat_length:
+            raise TokenError("Truncated token")
+
+        starts = TOKEN_EPOCH + timedelta(minutes=valid_from)
+        ends = starts + timedelta(minutes=valid_for)
+        now = now or timezone.now()
+        if now < starts:
+            raise TokenError("Ticket not valid yet")
+        if now > ends:
+            raise TokenError("Ticket expired")
+
+        return TicketToken(reference, trip_id, passenger_id, seat.decode('ascii'), starts, ends), None
+
+    except (TokenError, struct.error, IndexError, UnicodeDecodeError) as e:
+        message = str(e) if isinstance(e, TokenError) else "Invalid ticket token"
+        return None, message
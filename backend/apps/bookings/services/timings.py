@@ -0,0 +1,17 @@
+# Backend/apps/bookings/services/timings.py
+
+import time
+from contextlib import contextmanager
+
+
+class StageTimings(dict):
+    """Stage name -> duration in milliseconds (summed if a stage runs twice)"""
+    
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self[name] = round(self.get(name, 0) + elapsed, 2)
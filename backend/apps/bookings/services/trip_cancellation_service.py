@@ -0,0 +1,238 @@
+# Backend/apps/bookings/services/trip_cancellation_service.py
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .batch_mailer import BatchMailer
+from .emails_service import EmailService
+from .job_queue import enqueue_job, enqueue_jobs
+from .stats_service import schedule_stats_refresh
+from .ticket_artifacts import TicketArtifacts
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+TRIP_CANCELLATION_BATCH_SIZE = getattr(settings, 'TRIP_CANCELLATION_BATCH_SIZE', 50)
+CANCELLABLE_BOOKING_STATUSES = ('pending', 'confirmed')
+NON_CANCELLABLE_TRIP_STATUSES = ('completed', 'in_progress')
+
+
+def _open_bookings(trip_id):
+    from apps.bookings.models import Booking
+
+    return Booking.objects.filter(trip_id=trip_id, booking_status__in=CANCELLABLE_BOOKING_STATUSES)
+
+
+def cancel_trip(trip, user=None, reason=''):
+    """
+    Cancel a trip: the trip stops selling right away and a background job
+    cancels, refunds and notifies its bookings in batches.
+    Cancelling a trip twice returns the cancellation already recorded.
+
+    Args:
+        trip: Trip instance
+        user: Staff or company user cancelling the trip
+        reason: Shown in the dashboard (optional)
+
+    Returns:
+        tuple: (TripCancellation instance or None, error_message or None)
+    """
+    from apps.bookings.models import TripCancellation
+    from apps.transport.models import Trip
+
+    with transaction.atomic():
+        # Bookings made from now on see the cancelled status
+        trip = Trip.objects.select_for_update().filter(pk=trip.pk).first()
+        if trip is None:
+            return None, "Trip not found"
+
+        existing = TripCancellation.objects.filter(trip=trip).first()
+        if existing:
+            return existing, None
+
+        if trip.status in NON_CANCELLABLE_TRIP_STATUSES:
+            return None, f"Trip is {trip.status} and cannot be cancelled"
+
+        cancellation = TripCancellation.objects.create(
+            trip=trip,
+            requested_by=user if user and user.is_authenticated else None,
+            reason=reason,
+            total_bookings=_open_bookings(trip.id).count()
+        )
+        Trip.objects.filter(pk=trip.pk).update(status='cancelled', updated_at=timezone.now())
+
+        enqueue_job('cancel_trip', payload={'cancellation_id': cancellation.id})
+
+    logger.info(f"🚫 Trip {trip.id} cancelled, {cancellation.total_bookings} booking(s) to process")
+    return cancellation, None
+
+
+def cancel_service_day(date, user=None, reason='', station_id=None, company=None):
+    """
+    Cancel every departure of a day, optionally from one station or company.
+    Each trip is cancelled in its own short transaction and processed by
+    its own job, so workers handle the trips of the day in parallel.
+
+    Returns:
+        tuple: (list of TripCancellation, list of {'trip_id', 'error'})
+    """
+    from .manifest_service import station_day_trips
+
+    trips = station_day_trips(date, station_id).exclude(status__in=NON_CANCELLABLE_TRIP_STATUSES)
+    if company is not None:
+        trips = trips.filter(route__bus_company=company)
+
+    cancellations, errors = [], []
+    for trip in trips:
+        cancellation, error = cancel_trip(trip, user, reason)
+        if error:
+            errors.append({'trip_id': trip.id, 'error': error})
+        else:
+            cancellations.append(cancellation)
+    return cancellations, errors
+
+
+def cancel_booking_batch(cancellation, batch_size=TRIP_CANCELLATION_BATCH_SIZE):
+    """
+    Cancel the next batch of open bookings of a cancelled trip, in one
+    short transaction: bookings and their seats are released with bulk
+    UPDATEs and paid bookings get a refund job committed with them.
+
+    Returns:
+        list: Booking instances cancelled (trip route, cities and company
+            selected and passengers prefetched, ready for the emails)
+    """
+    from apps.bookings.models import Booking, Seat, TripCancellation
+    from apps.bookings.utils import update_seats
+    from apps.transport.models import Trip
+
+    trip_id = cancellation.trip_id
+
+    with transaction.atomic():
+        ids = list(
+            _open_bookings(trip_id).select_for_update()
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+
+        now = timezone.now()
+        Booking.objects.filter(id__in=ids).update(
+            booking_status='cancelled',
+            cancelled_at=now,
+            updated_at=now
+        )
+        bookings = list(
+            Booking.objects.filter(id__in=ids).select_related(
+                'trip__route__origin_city',
+                'trip__route__destination_city',
+                'trip__route__bus_company'
+            ).prefetch_related('passengers').order_by('id')
+        )
+
+        seats = sum(booking.total_passengers for booking in bookings)
+        Trip.objects.filter(pk=trip_id).update(available_seats=F('available_seats') + seats)
+        update_seats(
+            Seat.objects.filter(trip_id=trip_id, booking_id__in=ids),
+            booking=None,
+            is_available=True,
+            reserved_until=None,
+            passenger_name=None
+        )
+
+        paid = [booking for booking in bookings if booking.payment_status == 'paid']
+        enqueue_jobs('refund_booking', paid)
+
+        # Bulk UPDATE sends no post_save signal
+        for user_id in {booking.user_id for booking in bookings}:
+            schedule_stats_refresh(user_id)
+
+        TripCancellation.objects.filter(pk=cancellation.pk).update(
+            cancelled_bookings=F('cancelled_bookings') + len(bookings),
+            seats_released=F('seats_released') + seats,
+            refunds_enqueued=F('refunds_enqueued') + len(paid),
+            batches=F('batches') + 1,
+            updated_at=now
+        )
+
+        transaction.on_commit(lambda: [TicketArtifacts.invalidate(booking) for booking in bookings])
+
+    return bookings
+
+
+def notify_cancelled_bookings(cancellation, bookings, mailer=None):
+    """
+    Email the travelers of a cancelled batch over pooled SMTP connections
+
+    Returns:
+        tuple: (sent count, failed count)
+    """
+    from apps.bookings.models import TripCancellation
+
+    outcome, result = EmailService.send_bulk('trip_cancellation', bookings, mailer)
+    sent = sum(1 for delivered in outcome.values() if delivered)
+
+    TripCancellation.objects.filter(pk=cancellation.pk).update(
+        notifications_sent=F('notifications_sent') + sent,
+        notifications_failed=F('notifications_failed') + result.failed_count,
+        updated_at=timezone.now()
+    )
+    return sent, result.failed_count
+
+
+def process_trip_cancellation(job, timings):
+    """
+    Job handler: work through the bookings of a cancelled trip batch by
+    batch, then close its waitlist. Every batch commits on its own, so a
+    retried job resumes with the bookings still open; travelers of a
+    committed batch are emailed once (failures are counted, not retried).
+
+    Args:
+        job: BackgroundJob instance (payload: {'cancellation_id'})
+        timings: StageTimings filled with per-stage durations
+    """
+    from apps.bookings.models import TripCancellation
+    from .waitlist_service import close_waitlist
+
+    cancellation = TripCancellation.objects.filter(pk=job.payload['cancellation_id']).first()
+    if cancellation is None or cancellation.status == 'completed':
+        return
+
+    TripCancellation.objects.filter(pk=cancellation.pk).update(status='running', updated_at=timezone.now())
+    mailer = BatchMailer()
+
+    try:
+        while True:
+            with timings.stage('cancel'):
+                bookings = cancel_booking_batch(cancellation)
+            if not bookings:
+                break
+            with timings.stage('notify'):
+                notify_cancelled_bookings(cancellation, bookings, mailer)
+
+        with timings.stage('waitlist'):
+            close_waitlist(cancellation.trip_id)
+
+    except Exception as e:
+        TripCancellation.objects.filter(pk=cancellation.pk).update(
+            status='failed',
+            last_error=str(e),
+            updated_at=timezone.now()
+        )
+        raise
+
+    now = timezone.now()
+    TripCancellation.objects.filter(pk=cancellation.pk).update(
+        status='completed',
+        last_error='',
+        completed_at=now,
+        updated_at=now
+    )
+    cancellation.refresh_from_db()
+    logger.info(
+        f"✅ Trip {cancellation.trip_id} cancellation done: {cancellation.cancelled_bookings} booking(s), "
+        f"{cancellation.refunds_enqueued} refund(s), {cancellation.notifications_sent} email(s)"
+    )
@@ -0,0 +1,442 @@
+# Backend/apps/bookings/services/waitlist_service.py
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, Count, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .job_queue import enqueue_job
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+WAITLIST_OFFER_TTL = getattr(settings, 'WAITLIST_OFFER_TTL', timedelta(minutes=30))
+WAITLIST_MAX_PARTY_SIZE = 10
+WAITLIST_PROMOTE_BATCH = 50
+
+
+def notify_seats_released(trip_id):
+    """
+    Queue waitlist processing for a trip once the current transaction
+    commits (cancellations, expired holds...). Only an indexed EXISTS
+    runs inline, so the caller's latency is unaffected.
+    """
+    from apps.bookings.models import WaitlistEntry
+
+    def enqueue():
+        if WaitlistEntry.objects.filter(trip_id=trip_id, status='waiting').exists():
+            enqueue_job('process_waitlist', payload={'trip_id': trip_id})
+
+    transaction.on_commit(enqueue)
+
+
+def waitlist_position(entry):
+    """1-based FIFO position of a waiting entry (0 once it left the queue)"""
+    from apps.bookings.models import WaitlistEntry
+
+    if entry.status != 'waiting':
+        return 0
+    return WaitlistEntry.objects.filter(
+        Q(created_at__lt=entry.created_at) | Q(created_at=entry.created_at, id__lt=entry.id),
+        trip_id=entry.trip_id,
+        status='waiting'
+    ).count() + 1
+
+
+def join_waitlist(trip, user, party_size, contact_email, contact_phone=''):
+    """
+    Add a traveler to the waitlist of a full trip
+
+    Returns:
+        tuple: (WaitlistEntry instance or None, error_message or None)
+    """
+    from apps.bookings.models import WaitlistEntry
+    from apps.transport.models import Trip
+    from .booking_services import validate_trip_bookable
+
+    is_valid, error = validate_trip_bookable(trip, check_seats=False)
+    if not is_valid:
+        return None, error
+
+    if trip.available_seats >= party_size:
+        return None, f"{trip.available_seats} seats are available, book them directly"
+
+    try:
+        with transaction.atomic():
+            entry = WaitlistEntry.objects.create(
+                trip=trip,
+                user=user,
+                party_size=party_size,
+                contact_email=contact_email,
+                contact_phone=contact_phone
+            )
+    except IntegrityError:
+        return None, "You are already on the waitlist for this trip"
+
+    # Seats released between the check above and the insert found no one waiting
+    if Trip.objects.filter(pk=trip.pk, available_seats__gt=0).exists():
+        notify_seats_released(trip.id)
+    return entry, None
+
+
+def _release_offer(entry, trip_id):
+    """Release the seat holds of an offer (only holds stamped by this offer)"""
+    from apps.bookings.models import Seat
+    from apps.bookings.utils import update_seats
+
+    if not entry.offered_seats:
+        return
+    update_seats(
+        Seat.objects.filter(
+            trip_id=trip_id,
+            seat_number__in=entry.offered_seats,
+            booking__isnull=True,
+            reserved_until=entry.offer_expires_at
+        ),
+        is_available=True,
+        reserved_until=None
+    )
+
+
+def _close_offers(entries, trip_id, status):
+    """Give the seats of offered entries back to the trip (trip row must be locked)"""
+    from apps.bookings.models import WaitlistEntry
+    from apps.transport.models import Trip
+
+    if not entries:
+        return 0
+
+    seats = sum(entry.party_size for entry in entries)
+    Trip.objects.filter(pk=trip_id).update(available_seats=F('available_seats') + seats)
+    for entry in entries:
+        _release_offer(entry, trip_id)
+    WaitlistEntry.objects.filter(id__in=[entry.id for entry in entries]).update(
+        status=status,
+        updated_at=timezone.now()
+    )
+    return seats
+
+
+def expire_offers(trip_id, now=None):
+    """
+    Expire the unanswered offers of a trip and give their seats back
+
+    Returns:
+        int: Number of offers expired
+    """
+    from apps.bookings.models import WaitlistEntry
+    from apps.transport.models import Trip
+
+    now = now or timezone.now()
+    with transaction.atomic():
+        if not Trip.objects.select_for_update().filter(pk=trip_id).exists():
+            return 0
+        expired = list(
+            WaitlistEntry.objects.select_for_update().filter(
+                trip_id=trip_id,
+                status='offered',
+                offer_expires_at__lte=now
+            )
+        )
+        _close_offers(expired, trip_id, 'expired')
+    return len(expired)
+
+
+def promote_waitlist(trip_id, now=None):
+    """
+    Offer free seats to the next waiting travelers, strictly first come
+    first served: a party that doesn't fit blocks the ones behind it.
+
+    The trip row is locked, so concurrent workers and bookings can't
+    hand out the same seats counted in available_seats. Seat map buyers
+    don't take that lock: each offer's block is held with claim_seats
+    until the offer expires, and a block lost to a buyer is picked again
+    once without the lost seats.
+
+    Returns:
+        list: WaitlistEntry instances offered
+    """
+    from apps.bookings.models import Seat, WaitlistEntry
+    from apps.bookings.utils import claim_seats, claimable_seats, find_best_seat_block
+    from apps.transport.models import Trip
+    from .booking_services import validate_trip_bookable
+
+    now = now or timezone.now()
+    expires_at = now + WAITLIST_OFFER_TTL
+
+    with transaction.atomic():
+        trip = Trip.objects.select_for_update().filter(pk=trip_id).first()
+        if trip is None:
+            return []
+
+        waiting = WaitlistEntry.objects.filter(trip_id=trip_id, status='waiting')
+
+        is_valid, error = validate_trip_bookable(trip, check_seats=False)
+        if not is_valid:
+            # Departed or cancelled: nobody will get a seat
+            closed = waiting.update(status='expired', updated_at=now)
+            if closed:
+                logger.info(f"Waitlist of trip {trip_id} closed ({closed} entries): {error}")
+            return []
+
+        free = trip.available_seats
+        if free <= 0:
+            return []
+
+        # Free seats as claim_seats sees them: expired holds count as free
+        seat_map = list(
+            Seat.objects.filter(trip_id=trip_id)
+            .annotate(claimable=ExpressionWrapper(claimable_seats(now), output_field=BooleanField()))
+            .values_list('seat_number', 'row', 'position', 'claimable')
+        )
+        free_seats = [(number, row, position) for number, row, position, claimable in seat_map if claimable]
+
+        offered = []
+        for entry in waiting.select_for_update().order_by('created_at', 'id')[:WAITLIST_PROMOTE_BATCH]:
+            if entry.party_size > free:
+                break
+
+            seats = []
+            if seat_map:
+                for _ in range(2):
+                    seats = find_best_seat_block(free_seats, entry.party_size, trip.seat_layout) or []
+                    if not seats:
+                        break
+                    claimed, lost = claim_seats(trip_id, seats, reserved_until=expires_at)
+                    gone = set(seats) if claimed else set(lost)
+                    free_seats = [seat for seat in free_seats if seat[0] not in gone]
+                    if claimed:
+                        break
+                    seats = []
+                if not seats:
+                    break
+
+            free -= entry.party_size
+            entry.status = 'offered'
+            entry.offered_seats = seats
+            entry.offered_at = now
+            entry.offer_expires_at = expires_at
+            entry.notified_at = None
+            entry.updated_at = now
+            offered.append(entry)
+
+        if not offered:
+            return []
+
+        Trip.objects.filter(pk=trip_id).update(
+            available_seats=F('available_seats') - sum(entry.party_size for entry in offered)
+        )
+        WaitlistEntry.objects.bulk_update(
+            offered,
+            ['status', 'offered_seats', 'offered_at', 'offer_expires_at', 'notified_at', 'updated_at']
+        )
+
+        # Comes back when the offers run out to pass unanswered seats on
+        enqueue_job(
+            'process_waitlist',
+            payload={'trip_id': trip_id},
+            delay=WAITLIST_OFFER_TTL + timedelta(seconds=5)
+        )
+
+    logger.info(f"🎟️ Waitlist trip {trip_id}: {len(offered)} offer(s) made")
+    return offered
+
+
+def send_offer_notifications(trip_id, mailer=None):
+    """
+    Email the offers of a trip that were not notified yet
+
+    Returns:
+        tuple: (sent count, failed count)
+    """
+    from apps.bookings.models import WaitlistEntry
+    from .batch_mailer import BatchMailer
+    from .emails_service import EmailService
+
+    entries = list(
+        WaitlistEntry.objects.filter(
+            trip_id=trip_id,
+            status='offered',
+            notified_at__isnull=True,
+            offer_expires_at__gt=timezone.now()
+        ).select_related(
+            'user',
+            'trip__route__origin_city',
+            'trip__route__destination_city',
+            'trip__route__bus_company'
+        )
+    )
+    if not entries:
+        return 0, 0
+
+    messages = [EmailService.build_waitlist_offer(entry) for entry in entries]
+    result = (mailer or BatchMailer()).send(messages)
+
+    sent_ids = [entry.id for entry, sent in zip(entries, result.sent) if sent]
+    if sent_ids:
+        WaitlistEntry.objects.filter(id__in=sent_ids).update(notified_at=timezone.now())
+    return len(sent_ids), result.failed_count
+
+
+def process_waitlist(job, timings):
+    """
+    Job handler: expire unanswered offers of a trip, offer free seats to
+    the next travelers and email them. Safe to retry: offers are only
+    made once and only unnotified offers are emailed.
+
+    Args:
+        job: BackgroundJob instance (payload: {'trip_id'})
+        timings: StageTimings filled with per-stage durations
+    """
+    trip_id = job.payload['trip_id']
+
+    with timings.stage('expire'):
+        expire_offers(trip_id)
+
+    with timings.stage('promote'):
+        promote_waitlist(trip_id)
+
+    with timings.stage('notify'):
+        _, failed = send_offer_notifications(trip_id)
+
+    if failed:
+        raise RuntimeError(f"{failed} waitlist offer email(s) not sent for trip {trip_id}")
+
+
+@transaction.atomic
+def accept_waitlist_offer(entry_id, user, passengers_data):
+    """
+    Turn an offer into a pending booking on the held seats
+
+    Returns:
+        tuple: (Booking instance or None, error_message or None)
+    """
+    from apps.bookings.models import Seat, WaitlistEntry
+    from apps.bookings.utils import update_seats
+    from .booking_services import create_booking_with_passengers
+
+    from apps.transport.models import Trip
+
+    entry = WaitlistEntry.objects.filter(id=entry_id, user=user).first()
+    if entry is None:
+        return None, "Waitlist entry not found"
+
+    # Same lock order as the worker: trip, then entries
+    Trip.objects.select_for_update().filter(pk=entry.trip_id).exists()
+    entry = WaitlistEntry.objects.select_for_update().get(pk=entry.pk)
+
+    if entry.status != 'offered' or entry.offer_expires_at <= timezone.now():
+        return None, "No open seat offer for this waitlist entry"
+
+    if len(passengers_data) != entry.party_size:
+        return None, f"The offer is for {entry.party_size} passenger(s)"
+
+    seats = list(entry.offered_seats)
+    if seats:
+        passengers_data = [
+            {**passenger, 'seat_number': seat}
+            for passenger, seat in zip(passengers_data, seats)
+        ]
+
+    booking, error = create_booking_with_passengers(
+        trip_id=entry.trip_id,
+        user=user,
+        passengers_data=passengers_data,
+        contact_email=entry.contact_email,
+        contact_phone=entry.contact_phone,
+        seats_held=True
+    )
+    if error:
+        transaction.set_rollback(True)
+        return None, error
+
+    if seats:
+        assigned = update_seats(
+            Seat.objects.filter(
+                trip_id=entry.trip_id,
+                seat_number__in=seats,
+                booking__isnull=True,
+                reserved_until=entry.offer_expires_at
+            ),
+            booking=booking,
+            reserved_until=None
+        )
+        if assigned != len(seats):
+            # A held seat went to someone else: never sell it twice
+            transaction.set_rollback(True)
+            return None, "The offered seats are no longer held, please contact support"
+        booking.selected_seats = seats
+        booking.save(update_fields=['selected_seats'])
+
+    entry.status = 'accepted'
+    entry.booking = booking
+    entry.save(update_fields=['status', 'booking', 'updated_at'])
+
+    return booking, None
+
+
+def leave_waitlist(entry_id, user):
+    """
+    Leave a waitlist; an open offer is declined and its seats passed on
+
+    Returns:
+        tuple: (bool, message)
+    """
+    from apps.bookings.models import WaitlistEntry
+    from apps.transport.models import Trip
+
+    with transaction.atomic():
+        entry = WaitlistEntry.objects.filter(id=entry_id, user=user).first()
+        if entry is None or entry.status not in ('waiting', 'offered'):
+            return False, "Not on the waitlist"
+
+        # Same lock order as the worker: trip, then entries
+        Trip.objects.select_for_update().filter(pk=entry.trip_id).exists()
+        entry = WaitlistEntry.objects.select_for_update().get(pk=entry.pk)
+
+        if entry.status == 'offered':
+            _close_offers([entry], entry.trip_id, 'cancelled')
+        elif entry.status == 'waiting':
+            entry.status = 'cancelled'
+            entry.save(update_fields=['status', 'updated_at'])
+        else:
+            return False, "Not on the waitlist"
+
+        # Released seats, or a party that was blocking the queue left
+        notify_seats_released(entry.trip_id)
+
+    return True, "Left the waitlist"
+
+
+def close_waitlist(trip_id):
+    """
+    Close the waitlist of a cancelled trip: open offers give their held
+    seats back and every waiting or offered entry is cancelled
+
+    Returns:
+        int: Number of entries closed
+    """
+    from apps.bookings.models import WaitlistEntry
+    from apps.transport.models import Trip
+
+    with transaction.atomic():
+        if not Trip.objects.select_for_update().filter(pk=trip_id).exists():
+            return 0
+        offered = list(WaitlistEntry.objects.select_for_update().filter(trip_id=trip_id, status='offered'))
+        _close_offers(offered, trip_id, 'cancelled')
+        waiting = WaitlistEntry.objects.filter(trip_id=trip_id, status='waiting').update(
+            status='cancelled',
+            updated_at=timezone.now()
+        )
+    return len(offered) + waiting
+
+
+def waitlist_length(trip_id):
+    """Travelers and seats waiting on a trip"""
+    from apps.bookings.models import WaitlistEntry
+
+    return WaitlistEntry.objects.filter(trip_id=trip_id, status='waiting').aggregate(
+        travelers=Count('id'), seats=Coalesce(Sum('party_size'), 0)
+    )
@@ -0,0 +1,44 @@
+# Backend/apps/bookings/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Booking
+from .services.stats_service import schedule_stats_refresh
+
+
+# Saves limited to other fields (QR data, ticket_sent_at...) don't change the stats
+BOOKING_STATS_FIELDS = {'user', 'booking_status', 'payment_status', 'total_amount'}
+PAYMENT_STATS_FIELDS = {'user', 'status', 'amount'}
+
+
+def _touches(update_fields, fields):
+    return update_fields is None or bool(fields & set(update_fields))
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def booking_changed(sender, instance, update_fields=None, **kwargs):
+    """Keep the owner's UserStats row in sync with booking transitions"""
+    if _touches(update_fields, BOOKING_STATS_FIELDS):
+        schedule_stats_refresh(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender='payments.Payment')
+def payment_changed(sender, instance, update_fields=None, **kwargs):
+    """Keep the payer's UserStats row in sync with payment transitions"""
+    if _touches(update_fields, PAYMENT_STATS_FIELDS):
+        schedule_stats_refresh(instance.user_id)
+
+
+@receiver(post_save, sender='transport.Trip')
+def trip_rescheduled(sender, instance, created, update_fields=None, **kwargs):
+    """Carry a trip's new departure over to its bookings (upcoming trips index)"""
+    if created or not _touches(update_fields, {'departure_date', 'departure_time'}):
+        return
+
+    departure = Booking.trip_departure_at(instance)
+    # updated_at moves too, so calendar feeds see the new version
+    Booking.objects.filter(trip=instance).exclude(departure_at=departure).update(
+        departure_at=departure,
+        updated_at=timezone.now()
+    )
@@ -1,3 +1,428 @@
-from django.test import TestCase
+import random
+import time as clock
+from datetime import time, timedelta
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import BusCompany, User
+from apps.bookings.models import Booking, IdempotencyKey, Seat, WaitlistEntry
+from apps.bookings.services import booking_services
+from apps.bookings.services.booking_services import cancel_booking, create_booking_with_passengers
+from apps.bookings.services.group_booking_service import create_group_booking
+from apps.bookings.services.job_queue import run_pending_jobs
+from apps.bookings.services.reference_service import ALPHABET, BookingReferenceService, ReferenceAllocator
+from apps.bookings.services.waitlist_service import accept_waitlist_offer, promote_waitlist
+from apps.bookings import utils as booking_utils
+from apps.bookings.utils import claim_seats, find_best_seat_block, update_seats, generate_seats_for_trip, hold_best_seats
+from apps.bookings.utils import idempotency, seat_allocator
+from apps.locations.models import City
+from apps.transport.models import Route, Trip
+
+
+class BookingTestMixin:
+    """Small trip, traveler and booking fixtures"""
+
+    def make_trip(self, seats=2, days=5):
+        company = BusCompany.objects.create(name='UTB', email='contact@utb.ci', phone='+2250101010101')
+        route = Route.objects.create(
+            bus_company=company,
+            origin_city=City.objects.create(name='Abidjan'),
+            destination_city=City.objects.create(name='Bouaké'),
+            estimated_duration_minutes=300,
+            base_price=5000
+        )
+        return Trip.objects.create(
+            route=route,
+            departure_date=timezone.localdate() + timedelta(days=days),
+            departure_time=time(8),
+            arrival_time=time(13),
+            total_seats=seats,
+            available_seats=seats,
+            price=5000,
+            status='scheduled'
+        )
+
+    def make_user(self, username='awa'):
+        return User.objects.create_user(username=username, email=f'{username}@example.ci', password='pw12345!')
+
+    def make_booking(self, trip, user, passengers=1):
+        return Booking.objects.create(
+            trip=trip,
+            user=user,
+            booking_reference=BookingReferenceService.generate()[0],
+            ticket_price=trip.price,
+            platform_fee=0,
+            total_amount=trip.price * passengers,
+            total_passengers=passengers,
+            contact_email=user.email,
+            contact_phone='+2250707070707'
+        )
+
+
+class BookingQueryBudgetTests(BookingTestMixin, TestCase):
+    """Creating a booking costs the same queries for 1 or N passengers"""
+
+    # SELECT trip, conditional UPDATE of seats, INSERT booking, bulk INSERT passengers
+    QUERY_BUDGET = 4
+
+    def setUp(self):
+        self.trip = self.make_trip(seats=20)
+        self.user = self.make_user()
+        # Load a reference block so no nextval lands in the measured queries
+        BookingReferenceService.generate()
+
+    def booking_queries(self, passengers):
+        passengers_data = [
+            {'first_name': f'Passager{index}', 'last_name': 'Kouassi'}
+            for index in range(passengers)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            booking, error = create_booking_with_passengers(
+                self.trip.id, self.user, passengers_data, self.user.email, '+2250707070707'
+            )
+        self.assertIsNone(error)
+        self.assertEqual(booking.passengers.count(), passengers)
+        # Transaction control (savepoints) is not part of the budget
+        return [
+            query['sql'] for query in queries.captured_queries
+            if not query['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT', 'BEGIN', 'COMMIT'))
+        ]
+
+    def test_single_passenger_budget(self):
+        self.assertEqual(len(self.booking_queries(1)), self.QUERY_BUDGET)
+
+    def test_budget_independent_of_passenger_count(self):
+        single = self.booking_queries(1)
+        group = self.booking_queries(8)
+        self.assertEqual(len(group), len(single))
+        self.assertEqual(len(group), self.QUERY_BUDGET)
+
+
+class SeatAutoAssignTests(BookingTestMixin, TestCase):
+    """Best block is held with claim_seats, fast enough for the booking path"""
+
+    # Average per call on a fragmented 60-seat map; the engine runs in tens
+    # of microseconds, the floor leaves room for slow CI machines
+    MAX_MICROSECONDS_PER_CALL = 500
+
+    def setUp(self):
+        self.trip = self.make_trip(seats=10)
+        generate_seats_for_trip(self.trip)
+        self.expiry = timezone.now() + timedelta(minutes=5)
+
+    def test_holds_a_same_row_block(self):
+        held = hold_best_seats(self.trip, 3, self.expiry)
+
+        self.assertEqual(held, ['1A', '1B', '1C'])
+        self.assertEqual(
+            Seat.objects.filter(trip=self.trip, is_available=False, reserved_until=self.expiry).count(), 3
+        )
+
+    def test_expired_hold_counts_as_free(self):
+        Seat.objects.filter(trip=self.trip).update(
+            is_available=False,
+            reserved_until=timezone.now() - timedelta(minutes=1)
+        )
+
+        self.assertEqual(len(hold_best_seats(self.trip, 2, self.expiry)), 2)
+
+    def test_block_lost_to_a_buyer_is_picked_again(self):
+        real_claim = seat_allocator.claim_seats
+        stolen = []
+
+        def buyer_first(trip_id, seat_numbers, **kwargs):
+            if not stolen:
+                stolen.extend(seat_numbers[:1])
+                real_claim(trip_id, stolen, reserved_until=self.expiry)
+            return real_claim(trip_id, seat_numbers, **kwargs)
+
+        with mock.patch.object(seat_allocator, 'claim_seats', side_effect=buyer_first):
+            held = hold_best_seats(self.trip, 2, self.expiry)
+
+        self.assertTrue(stolen)
+        self.assertEqual(len(held), 2)
+        self.assertNotIn(stolen[0], held)
+
+    def test_block_search_runs_in_microseconds(self):
+        positions = ['left_window', 'left_middle', 'left_aisle', 'right_aisle', 'right_window']
+        rng = random.Random(7)
+        free_seats = [
+            (f'{row}{letter}', row, position)
+            for row in range(1, 13)
+            for letter, position in zip('ABCDE', positions)
+            if rng.random() < 0.4
+        ]
+        calls = 1000
+
+        started = clock.perf_counter()
+        for index in range(calls):
+            find_best_seat_block(free_seats, index % 10 + 1, '3x2', prefer_window=True)
+        per_call = (clock.perf_counter() - started) / calls * 1_000_000
+
+        self.assertLess(per_call, self.MAX_MICROSECONDS_PER_CALL)
+
+
+class GroupSeatAllocationTests(BookingTestMixin, TestCase):
+    """Group legs get a block even when a lock-free buyer races them"""
+
+    def setUp(self):
+        self.trip = self.make_trip(seats=10)
+        generate_seats_for_trip(self.trip)
+        self.user = self.make_user()
+
+    def book(self, count):
+        return create_group_booking(
+            self.user,
+            [{
+                'trip_id': self.trip.id,
+                'passengers': [{'first_name': f'Fidèle{index}', 'last_name': 'Konan'} for index in range(count)]
+            }],
+            self.user.email,
+            '+2250707070707',
+            organization_name='Chorale Saint-Jean'
+        )
+
+    def test_expired_holds_count_as_free(self):
+        Seat.objects.filter(trip=self.trip).update(
+            is_available=False,
+            reserved_until=timezone.now() - timedelta(minutes=1)
+        )
+
+        group, error = self.book(3)
+
+        self.assertIsNone(error)
+        self.assertEqual(Seat.objects.filter(booking__group=group).count(), 3)
+
+    def test_block_lost_to_a_buyer_is_allocated_again(self):
+        real_claim = booking_utils.claim_seats
+        stolen = []
+
+        def buyer_first(trip_id, seat_numbers, **kwargs):
+            if not stolen:
+                stolen.extend(seat_numbers[:1])
+                real_claim(trip_id, stolen, reserved_until=timezone.now() + timedelta(minutes=5))
+            return real_claim(trip_id, seat_numbers, **kwargs)
+
+        with mock.patch.object(booking_utils, 'claim_seats', side_effect=buyer_first):
+            group, error = self.book(3)
+
+        self.assertIsNone(error)
+        self.assertTrue(stolen)
+        booking = group.bookings.get()
+        passenger_seats = sorted(booking.passengers.values_list('seat_number', flat=True))
+        self.assertNotIn(stolen[0], passenger_seats)
+        self.assertEqual(passenger_seats, sorted(booking.selected_seats))
+        self.assertEqual(
+            sorted(Seat.objects.filter(booking=booking).values_list('seat_number', flat=True)),
+            passenger_seats
+        )
+
+
+class TripCancelledDuringBookingTests(BookingTestMixin, TestCase):
+    """A trip cancelled after the bookable check takes no more seats"""
+
+    def test_cancelled_between_check_and_decrement(self):
+        trip = self.make_trip(seats=4)
+        user = self.make_user()
+        real_check = booking_services.check_seat_availability
+
+        def cancel_first(trip, requested_seats):
+            # The cancellation batch commits between the read and the UPDATE
+            Trip.objects.filter(pk=trip.pk).update(status='cancelled')
+            return real_check(trip, requested_seats)
+
+        with mock.patch.object(booking_services, 'check_seat_availability', side_effect=cancel_first):
+            booking, error = create_booking_with_passengers(
+                trip.id, user, [{'first_name': 'Awa', 'last_name': 'Kouassi'}], user.email, '+2250707070707'
+            )
+
+        self.assertIsNone(booking)
+        self.assertIsNotNone(error)
+        trip.refresh_from_db()
+        self.assertEqual(trip.available_seats, 4)
+        self.assertFalse(Booking.objects.filter(trip=trip).exists())
+
+
+class BookingReferenceTests(TestCase):
+    """References on the non-PostgreSQL fallback: unique, checksummed, fast"""
+
+    # The generator does ~50-100k references/s here; the floor is what the
+    # booking and bulk paths need, with room for slow CI machines
+    MIN_REFERENCES_PER_SECOND = 5000
+
+    def test_batch_and_single_references_are_unique(self):
+        source = ReferenceAllocator()
+        references = BookingReferenceService.generate(20000, source=source)
+        references += [BookingReferenceService.generate(source=source)[0] for _ in range(2000)]
+
+        self.assertEqual(len(set(references)), len(references))
+
+    def test_check_symbol_rejects_typos(self):
+        for reference in BookingReferenceService.generate(200, source=ReferenceAllocator()):
+            self.assertTrue(BookingReferenceService.is_valid(reference))
+            self.assertTrue(BookingReferenceService.is_valid(reference.lower()))
+
+            # Every single-symbol substitution in the code or check symbol
+            for index in range(len(reference) - 7, len(reference)):
+                for char in ALPHABET:
+                    if char != reference[index]:
+                        typo = reference[:index] + char + reference[index + 1:]
+                        self.assertFalse(BookingReferenceService.is_valid(typo), typo)
+
+        self.assertFalse(BookingReferenceService.is_valid('NVT-2026101-ABCDEF0'))
+        self.assertFalse(BookingReferenceService.is_valid('NVT-20261019-ABCDEFI'))
+        self.assertFalse(BookingReferenceService.is_valid('ABC-20261019-ABCDEF0'))
+
+    def test_throughput_floor(self):
+        source = ReferenceAllocator()
+        count = 20000
+
+        started = clock.perf_counter()
+        BookingReferenceService.generate(count, source=source)
+        for _ in range(count // 10):
+            BookingReferenceService.generate(source=source)
+        elapsed = clock.perf_counter() - started
+
+        self.assertGreater((count + count // 10) / elapsed, self.MIN_REFERENCES_PER_SECOND)
+
+
+class WaitlistPromotionTests(BookingTestMixin, TestCase):
+    """Seats given back by a cancellation reach the waitlist"""
+
+    def setUp(self):
+        self.trip = self.make_trip(seats=2)
+        generate_seats_for_trip(self.trip)
+        self.waiting = WaitlistEntry.objects.create(
+            trip=self.trip,
+            user=self.make_user('koffi'),
+            party_size=1,
+            contact_email='koffi@example.ci'
+        )
+
+    def fill_trip(self):
+        booking = self.make_booking(self.trip, self.make_user(), passengers=2)
+        claimed, _ = claim_seats(self.trip.id, ['1A', '1B'], booking=booking)
+        self.assertEqual(claimed, ['1A', '1B'])
+        Trip.objects.filter(pk=self.trip.pk).update(available_seats=0)
+        return booking
+
+    def test_cancel_then_promote(self):
+        booking = self.fill_trip()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cancelled, message = cancel_booking(booking)
+        self.assertTrue(cancelled, message)
+        self.assertFalse(Seat.objects.filter(booking=booking).exists())
+
+        run_pending_jobs('test')
+
+        self.waiting.refresh_from_db()
+        self.assertEqual(self.waiting.status, 'offered')
+        self.assertEqual(len(self.waiting.offered_seats), 1)
+        held = Seat.objects.get(trip=self.trip, seat_number=self.waiting.offered_seats[0])
+        self.assertFalse(held.is_available)
+        self.assertEqual(held.reserved_until, self.waiting.offer_expires_at)
+
+    def test_expired_hold_counts_as_free(self):
+        Seat.objects.filter(trip=self.trip).update(
+            is_available=False,
+            reserved_until=timezone.now() - timedelta(minutes=1)
+        )
+        Trip.objects.filter(pk=self.trip.pk).update(available_seats=1)
+
+        offered = promote_waitlist(self.trip.id)
+
+        self.assertEqual([entry.id for entry in offered], [self.waiting.id])
+        self.assertEqual(len(offered[0].offered_seats), 1)
+
+    def test_block_lost_to_a_buyer_is_picked_again(self):
+        real_claim = booking_utils.claim_seats
+        stolen = []
+
+        def buyer_first(trip_id, seat_numbers, **kwargs):
+            # A lock-free buyer takes the block between the read and the claim
+            if not stolen:
+                stolen.extend(seat_numbers)
+                real_claim(trip_id, seat_numbers, reserved_until=timezone.now() + timedelta(minutes=5))
+            return real_claim(trip_id, seat_numbers, **kwargs)
+
+        with mock.patch.object(booking_utils, 'claim_seats', side_effect=buyer_first):
+            offered = promote_waitlist(self.trip.id)
+
+        self.assertTrue(stolen)
+        self.assertEqual(len(offered), 1)
+        self.assertEqual(len(offered[0].offered_seats), 1)
+        self.assertNotIn(offered[0].offered_seats[0], stolen)
+
+    def test_accept_rolls_back_when_a_held_seat_was_taken(self):
+        offered = promote_waitlist(self.trip.id)
+        seat_number = offered[0].offered_seats[0]
+        other = self.make_booking(self.trip, self.make_user('yao'))
+        Seat.objects.filter(trip=self.trip, seat_number=seat_number).update(booking=other)
+
+        booking, error = accept_waitlist_offer(
+            self.waiting.id,
+            self.waiting.user,
+            [{'first_name': 'Koffi', 'last_name': 'Yao'}]
+        )
+
+        self.assertIsNone(booking)
+        self.assertIsNotNone(error)
+        self.assertEqual(Booking.objects.filter(user=self.waiting.user).count(), 0)
+        self.waiting.refresh_from_db()
+        self.assertEqual(self.waiting.status, 'offered')
+
+
+class SeatFeedTests(BookingTestMixin, TransactionTestCase):
+    """Seat feed queries run in the thread pool, on their own connections"""
+
+    def setUp(self):
+        self.trip = self.make_trip(seats=4)
+        generate_seats_for_trip(self.trip)
+        self.url = reverse('bookings:seat-map-changes', args=[self.trip.id])
+
+    async def test_full_map_then_delta(self):
+        response = await self.async_client.get(self.url, {'since': 0})
+        self.assertEqual(response.status_code, 200)
+        full = response.json()
+        self.assertTrue(full['reset'])
+        self.assertEqual(len(full['changes']), 4)
+
+        await sync_to_async(update_seats)(
+            Seat.objects.filter(trip=self.trip, seat_number='1A'), is_available=False
+        )
+
+        response = await self.async_client.get(self.url, {'since': full['latest'], 'wait': 5})
+        delta = response.json()
+        self.assertFalse(delta['reset'])
+        self.assertEqual([seat['seat_number'] for seat in delta['changes']], ['1A'])
+
+
+class IdempotencyLockTests(BookingTestMixin, TransactionTestCase):
+    """A slow first request keeps its key past the lock timeout"""
+
+    def test_running_request_refreshes_its_lock(self):
+        record = IdempotencyKey.objects.create(
+            user=self.make_user(),
+            key='retry-1',
+            scope='BookingCreateView',
+            request_hash='0' * 64,
+            expires_at=timezone.now() + timedelta(seconds=1)
+        )
+
+        with mock.patch.object(idempotency, 'IDEMPOTENCY_LOCK_REFRESH', timedelta(milliseconds=50)):
+            refresher = idempotency._LockRefresher(record)
+            refresher.start()
+            clock.sleep(0.3)
+            refresher.stop()
+
+        record.refresh_from_db()
+        self.assertGreater(record.expires_at, timezone.now() + timedelta(seconds=30))
+        self.assertFalse(refresher.is_alive())
 
-# Create your tests here.
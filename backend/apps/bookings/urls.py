@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import booking_views, ticket_views
+from .views import booking_views, ticket_views, boarding_views, waitlist_views
 
 app_name = 'bookings'
 
@@ -8,6 +8,11 @@ urlpatterns = [
     path('', booking_views.BookingListView.as_view(), name='list-bookings'),
     path('create/', booking_views.BookingCreateView.as_view(), name='create-booking'),
     path('stats/', booking_views.user_booking_stats, name='booking-stats'),
+    path('upcoming/', booking_views.UpcomingBookingsView.as_view(), name='upcoming-bookings'),
+    path('groups/create/', booking_views.GroupBookingCreateView.as_view(), name='create-group-booking'),
+    path('groups/<str:group_reference>/', booking_views.GroupBookingDetailView.as_view(), name='get-group-booking'),
+    path('calendar/feed/', ticket_views.calendar_feed_info, name='calendar-feed-info'),
+    path('calendar/feed/<str:token>.ics', ticket_views.calendar_feed, name='calendar-feed'),
     path('<str:booking_reference>/', booking_views.BookingDetailView.as_view(), name='get-booking'),
     path('<str:booking_reference>/cancel/', booking_views.cancel_booking_view, name='cancel-booking'),
     
@@ -28,16 +33,65 @@ urlpatterns = [
         booking_views.get_seat_map,
         name='get-seat-map'
     ),
+    path(
+        'trips/<int:trip_id>/seats/changes/',
+        booking_views.get_seat_map_changes,
+        name='seat-map-changes'
+    ),
+    path(
+        'trips/<int:trip_id>/seats/stream/',
+        booking_views.stream_seat_map_changes,
+        name='seat-map-stream'
+    ),
     path(
         'trips/<int:trip_id>/seats/regenerate/',
         booking_views.regenerate_trip_seats,
         name='regenerate-seats'
     ),
+    
+    # Boarding (QR scanners)
+    path(
+        'trips/<int:trip_id>/boarding/',
+        boarding_views.boarding_status,
+        name='boarding-status'
+    ),
+    path(
+        'trips/<int:trip_id>/boarding/scan/',
+        boarding_views.check_in_passenger,
+        name='boarding-scan'
+    ),
+    path(
+        'trips/<int:trip_id>/boarding/manifest/',
+        boarding_views.download_boarding_manifest,
+        name='boarding-manifest'
+    ),
+    path(
+        'trips/<int:trip_id>/boarding/check-ins/',
+        boarding_views.upload_boarding_checkins,
+        name='boarding-check-ins'
+    ),
+    
+    # Waitlist (full trips)
+    path(
+        'trips/<int:trip_id>/waitlist/',
+        waitlist_views.trip_waitlist,
+        name='trip-waitlist'
+    ),
+    path(
+        'trips/<int:trip_id>/waitlist/accept/',
+        waitlist_views.accept_waitlist_offer_view,
+        name='accept-waitlist-offer'
+    ),
     path(
         'seats/reserve/',
         booking_views.reserve_seats,
         name='reserve-seats'
     ),
+    path(
+        'seats/auto-assign/',
+        booking_views.auto_assign_seats,
+        name='auto-assign-seats'
+    ),
     path(
         'seats/release/',
         booking_views.release_seats,
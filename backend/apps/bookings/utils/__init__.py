@@ -4,10 +4,44 @@ from .seat_generator import (
     get_seat_availability_summary,
     SeatLayoutConfig
 )
+from .seat_feed import (
+    next_seat_version,
+    update_seats,
+    settled_version,
+    get_seat_changes,
+    has_seat_changes
+)
+from .seat_reservation import (
+    claim_seats,
+    claimable_seats,
+    lock_and_reserve_seats
+)
+from .seat_allocator import (
+    find_best_seat_block,
+    auto_assign_seats,
+    hold_best_seats
+)
+from .idempotency import (
+    IdempotencyMixin,
+    purge_expired_idempotency_keys
+)
 
 __all__ = [
     'generate_seats_for_trip',
     'release_expired_reservations', 
     'get_seat_availability_summary',
-    'SeatLayoutConfig'
+    'SeatLayoutConfig',
+    'find_best_seat_block',
+    'auto_assign_seats',
+    'hold_best_seats',
+    'next_seat_version',
+    'update_seats',
+    'settled_version',
+    'get_seat_changes',
+    'has_seat_changes',
+    'claim_seats',
+    'claimable_seats',
+    'lock_and_reserve_seats',
+    'IdempotencyMixin',
+    'purge_expired_idempotency_keys'
 ]
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Idempotency keys for retried POST requests.
+
+Clients send an `Idempotency-Key` header. The first request with a key runs
+normally and its response is stored per (user, key); retries get the stored
+response back without creating a second booking or Stripe session. While
+the first request runs its lock is refreshed, so a slow request (Stripe,
+database) never hands its key to a retry: retries get 409 until it ends.
+"""
+
+import hashlib
+import json
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from apps.bookings.models import IdempotencyKey
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENCY_KEY_TTL = getattr(settings, 'IDEMPOTENCY_KEY_TTL', timedelta(hours=24))
+IDEMPOTENCY_LOCK_TIMEOUT = timedelta(seconds=60)   # crashed request gives its key back
+IDEMPOTENCY_LOCK_REFRESH = timedelta(seconds=20)   # running request keeps its key
+
+
+def _request_hash(scope, data):
+    """Fingerprint of the endpoint and request body"""
+    body = json.dumps(data, cls=JSONEncoder, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(f"{scope}:{body}".encode()).hexdigest()
+
+
+def _acquire(user, key, scope, request_hash):
+    """
+    Insert the key as "in progress", or take over an expired one.
+
+    Returns:
+        tuple: (IdempotencyKey, acquired) - acquired is False when the key
+        already belongs to a live request or a stored response
+    """
+    now = timezone.now()
+    try:
+        record, created = IdempotencyKey.objects.get_or_create(
+            user=user,
+            key=key,
+            defaults={
+                'scope': scope,
+                'request_hash': request_hash,
+                'expires_at': now + IDEMPOTENCY_LOCK_TIMEOUT,
+            }
+        )
+    except IntegrityError:
+        record, created = IdempotencyKey.objects.get(user=user, key=key), False
+
+    if created:
+        return record, True
+
+    taken_over = IdempotencyKey.objects.filter(pk=record.pk, expires_at__lte=now).update(
+        scope=scope,
+        request_hash=request_hash,
+        response_status=None,
+        response_body=None,
+        expires_at=now + IDEMPOTENCY_LOCK_TIMEOUT
+    )
+    if taken_over:
+        record.refresh_from_db()
+        return record, True
+
+    return record, False
+
+
+class _LockRefresher(threading.Thread):
+    """Push the lock expiry of an in-progress key forward until stopped"""
+
+    def __init__(self, record):
+        super().__init__(daemon=True)
+        self.record = record
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(IDEMPOTENCY_LOCK_REFRESH.total_seconds()):
+                IdempotencyKey.objects.filter(pk=self.record.pk, response_status__isnull=True).update(
+                    expires_at=timezone.now() + IDEMPOTENCY_LOCK_TIMEOUT
+                )
+        finally:
+            # Only opened if a refresh actually ran
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def purge_expired_idempotency_keys():
+    """
+    Delete expired idempotency keys.
+
+    Returns:
+        int: Number of keys deleted
+    """
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+class IdempotencyMixin:
+    """
+    Make a POST endpoint idempotent per (user, Idempotency-Key).
+
+    Requests without the header behave exactly as before. Responses below
+    500 are stored and replayed; server errors release the key so the
+    client can retry for real.
+    """
+
+    idempotency_scope = None
+
+    def post(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or not request.user.is_authenticated:
+            return super().post(request, *args, **kwargs)
+
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response({
+                'success': False,
+                'message': f'{IDEMPOTENCY_HEADER} must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        scope = self.idempotency_scope or self.__class__.__name__
+        request_hash = _request_hash(scope, request.data)
+        record, acquired = _acquire(request.user, key, scope, request_hash)
+
+        if not acquired:
+            if record.request_hash != request_hash:
+                return Response({
+                    'success': False,
+                    'message': f'{IDEMPOTENCY_HEADER} was already used with a different request'
+                }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+            if not record.is_completed:
+                return Response({
+                    'success': False,
+                    'message': 'A request with this key is still being processed'
+                }, status=status.HTTP_409_CONFLICT)
+
+            response = Response(record.response_body, status=record.response_status)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+
+        refresher = _LockRefresher(record)
+        refresher.start()
+        try:
+            response = super().post(request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+        finally:
+            refresher.stop()
+
+        if response.status_code >= 500:
+            record.delete()
+            return response
+
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            response_status=response.status_code,
+            response_body=response.data,
+            expires_at=timezone.now() + IDEMPOTENCY_KEY_TTL
+        )
+        return response
@@ -0,0 +1,195 @@
+"""
+Best-available seat allocation for group bookings.
+Finds the tightest block of free seats for a party so families sit together.
+"""
+
+from functools import lru_cache
+
+from django.utils import timezone
+from apps.bookings.models import Seat
+from .seat_generator import SeatLayoutConfig
+from .seat_reservation import claim_seats, claimable_seats
+
+
+# Scoring weights (lower score = better block)
+AISLE_PENALTY = 3       # Block split by the aisle in the same row
+ROW_PENALTY = 4         # Each extra row the party is spread over
+MISALIGN_PENALTY = 1    # Per column of offset between stacked rows
+WINDOW_BONUS = 1        # Block touches a window (when requested)
+
+
+@lru_cache(maxsize=None)
+def _layout_columns(layout_code):
+    """Map seat positions to column indexes and locate the aisle"""
+    config = SeatLayoutConfig.get_config(layout_code)
+    positions = config['positions']
+    columns = {position: index for index, position in enumerate(positions)}
+    aisle = sum(1 for position in positions if position.startswith('left_'))
+    return columns, aisle, config['seats_per_row']
+
+
+@lru_cache(maxsize=None)
+def _row_runs(layout_code, size, prefer_window):
+    """
+    Precompute every contiguous run of `size` seats in one row.
+
+    Returns:
+        tuple: (penalty, start_column, bitmask) sorted best first
+    """
+    _, aisle, width = _layout_columns(layout_code)
+    runs = []
+    for start in range(width - size + 1):
+        end = start + size - 1
+        penalty = 0
+        if start < aisle <= end:
+            penalty += AISLE_PENALTY
+        if prefer_window and (start == 0 or end == width - 1):
+            penalty -= WINDOW_BONUS
+        runs.append((penalty, start, ((1 << size) - 1) << start))
+    runs.sort()
+    return tuple(runs)
+
+
+def _split_party(count, rows):
+    """Split a party as evenly as possible over consecutive rows (5 → [3, 2])"""
+    base, extra = divmod(count, rows)
+    return [base + 1] * extra + [base] * (rows - extra)
+
+
+def find_best_seat_block(free_seats, count, layout_code='3x2', prefer_window=False):
+    """
+    Pick the best block of `count` free seats.
+
+    Preference order comes from the score: same row on one side of the aisle,
+    then same row across the aisle, then stacked adjacent rows, front rows
+    first on ties. Falls back to the seats with the smallest row spread when
+    no contiguous block exists.
+
+    Args:
+        free_seats: Iterable of (seat_number, row, position) for free seats
+        count: Number of seats needed
+        layout_code: Trip seat layout ('3x2' or '2x2')
+        prefer_window: Favour blocks that include a window seat
+
+    Returns:
+        list: Seat numbers ordered by row/column, or None if not enough seats
+    """
+    if count < 1:
+        return None
+
+    columns, _, width = _layout_columns(layout_code)
+
+    grid = {}       # row -> bitmask of free columns
+    numbers = {}    # (row, column) -> seat number
+    for seat_number, row, position in free_seats:
+        column = columns.get(position)
+        if column is None:
+            continue
+        grid[row] = grid.get(row, 0) | (1 << column)
+        numbers[(row, column)] = seat_number
+
+    if len(numbers) < count:
+        return None
+
+    best_score = None
+    best_block = None
+    min_rows = -(-count // width)
+    max_rows = min(count, min_rows + 2, len(grid))
+
+    for span in range(min_rows, max_rows + 1):
+        # A longer span can never beat a block already found with fewer rows
+        if best_score is not None and (span - 1) * ROW_PENALTY - span * WINDOW_BONUS > best_score:
+            break
+
+        sizes = _split_party(count, span)
+        for first_row in grid:
+            score = (span - 1) * ROW_PENALTY
+            block = []
+            previous_start = None
+
+            for offset, size in enumerate(sizes):
+                row_mask = grid.get(first_row + offset, 0)
+                fit = None
+                for run in _row_runs(layout_code, size, prefer_window):
+                    if row_mask & run[2] == run[2]:
+                        fit = run
+                        break
+                if fit is None:
+                    block = None
+                    break
+
+                penalty, start, _ = fit
+                score += penalty
+                if previous_start is not None:
+                    score += MISALIGN_PENALTY * abs(start - previous_start)
+                previous_start = start
+                block.append((first_row + offset, start, size))
+
+            if block is None:
+                continue
+            if best_score is None or (score, first_row) < (best_score, best_block[0][0]):
+                best_score = score
+                best_block = block
+
+    if best_block is not None:
+        return [
+            numbers[(row, column)]
+            for row, start, size in best_block
+            for column in range(start, start + size)
+        ]
+
+    # No contiguous block: take the free seats with the smallest row spread
+    ordered = sorted(numbers)
+    best_start = min(
+        range(len(ordered) - count + 1),
+        key=lambda i: (ordered[i + count - 1][0] - ordered[i][0], i)
+    )
+    return [numbers[key] for key in ordered[best_start:best_start + count]]
+
+
+def _claimable_seat_map(trip):
+    """Free seats of a trip as claim_seats sees them (expired holds count as free)"""
+    return list(
+        Seat.objects.filter(claimable_seats(timezone.now()), trip=trip)
+        .values_list('seat_number', 'row', 'position')
+    )
+
+
+def auto_assign_seats(trip, count, prefer_window=False):
+    """
+    Find the best free seat block for a trip (no lock taken).
+
+    Args:
+        trip: Trip instance
+        count: Number of seats needed
+        prefer_window: Favour blocks that include a window seat
+
+    Returns:
+        list: Seat numbers, or None if the trip cannot seat the whole party
+    """
+    return find_best_seat_block(_claimable_seat_map(trip), count, trip.seat_layout, prefer_window)
+
+
+def hold_best_seats(trip, count, reserved_until, prefer_window=False):
+    """
+    Auto-assign and temporarily hold the best seat block for a trip.
+
+    The block is computed without a lock and taken with claim_seats. If a
+    concurrent buyer won part of it, the block is computed once more
+    without the lost seats.
+
+    Returns:
+        list: Held seat numbers, or None if not enough seats are free
+    """
+    free_seats = _claimable_seat_map(trip)
+    for _ in range(2):
+        seat_numbers = find_best_seat_block(free_seats, count, trip.seat_layout, prefer_window)
+        if not seat_numbers:
+            return None
+
+        claimed, lost = claim_seats(trip.id, seat_numbers, reserved_until=reserved_until)
+        if claimed:
+            return claimed
+        free_seats = [seat for seat in free_seats if seat[0] not in lost]
+
+    return None
@@ -0,0 +1,159 @@
+"""
+Seat map change feed.
+Every seat state change is stamped with a version taken from a database
+sequence, so clients can fetch only the seats that changed since the
+version they hold. Taking a version never locks anything: concurrent seat
+writes on the same trip don't queue behind each other.
+"""
+
+import threading
+import time
+from datetime import timedelta
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from apps.bookings.models import Seat
+
+
+SEAT_VERSION_SEQUENCE = 'bookings_seat_version_seq'
+
+# Sequence values are handed out in order but committed in any order: a
+# version is only used as a resume cursor once it is older than this (seat
+# writes are short transactions, well under half of it).
+SEAT_FEED_SETTLE = timedelta(seconds=5)
+
+_fallback_lock = threading.Lock()
+_fallback_last = 0
+
+
+def _fallback_version():
+    """Development databases (no sequence): strictly increasing microsecond clock"""
+    global _fallback_last
+    with _fallback_lock:
+        _fallback_last = max(time.time_ns() // 1000, _fallback_last + 1)
+        return _fallback_last
+
+
+def seat_version_sql():
+    """
+    SQL giving each updated row a fresh seat version
+    (UPDATE ... SET version = nextval(...), evaluated per row).
+
+    Returns:
+        tuple: (sql, params)
+    """
+    if connection.vendor == 'postgresql':
+        return f"nextval('{SEAT_VERSION_SEQUENCE}')", []
+    return '%s', [_fallback_version()]
+
+
+def seat_version():
+    """seat_version_sql() as an expression for QuerySet.update()"""
+    return RawSQL(*seat_version_sql())
+
+
+def next_seat_version():
+    """
+    Take one seat version.
+
+    Returns:
+        int: New seat version
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT nextval(%s)', [SEAT_VERSION_SEQUENCE])
+            return cursor.fetchone()[0]
+    return _fallback_version()
+
+
+def update_seats(seats, **fields):
+    """
+    Update seats and stamp each of them with a new seat version.
+
+    Args:
+        seats: Seat queryset
+        **fields: Field values to update
+
+    Returns:
+        int: Number of seats updated
+    """
+    # QuerySet.update() skips auto_now: updated_at dates the version
+    return seats.update(version=seat_version(), updated_at=timezone.now(), **fields)
+
+
+def settled_version(seats, since=0, now=None):
+    """
+    Resume cursor for a client that received `seats`: the highest version
+    such that every change up to it is committed. Changes stamped within
+    SEAT_FEED_SETTLE are sent but stay above the cursor, so a write that
+    took a lower version and commits late is not skipped (the client gets
+    the recent seats once more on its next call).
+
+    Args:
+        seats: Seat instances sent to the client
+        since: Version the client already held
+
+    Returns:
+        int: Resume cursor
+    """
+    settled_before = (now or timezone.now()) - SEAT_FEED_SETTLE
+    version = since
+    for seat in sorted(seats, key=lambda seat: seat.version):
+        if seat.updated_at >= settled_before:
+            break
+        version = seat.version
+    return version
+
+
+def get_seat_changes(trip_id, since):
+    """
+    Get seats changed after a given seat version.
+
+    When the seat map was regenerated after `since`, seats the client holds
+    may no longer exist: the whole map is returned with reset=True and the
+    client replaces its map instead of merging.
+
+    Args:
+        trip_id: Trip primary key
+        since: Last version known by the client (0 = full map)
+
+    Returns:
+        dict: {'reset', 'version' (resume cursor), 'latest' (highest
+            version sent), 'changes' (Seat list ordered by version)},
+            or None if the trip does not exist
+    """
+    from apps.transport.models import Trip
+
+    reset_version = Trip.objects.filter(id=trip_id).values_list('seat_map_reset_version', flat=True).first()
+    if reset_version is None:
+        return None
+
+    reset = since < reset_version
+    changes = Seat.objects.filter(trip_id=trip_id)
+    if not reset:
+        changes = changes.filter(version__gt=since)
+    changes = list(changes.order_by('version', 'row', 'position'))
+
+    start = 0 if reset else since
+    return {
+        'reset': reset,
+        'version': settled_version(changes, start),
+        'latest': max([since] + [seat.version for seat in changes]),
+        'changes': changes
+    }
+
+
+def has_seat_changes(trip_id, seen):
+    """
+    Cheap check for long-poll and streams: any seat change or regeneration
+    after version `seen`? Served by the (trip, version) index.
+
+    Returns:
+        bool
+    """
+    from apps.transport.models import Trip
+
+    return (
+        Seat.objects.filter(trip_id=trip_id, version__gt=seen).exists()
+        or Trip.objects.filter(id=trip_id, seat_map_reset_version__gt=seen).exists()
+    )
@@ -5,6 +5,7 @@ Handles automatic seat layout generation based on bus configuration.
 
 from django.db import transaction
 from apps.bookings.models import Seat
+from .seat_feed import next_seat_version, update_seats
 
 
 class SeatLayoutConfig:
@@ -81,12 +82,23 @@ def generate_seats_for_trip(trip):
             seat_count += 1
     
     # Bulk create for performance
+    from apps.transport.models import Trip
+    
     with transaction.atomic():
+        # Stamp the new layout so change-feed clients receive every seat
+        version = next_seat_version()
+        for seat in seats_to_create:
+            seat.version = version
+        
         # Clear existing seats first
         Seat.objects.filter(trip=trip).delete()
         
         # Create all seats in one query
         created_seats = Seat.objects.bulk_create(seats_to_create)
+        
+        # Deleted seats never show up as changes: clients holding an older
+        # version reload the whole map
+        Trip.objects.filter(pk=trip.pk).update(seat_map_reset_version=version)
     
     return created_seats
 
@@ -107,11 +119,18 @@ def release_expired_reservations():
         is_available=False
     )
     
-    count = expired_seats.update(
-        is_available=True,
-        reserved_until=None,
-        passenger_name=None
-    )
+    from apps.bookings.services.waitlist_service import notify_seats_released
+    
+    count = 0
+    trip_ids = set(expired_seats.values_list('trip_id', flat=True).distinct())
+    for trip_id in trip_ids:
+        count += update_seats(
+            expired_seats.filter(trip_id=trip_id),
+            is_available=True,
+            reserved_until=None,
+            passenger_name=None
+        )
+        notify_seats_released(trip_id)
     
     return count
 
@@ -0,0 +1,122 @@
+"""
+Seat reservation strategies.
+
+- claim_seats: optimistic path, one conditional UPDATE ... RETURNING claims
+  only the seats that are still free (or whose hold expired). No row is
+  locked beforehand and nothing else is touched (no trip row).
+- lock_and_reserve_seats: pessimistic path, locks the requested rows first.
+  Kept for comparison (see the bench_seat_reservation command).
+"""
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from apps.bookings.models import Seat
+from .seat_feed import seat_version_sql, update_seats
+
+
+def claimable_seats(now):
+    """
+    Seats that are free, or temporarily held with an expired hold
+    (ORM form of the claim_seats WHERE clause)
+    """
+    return Q(is_available=True) | Q(booking__isnull=True, reserved_until__lt=now)
+
+
+def _db_datetime(value):
+    return Seat._meta.get_field('reserved_until').get_db_prep_value(value, connection)
+
+
+def _claim_sql(seat_count):
+    """UPDATE claiming the claimable seats among `seat_count` numbers of a trip"""
+    quote = connection.ops.quote_name
+    version_sql, version_params = seat_version_sql()
+    placeholders = ', '.join(['%s'] * seat_count)
+    sql = (
+        f"UPDATE {quote(Seat._meta.db_table)} "
+        f"SET is_available = %s, reserved_until = %s, booking_id = %s, passenger_name = NULL, "
+        f"version = {version_sql}, updated_at = %s "
+        f"WHERE trip_id = %s AND seat_number IN ({placeholders}) "
+        # Same predicate as claimable_seats()
+        f"AND (is_available = %s OR (booking_id IS NULL AND reserved_until < %s)) "
+        f"RETURNING seat_number"
+    )
+    return sql, version_params
+
+
+def claim_seats(trip_id, seat_numbers, reserved_until=None, booking=None, all_or_nothing=True):
+    """
+    Claim seats with a single conditional UPDATE ... RETURNING.
+
+    Concurrent buyers never wait on each other beyond the seat rows they
+    both want: whoever's UPDATE lands first wins, the others simply match
+    fewer rows. RETURNING tells each caller which seats it won.
+
+    Args:
+        trip_id: Trip primary key
+        seat_numbers: Seat numbers to claim
+        reserved_until: Hold expiry (temporary reservation)
+        booking: Booking to assign the seats to (permanent claim)
+        all_or_nothing: Roll back the whole claim if any seat was lost
+
+    Returns:
+        tuple: (claimed seat numbers, lost seat numbers)
+    """
+    seat_numbers = list(seat_numbers)
+    if not seat_numbers:
+        return [], []
+
+    # Raw SQL: adapt datetimes the way the ORM stores them
+    now = _db_datetime(timezone.now())
+    sql, version_params = _claim_sql(len(seat_numbers))
+    params = (
+        [False, _db_datetime(reserved_until), booking.pk if booking else None]
+        + version_params
+        + [now, trip_id]
+        + seat_numbers
+        + [True, now]
+    )
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            won = {row[0] for row in cursor.fetchall()}
+
+        if len(won) == len(seat_numbers):
+            return seat_numbers, []
+
+        # Lost the race (or unknown seats)
+        claimed = [number for number in seat_numbers if number in won]
+        lost = [number for number in seat_numbers if number not in won]
+
+        if all_or_nothing:
+            transaction.set_rollback(True)
+            return [], lost
+
+        return claimed, lost
+
+
+@transaction.atomic
+def lock_and_reserve_seats(trip_id, seat_numbers, reserved_until):
+    """
+    Reserve seats by locking the requested rows first (pessimistic path).
+
+    Args:
+        trip_id: Trip primary key
+        seat_numbers: Seat numbers to reserve
+        reserved_until: Hold expiry
+
+    Returns:
+        tuple: (reserved seat numbers, unavailable seat numbers)
+    """
+    seats = Seat.objects.select_for_update().filter(
+        trip_id=trip_id,
+        seat_number__in=seat_numbers
+    )
+
+    unavailable = seats.filter(is_available=False)
+    if unavailable.exists():
+        return [], list(unavailable.values_list('seat_number', flat=True))
+
+    update_seats(seats, is_available=False, reserved_until=reserved_until)
+    return list(seat_numbers), []
@@ -0,0 +1,171 @@
+# Backend/apps/bookings/views/boarding_views.py
+
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django.http import HttpResponse, HttpResponseNotModified
+from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
+from apps.transport.models import Trip
+from ..serializers import BoardingUploadSerializer, BoardingCheckInSerializer
+from ..services.boarding_service import build_boarding_manifest, apply_boarding_scans, get_boarding_counts
+
+
+def _get_trip_for_boarding(request, trip_id):
+    """
+    Trip the user may board passengers on (platform staff or the
+    operating company's users)
+
+    Returns:
+        tuple: (trip, error response)
+    """
+    trip = get_object_or_404(Trip.objects.select_related('route'), id=trip_id)
+    user = request.user
+
+    if user.is_staff or user.is_superuser:
+        return trip, None
+
+    company_id = getattr(user, 'company_id', None)
+    if not company_id or company_id != trip.route.bus_company_id:
+        return None, Response(
+            {'success': False, 'message': 'Not authorized to board this trip'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    return trip, None
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_boarding_manifest(request, trip_id):
+    """
+    Signed offline boarding manifest for scanner devices
+
+    GET /api/v1/bookings/trips/{trip_id}/boarding/manifest/
+    Body: gzipped JSON, signature in X-Manifest-Signature (HMAC-SHA256)
+    Supports If-None-Match (304)
+    """
+    trip, error = _get_trip_for_boarding(request, trip_id)
+    if error:
+        return error
+
+    content, signature, passenger_count = build_boarding_manifest(trip)
+
+    # The manifest is deterministic, so its signature identifies the version
+    etag = f'"{signature[:32]}"'
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and etag in parse_etags(if_none_match):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    response = HttpResponse(content, content_type='application/gzip')
+    response['Content-Disposition'] = f'attachment; filename="boarding_trip_{trip.id}.json.gz"'
+    response['X-Manifest-Signature'] = f'sha256={signature}'
+    response['X-Manifest-Passengers'] = str(passenger_count)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def upload_boarding_checkins(request, trip_id):
+    """
+    Apply a batch of check-ins (offline uploads, queued scans), in one transaction
+
+    POST /api/v1/bookings/trips/{trip_id}/boarding/check-ins/
+    Body: {
+        "device_id": "gare-adjame-01",
+        "scans": [{"token": "NT:...", "scanned_at": "..."},
+                  {"booking_reference": "...", "verification_hash": "...",
+                   "passenger_ids": [1, 2], "scanned_at": "..."}]
+    }
+    """
+    trip, error = _get_trip_for_boarding(request, trip_id)
+    if error:
+        return error
+
+    serializer = BoardingUploadSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'message': 'Invalid check-in upload',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    results, summary = apply_boarding_scans(
+        trip,
+        serializer.validated_data['scans'],
+        serializer.validated_data['device_id']
+    )
+
+    return Response({
+        'success': True,
+        'message': f"{summary['passengers_boarded']} passenger(s) boarded",
+        'data': {
+            'summary': summary,
+            'results': results,
+        }
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def check_in_passenger(request, trip_id):
+    """
+    Check in one scanned ticket, first scan wins
+
+    POST /api/v1/bookings/trips/{trip_id}/boarding/scan/
+    Body: {"device_id": "gare-adjame-01", "token": "NT:..."}
+    Returns the scan result with live boarded/remaining counts
+    """
+    trip, error = _get_trip_for_boarding(request, trip_id)
+    if error:
+        return error
+
+    serializer = BoardingCheckInSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'message': 'Invalid scan',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    scan = dict(serializer.validated_data)
+    device_id = scan.pop('device_id')
+    results, summary = apply_boarding_scans(trip, [scan], device_id)
+    result = results[0]
+
+    messages = {
+        'boarded': 'Passenger boarded',
+        'already_boarded': 'Ticket already scanned',
+        'invalid': result.get('error', 'Invalid ticket'),
+    }
+    return Response({
+        'success': result['status'] == 'boarded',
+        'message': messages[result['status']],
+        'data': {
+            'result': result,
+            'counts': summary['counts'],
+        }
+    }, status=status.HTTP_400_BAD_REQUEST if result['status'] == 'invalid' else status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def boarding_status(request, trip_id):
+    """
+    Live boarding counts of a trip
+
+    GET /api/v1/bookings/trips/{trip_id}/boarding/
+    """
+    trip, error = _get_trip_for_boarding(request, trip_id)
+    if error:
+        return error
+
+    return Response({
+        'success': True,
+        'data': get_boarding_counts(trip.id)
+    }, status=status.HTTP_200_OK)
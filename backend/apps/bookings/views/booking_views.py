@@ -6,33 +6,61 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db import transaction  # ← Add this import
-from ..models import Booking, Seat
+from django.db import close_old_connections, transaction  # ← Add this import
+from django.db.models import Prefetch
+from ..models import Booking, BookingGroup, Seat
 from ..serializers import (
     BookingCreateSerializer,
+    GroupBookingCreateSerializer,
+    BookingGroupSerializer,
     BookingListSerializer,
     BookingDetailSerializer,
     BookingCancelSerializer,
     SeatMapSerializer,
     SeatReservationSerializer,
-    SeatReleaseSerializer
+    SeatReleaseSerializer,
+    SeatAutoAssignSerializer,
+    SeatChangeSerializer
 )
 
 from ..utils import (
     generate_seats_for_trip,
     release_expired_reservations,
-    get_seat_availability_summary
+    get_seat_availability_summary,
+    hold_best_seats,
+    update_seats,
+    settled_version,
+    get_seat_changes,
+    has_seat_changes,
+    claim_seats,
+    IdempotencyMixin
 )
 from ..services.booking_services import cancel_booking
+from ..services.stats_service import get_user_stats
+from ..pagination import BookingCursorPagination
 from apps.transport.models import Trip
 from datetime import timedelta
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from asgiref.sync import sync_to_async
+import asyncio
+import json
+import time
 
 
+# Seat map change feed
+SEAT_FEED_POLL_INTERVAL = 1       # seconds between version checks
+SEAT_FEED_MAX_WAIT = 25           # long-poll ceiling (below typical proxy timeouts)
+SEAT_FEED_STREAM_DURATION = 60    # SSE connection lifetime before client reconnects
 
 
-class BookingCreateView(generics.CreateAPIView):
+
+
+class BookingCreateView(IdempotencyMixin, generics.CreateAPIView):
     serializer_class = BookingCreateSerializer
     permission_classes = [IsAuthenticated]
+    idempotency_scope = 'booking_create'
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -47,20 +75,59 @@ class BookingCreateView(generics.CreateAPIView):
 
 
 class BookingListView(generics.ListAPIView):
+    """
+    Booking history, cursor-paginated
+    
+    GET /api/v1/bookings/?status=confirmed&ordering=-created_at&cursor=...
+    """
     serializer_class = BookingListSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = BookingCursorPagination
     
     def get_queryset(self):
         queryset = Booking.objects.filter(user=self.request.user)
         booking_status = self.request.query_params.get('status')
         if booking_status:
             queryset = queryset.filter(booking_status=booking_status)
-        ordering = self.request.query_params.get('ordering', '-created_at')
-        queryset = queryset.order_by(ordering)
         return queryset.select_related('trip', 'trip__route', 'trip__route__origin_city', 
                                       'trip__route__destination_city', 'trip__route__bus_company')
 
 
+class UpcomingBookingsView(generics.ListAPIView):
+    """
+    Next trips of the user (app home screen), soonest first
+    
+    GET /api/v1/bookings/upcoming/?limit=5
+    Reads the (user, departure_at) index: cost does not grow with history
+    """
+    serializer_class = BookingListSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+    
+    DEFAULT_LIMIT = 5
+    MAX_LIMIT = 20
+    
+    def get_queryset(self):
+        try:
+            limit = int(self.request.query_params.get('limit', self.DEFAULT_LIMIT))
+        except ValueError:
+            limit = self.DEFAULT_LIMIT
+        limit = min(max(limit, 1), self.MAX_LIMIT)
+        
+        return Booking.objects.filter(
+            user=self.request.user,
+            departure_at__gte=timezone.now(),
+            booking_status__in=['pending', 'confirmed']
+        ).select_related(
+            'trip', 'trip__route', 'trip__route__origin_city',
+            'trip__route__destination_city', 'trip__route__bus_company'
+        ).order_by('departure_at', 'id')[:limit]
+    
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_queryset(), many=True)
+        return Response({'success': True, 'data': serializer.data})
+
+
 class BookingDetailView(generics.RetrieveAPIView):
     serializer_class = BookingDetailSerializer
     permission_classes = [IsAuthenticated]
@@ -73,6 +140,54 @@ class BookingDetailView(generics.RetrieveAPIView):
         ).prefetch_related('passengers')
 
 
+def _group_queryset(user):
+    """Groups of a user with their bookings and trips (2 queries)"""
+    return BookingGroup.objects.filter(user=user).prefetch_related(
+        Prefetch('bookings', queryset=Booking.objects.select_related(
+            'trip__route__origin_city',
+            'trip__route__destination_city',
+            'trip__route__bus_company'
+        ).order_by('departure_at', 'id'))
+    )
+
+
+class GroupBookingCreateView(IdempotencyMixin, generics.CreateAPIView):
+    """
+    Group/corporate booking over one or more trips, paid with one payment
+    
+    POST /api/v1/bookings/groups/create/
+    Body: { "contact_email", "contact_phone", "organization_name",
+            "trips": [{ "trip_id", "passengers": [...], "prefer_window" }] }
+    """
+    serializer_class = GroupBookingCreateSerializer
+    permission_classes = [IsAuthenticated]
+    idempotency_scope = 'group_booking_create'
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        group = serializer.save()
+        group = _group_queryset(request.user).get(pk=group.pk)
+        return Response({
+            'success': True,
+            'message': 'Group booking created successfully',
+            'data': BookingGroupSerializer(group).data
+        }, status=status.HTTP_201_CREATED)
+
+
+class GroupBookingDetailView(generics.RetrieveAPIView):
+    """GET /api/v1/bookings/groups/<group_reference>/"""
+    serializer_class = BookingGroupSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'group_reference'
+    
+    def get_queryset(self):
+        return _group_queryset(self.request.user)
+    
+    def retrieve(self, request, *args, **kwargs):
+        return Response({'success': True, 'data': self.get_serializer(self.get_object()).data})
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def cancel_booking_view(request, booking_reference):
@@ -97,15 +212,15 @@ def cancel_booking_view(request, booking_reference):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_booking_stats(request):
-    user = request.user
-    bookings = Booking.objects.filter(user=user)
+    # One row, kept up to date on booking/payment changes
+    user_stats = get_user_stats(request.user)
     stats = {
-        'total_bookings': bookings.count(),
-        'pending': bookings.filter(booking_status='pending').count(),
-        'confirmed': bookings.filter(booking_status='confirmed').count(),
-        'cancelled': bookings.filter(booking_status='cancelled').count(),
-        'completed': bookings.filter(booking_status='completed').count(),
-        'total_spent': sum(b.total_amount for b in bookings.filter(payment_status='paid'))
+        'total_bookings': user_stats.total_bookings,
+        'pending': user_stats.pending_bookings,
+        'confirmed': user_stats.confirmed_bookings,
+        'cancelled': user_stats.cancelled_bookings,
+        'completed': user_stats.completed_bookings,
+        'total_spent': user_stats.total_spent
     }
     return Response({'success': True, 'data': stats})
 
@@ -135,33 +250,164 @@ def get_seat_map(request, trip_id):
     # Release expired reservations before showing map
     release_expired_reservations()
     
+    seats = list(trip.seats.all())
+    
     # Get availability summary
     summary = get_seat_availability_summary(trip)
     
     # Prepare response data
     data = {
         'trip_id': trip.id,
+        'version': settled_version(seats),
         'seat_layout': trip.seat_layout,
         'total_seats': summary['total'],
         'available_seats': summary['available'],
         'booked_seats': summary['booked'],
         'reserved_seats': summary['reserved'],
         'occupancy_rate': summary['occupancy_rate'],
-        'seats': trip.seats.all()
+        'seats': seats
     }
     
     serializer = SeatMapSerializer(data)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+def _seat_changes_payload(trip_id, since):
+    """Build the delta payload for seats changed after `since` (None if no trip)"""
+    feed = get_seat_changes(trip_id, since)
+    if feed is None:
+        return None
+    return {
+        'trip_id': trip_id,
+        'since': since,
+        'version': feed['version'],
+        'latest': feed['latest'],
+        'reset': feed['reset'],
+        'changes': SeatChangeSerializer(feed['changes'], many=True).data
+    }
+
+
+def _feed_query(function):
+    """
+    Run a seat feed query in the thread pool (thread_sensitive=False), so
+    concurrent feeds don't queue on the single shared sync thread. Each pool
+    thread keeps its own connection, recycled after CONN_MAX_AGE.
+    """
+    def run(*args):
+        close_old_connections()
+        return function(*args)
+    return sync_to_async(run, thread_sensitive=False)
+
+
+async def _wait_for_seat_changes(trip_id, seen, deadline):
+    """
+    Sleep until a seat changes after version `seen` or the deadline passes.
+    The coroutine holds no worker thread while sleeping and each check is
+    one short indexed query.
+    """
+    while time.monotonic() < deadline:
+        if await _feed_query(has_seat_changes)(trip_id, seen):
+            return True
+        await asyncio.sleep(min(SEAT_FEED_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+    return False
+
+
+@require_GET
+async def get_seat_map_changes(request, trip_id):
+    """
+    Get seats changed since a seat version.
+    Replaces full seat map polling during checkout.
+    
+    GET /api/bookings/trips/{trip_id}/seats/changes/?since=42&seen=45&wait=20
+    
+    - since: resume cursor (`version` of the last response, 0 = full map)
+    - seen: highest version already received (`latest`), the long-poll
+      waits for changes past it (default: since)
+    - wait: optional long-poll, seconds to wait for a change (max 25)
+    
+    reset=true means the seat map was regenerated: replace the whole map.
+    Async view: under the ASGI server (see navticket/asgi.py) a waiting
+    client holds no worker thread and no database connection of its own.
+    """
+    
+    try:
+        since = max(int(request.GET.get('since', 0)), 0)
+        seen = max(int(request.GET.get('seen', since)), since)
+        wait = min(max(int(request.GET.get('wait', 0)), 0), SEAT_FEED_MAX_WAIT)
+    except ValueError:
+        return JsonResponse({'error': 'since, seen and wait must be integers'}, status=400)
+    
+    if wait and not await _feed_query(has_seat_changes)(trip_id, seen):
+        await _wait_for_seat_changes(trip_id, seen, time.monotonic() + wait)
+    
+    payload = await _feed_query(_seat_changes_payload)(trip_id, since)
+    if payload is None:
+        return JsonResponse({'error': 'Trip not found'}, status=404)
+    
+    return JsonResponse(payload, encoder=DjangoJSONEncoder)
+
+
+@require_GET
+async def stream_seat_map_changes(request, trip_id):
+    """
+    Server-sent events stream of seat changes for browsers (EventSource).
+    Each event id is the resume cursor, so reconnecting clients resume
+    from the Last-Event-ID header automatically.
+    
+    GET /api/bookings/trips/{trip_id}/seats/stream/?since=42
+    
+    Async view: under the ASGI server (see navticket/asgi.py) an open
+    stream holds no worker thread.
+    """
+    
+    try:
+        since = max(int(request.headers.get('Last-Event-ID') or request.GET.get('since', 0)), 0)
+    except ValueError:
+        return JsonResponse({'error': 'since must be an integer'}, status=400)
+    
+    payload = await _feed_query(_seat_changes_payload)(trip_id, since)
+    if payload is None:
+        return JsonResponse({'error': 'Trip not found'}, status=404)
+    
+    async def event_stream(payload):
+        deadline = time.monotonic() + SEAT_FEED_STREAM_DURATION
+        
+        # Tell EventSource how long to wait before reconnecting
+        yield f"retry: {int(SEAT_FEED_POLL_INTERVAL * 1000)}\n\n"
+        
+        seen = since
+        while True:
+            if payload['latest'] > seen or payload['reset']:
+                seen = payload['latest']
+                yield f"id: {payload['version']}\nevent: seats\ndata: {json.dumps(payload, cls=DjangoJSONEncoder)}\n\n"
+            
+            if not await _wait_for_seat_changes(trip_id, seen, min(time.monotonic() + 15, deadline)):
+                if time.monotonic() >= deadline:
+                    break
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            payload = await _feed_query(_seat_changes_payload)(trip_id, payload['version'])
+            if payload is None:
+                break
+    
+    response = StreamingHttpResponse(event_stream(payload), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@transaction.atomic  # ← Add this decorator
 def reserve_seats(request):
     """
     Temporarily reserve seats for 5 minutes.
     Prevents double-booking during checkout.
     
+    Uses an optimistic claim (one conditional UPDATE, no row locks), so
+    buyers of a popular departure don't queue behind each other. Seats whose
+    hold has expired are claimable directly.
+    
     POST /api/bookings/seats/reserve/
     Body: {
         "trip_id": 1,
@@ -180,19 +426,15 @@ def reserve_seats(request):
     trip = serializer.validated_data['trip']
     seat_numbers = serializer.validated_data['seat_numbers']
     
-    # Release expired reservations first
-    release_expired_reservations()
-    
-    # Get requested seats with lock (now inside transaction)
-    seats = Seat.objects.select_for_update().filter(
-        trip=trip,
-        seat_number__in=seat_numbers
+    # Reserve seats for 5 minutes (all or nothing)
+    reservation_expiry = timezone.now() + timedelta(minutes=5)
+    reserved, unavailable_list = claim_seats(
+        trip.id,
+        seat_numbers,
+        reserved_until=reservation_expiry
     )
     
-    # Check availability
-    unavailable = seats.filter(is_available=False)
-    if unavailable.exists():
-        unavailable_list = list(unavailable.values_list('seat_number', flat=True))
+    if unavailable_list:
         return Response(
             {
                 'error': 'Some seats are already taken or reserved',
@@ -201,16 +443,65 @@ def reserve_seats(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Reserve seats for 5 minutes
+    return Response(
+        {
+            'message': 'Seats reserved successfully',
+            'reserved_seats': reserved,
+            'reserved_until': reservation_expiry,
+            'expires_in_seconds': 300
+        },
+        status=status.HTTP_200_OK
+    )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def auto_assign_seats(request):
+    """
+    Pick the best contiguous seat block for a party and hold it for 5 minutes.
+    Same row first, then adjacent rows, optionally favouring window seats.
+    
+    POST /api/bookings/seats/auto-assign/
+    Body: {
+        "trip_id": 1,
+        "count": 4,
+        "prefer_window": true
+    }
+    """
+    
+    serializer = SeatAutoAssignSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response(
+            serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    trip = serializer.validated_data['trip']
+    count = serializer.validated_data['count']
+    
+    # Generate seats if none exist
+    if not trip.seats.exists():
+        generate_seats_for_trip(trip)
+    
+    # Expired holds count as free seats: no global release needed here
     reservation_expiry = timezone.now() + timedelta(minutes=5)
-    seats.update(
-        is_available=False,
-        reserved_until=reservation_expiry
+    seat_numbers = hold_best_seats(
+        trip,
+        count,
+        reservation_expiry,
+        prefer_window=serializer.validated_data['prefer_window']
     )
     
+    if not seat_numbers:
+        return Response(
+            {'error': f'Not enough free seats for {count} passengers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
     return Response(
         {
-            'message': 'Seats reserved successfully',
+            'message': 'Seats assigned and reserved successfully',
             'reserved_seats': seat_numbers,
             'reserved_until': reservation_expiry,
             'expires_in_seconds': 300
@@ -246,12 +537,14 @@ def release_seats(request):
     seat_numbers = serializer.validated_data['seat_numbers']
     
     # Only release seats that are reserved (not permanently booked)
-    released = Seat.objects.filter(
+    seats = Seat.objects.filter(
         trip_id=trip_id,
         seat_number__in=seat_numbers,
         booking__isnull=True,  # Not permanently booked
         is_available=False
-    ).update(
+    )
+    released = update_seats(
+        seats,
         is_available=True,
         reserved_until=None,
         passenger_name=None
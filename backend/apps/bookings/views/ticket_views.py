@@ -1,48 +1,154 @@
 # Backend/apps/bookings/views/ticket_views.py
 
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from django.http import FileResponse, HttpResponse
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
 from django.shortcuts import get_object_or_404
-from apps.bookings.models import Booking
+from django.urls import reverse
+from django.utils.http import parse_etags
+from apps.bookings.models import Booking, CalendarFeed
 from apps.bookings.services.ticket_service import TicketService
+from apps.bookings.services.ticket_artifacts import ArtifactBundle, TicketArtifacts
 from apps.bookings.services.calendar_service import CalendarService
-from apps.bookings.services.emails_service import EmailService
-from apps.bookings.services.qr_service import QRCodeService
+from apps.bookings.services.calendar_feed_service import feed_etag, get_feed
+import re
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def download_ticket(request, booking_reference):
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _parse_range(range_header, size):
     """
-    Download PDF ticket for a booking
-    
-    GET /api/v1/bookings/{booking_reference}/ticket/download/
+    Parse a single-range Range header.
+
+    Returns:
+        tuple: (start, end) inclusive, None to serve the whole file
+        (absent, malformed or multi-range), or False if unsatisfiable
     """
-    booking = get_object_or_404(Booking, booking_reference=booking_reference)
+    match = RANGE_RE.match(range_header.strip()) if range_header else None
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _cached_file_response(request, name, etag, content_type, disposition):
+    """
+    Serve a stored file with ETag revalidation and byte-range support
+    """
+    quoted_etag = f'"{etag}"'
+    
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and (if_none_match.strip() == '*' or quoted_etag in parse_etags(if_none_match)):
+        response = HttpResponseNotModified()
+        response['ETag'] = quoted_etag
+        return response
+    
+    size = default_storage.size(name)
+    byte_range = _parse_range(request.headers.get('Range'), size)
+    
+    # If-Range: only honour the range if the client still has this version
+    if_range = request.headers.get('If-Range')
+    if byte_range and if_range and if_range.strip() != quoted_etag:
+        byte_range = None
+    
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif byte_range:
+        start, end = byte_range
+        with default_storage.open(name, 'rb') as stored_file:
+            stored_file.seek(start)
+            content = stored_file.read(end - start + 1)
+        response = HttpResponse(content, status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    else:
+        response = FileResponse(default_storage.open(name, 'rb'), content_type=content_type)
     
+    response['ETag'] = quoted_etag
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'private, no-cache'
+    response['Content-Disposition'] = disposition
+    return response
+
+
+def _get_booking(booking_reference):
+    """Booking with everything its artifacts need, in two queries"""
+    return get_object_or_404(
+        Booking.objects.select_related(
+            'trip__route__origin_city',
+            'trip__route__destination_city',
+            'trip__route__bus_company'
+        ).prefetch_related('passengers'),
+        booking_reference=booking_reference
+    )
+
+
+def _check_access(request, booking, action):
+    """
+    Ownership and status checks shared by the ticket views
+
+    Returns:
+        Response: Error response, or None if access is allowed
+    """
     # Check ownership (travelers only see their bookings)
     if hasattr(request.user, 'traveler'):
         if booking.user != request.user:
             return Response({'error': 'Not authorized'}, status=403)
     
     # Check booking is confirmed
-    if booking.status != 'confirmed':
+    if booking.booking_status != 'confirmed':
         return Response(
-            {'error': f'Cannot download ticket. Booking status is {booking.status}'}, 
+            {'error': f'Cannot {action}. Booking status is {booking.booking_status}'}, 
             status=400
         )
     
-    # Generate PDF
-    pdf_buffer = TicketService.generate_ticket_pdf(booking)
-    filename = TicketService.get_ticket_filename(booking)
+    return None
+
+
+def _artifact_response(request, booking, kind, disposition):
+    """Serve one artifact of the booking's bundle"""
+    bundle = TicketArtifacts.get_bundle(booking)
+    return _cached_file_response(
+        request,
+        bundle.name(kind),
+        bundle.fingerprint,
+        ArtifactBundle.CONTENT_TYPES[kind],
+        disposition
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_ticket(request, booking_reference):
+    """
+    Download PDF ticket for a booking
     
-    # Return as file response
-    response = FileResponse(pdf_buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    GET /api/v1/bookings/{booking_reference}/ticket/download/
+    Supports If-None-Match (304) and Range (206) requests
+    """
+    booking = _get_booking(booking_reference)
     
-    return response
+    error = _check_access(request, booking, 'download ticket')
+    if error:
+        return error
+    
+    filename = TicketService.get_ticket_filename(booking)
+    return _artifact_response(request, booking, 'pdf', f'attachment; filename="{filename}"')
 
 
 @api_view(['GET'])
@@ -53,29 +159,14 @@ def download_calendar(request, booking_reference):
     
     GET /api/v1/bookings/{booking_reference}/calendar/download/
     """
-    booking = get_object_or_404(Booking, booking_reference=booking_reference)
-    
-    # Check ownership
-    if hasattr(request.user, 'traveler'):
-        if booking.user != request.user:
-            return Response({'error': 'Not authorized'}, status=403)
+    booking = _get_booking(booking_reference)
     
-    # Check booking is confirmed
-    if booking.status != 'confirmed':
-        return Response(
-            {'error': f'Cannot download calendar. Booking status is {booking.status}'}, 
-            status=400
-        )
+    error = _check_access(request, booking, 'download calendar')
+    if error:
+        return error
     
-    # Generate calendar file
-    calendar_data = CalendarService.generate_calendar_event(booking)
     filename = CalendarService.get_calendar_filename(booking)
-    
-    # Return as file response
-    response = HttpResponse(calendar_data, content_type='text/calendar')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
+    return _artifact_response(request, booking, 'ics', f'attachment; filename="{filename}"')
 
 
 @api_view(['GET'])
@@ -86,32 +177,18 @@ def get_qr_code(request, booking_reference):
     
     GET /api/v1/bookings/{booking_reference}/qr-code/
     """
-    booking = get_object_or_404(Booking, booking_reference=booking_reference)
+    booking = _get_booking(booking_reference)
     
-    # Check ownership
-    if hasattr(request.user, 'traveler'):
-        if booking.user != request.user:
-            return Response({'error': 'Not authorized'}, status=403)
+    error = _check_access(request, booking, 'get QR code')
+    if error:
+        return error
     
-    # Check booking is confirmed
-    if booking.status != 'confirmed':
-        return Response(
-            {'error': f'Cannot get QR code. Booking status is {booking.status}'}, 
-            status=400
-        )
-    
-    # Generate QR code if not exists
-    if not booking.qr_code_data:
-        booking.generate_and_save_qr()
-    
-    # Generate QR code image
-    qr_image = QRCodeService.generate_qr_code_image(booking)
-    
-    # Return as image
-    response = HttpResponse(qr_image.getvalue(), content_type='image/png')
-    response['Content-Disposition'] = f'inline; filename="qr_{booking.booking_reference}.png"'
-    
-    return response
+    return _artifact_response(
+        request,
+        booking,
+        'qr',
+        f'inline; filename="qr_{booking.booking_reference}.png"'
+    )
 
 
 @api_view(['POST'])
@@ -122,31 +199,20 @@ def resend_ticket(request, booking_reference):
     
     POST /api/v1/bookings/{booking_reference}/ticket/resend/
     """
-    booking = get_object_or_404(Booking, booking_reference=booking_reference)
-    
-    # Check ownership
-    if hasattr(request.user, 'traveler'):
-        if booking.user != request.user:
-            return Response({'error': 'Not authorized'}, status=403)
-    
-    # Check booking is confirmed
-    if booking.status != 'confirmed':
-        return Response(
-            {'error': f'Cannot resend ticket. Booking status is {booking.status}'}, 
-            status=400
-        )
+    booking = _get_booking(booking_reference)
     
-    # Generate QR if not exists
-    if not booking.qr_code_data:
-        booking.generate_and_save_qr()
+    error = _check_access(request, booking, 'resend ticket')
+    if error:
+        return error
     
-    # Send email
+    # Send email (artifacts come from the booking's bundle)
     success = booking.send_confirmation_email()
     
     if success:
+        passenger = booking.passengers.first()
         return Response({
             'message': 'Ticket resent successfully',
-            'email': booking.passenger.email
+            'email': passenger.email if passenger else ''
         })
     else:
         return Response(
@@ -163,24 +229,83 @@ def ticket_info(request, booking_reference):
     
     GET /api/v1/bookings/{booking_reference}/ticket/info/
     """
-    booking = get_object_or_404(Booking, booking_reference=booking_reference)
+    booking = _get_booking(booking_reference)
     
     # Check ownership
     if hasattr(request.user, 'traveler'):
         if booking.user != request.user:
             return Response({'error': 'Not authorized'}, status=403)
     
+    passenger = booking.passengers.first()
+    
     return Response({
         'booking_reference': booking.booking_reference,
-        'status': booking.status,
+        'status': booking.booking_status,
         'has_qr_code': bool(booking.qr_code_data),
         'qr_generated_at': booking.qr_code_generated_at,
         'ticket_sent_at': booking.ticket_sent_at,
-        'passenger_email': booking.passenger.email,
-        'can_download': booking.status == 'confirmed',
+        'passenger_email': passenger.email if passenger else '',
+        'can_download': booking.booking_status == 'confirmed',
         'download_urls': {
             'ticket_pdf': f'/api/v1/bookings/{booking.booking_reference}/ticket/download/',
             'calendar': f'/api/v1/bookings/{booking.booking_reference}/calendar/download/',
             'qr_code': f'/api/v1/bookings/{booking.booking_reference}/qr-code/',
         }
-    })
\ No newline at end of file
+    })
+
+
+def _feed_urls(request, feed):
+    url = request.build_absolute_uri(reverse('bookings:calendar-feed', args=[feed.token]))
+    return {
+        'url': url,
+        'webcal_url': 'webcal://' + url.split('://', 1)[1],
+    }
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def calendar_feed_info(request):
+    """
+    Subscription URL of the user's calendar feed
+    
+    GET  /api/v1/bookings/calendar/feed/  -> feed URL (created on first call)
+    POST /api/v1/bookings/calendar/feed/  -> new URL, the old one stops working
+    """
+    feed, created = CalendarFeed.objects.get_or_create(user=request.user)
+    if request.method == 'POST' and not created:
+        feed.rotate()
+    
+    return Response({
+        'success': True,
+        'data': _feed_urls(request, feed)
+    })
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def calendar_feed(request, token):
+    """
+    iCalendar feed of the user's upcoming trips (token in the URL, for calendar apps)
+    
+    GET /api/v1/bookings/calendar/feed/{token}.ics
+    Supports If-None-Match (304): polling costs two small queries
+    """
+    user_id = CalendarFeed.objects.filter(token=token).values_list('user_id', flat=True).first()
+    if user_id is None:
+        return HttpResponse(status=404)
+    
+    etag = feed_etag(user_id)
+    quoted_etag = f'"{etag}"'
+    
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and quoted_etag in parse_etags(if_none_match):
+        response = HttpResponseNotModified()
+    else:
+        _, content = get_feed(user_id, etag)
+        response = HttpResponse(content, content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="navticket.ics"'
+    
+    response['ETag'] = quoted_etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
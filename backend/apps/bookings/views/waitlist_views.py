@@ -0,0 +1,120 @@
+# Backend/apps/bookings/views/waitlist_views.py
+
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django.shortcuts import get_object_or_404
+from apps.transport.models import Trip
+from ..models import WaitlistEntry
+from ..serializers import (
+    WaitlistJoinSerializer,
+    WaitlistEntrySerializer,
+    WaitlistAcceptSerializer,
+    BookingDetailSerializer
+)
+from ..services.waitlist_service import (
+    join_waitlist,
+    leave_waitlist,
+    accept_waitlist_offer,
+    waitlist_position,
+    waitlist_length
+)
+
+
+def _active_entry(trip_id, user):
+    return WaitlistEntry.objects.filter(
+        trip_id=trip_id,
+        user=user,
+        status__in=['waiting', 'offered']
+    ).first()
+
+
+def _entry_data(entry):
+    return WaitlistEntrySerializer(entry, context={'position': waitlist_position(entry)}).data
+
+
+@api_view(['GET', 'POST', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def trip_waitlist(request, trip_id):
+    """
+    Waitlist of a full trip
+    
+    GET    /api/v1/bookings/trips/{trip_id}/waitlist/   my entry, position and queue length
+    POST   /api/v1/bookings/trips/{trip_id}/waitlist/   join { "party_size", "contact_email", "contact_phone" }
+    DELETE /api/v1/bookings/trips/{trip_id}/waitlist/   leave (declines an open offer)
+    """
+    trip = get_object_or_404(Trip, id=trip_id)
+    
+    if request.method == 'GET':
+        entry = _active_entry(trip.id, request.user)
+        return Response({
+            'success': True,
+            'data': {
+                'entry': _entry_data(entry) if entry else None,
+                'waiting': waitlist_length(trip.id),
+            }
+        })
+    
+    if request.method == 'DELETE':
+        entry = _active_entry(trip.id, request.user)
+        if entry is None:
+            return Response({
+                'success': False,
+                'message': 'Not on the waitlist'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        success, message = leave_waitlist(entry.id, request.user)
+        return Response({
+            'success': success,
+            'message': message
+        }, status=status.HTTP_200_OK if success else status.HTTP_400_BAD_REQUEST)
+    
+    serializer = WaitlistJoinSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    entry, error = join_waitlist(trip, request.user, **serializer.validated_data)
+    if error:
+        return Response({
+            'success': False,
+            'message': error
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'success': True,
+        'message': 'Added to the waitlist, you will be emailed when seats are released',
+        'data': _entry_data(entry)
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def accept_waitlist_offer_view(request, trip_id):
+    """
+    Book the seats offered from the waitlist (pending payment, like a normal booking)
+    
+    POST /api/v1/bookings/trips/{trip_id}/waitlist/accept/
+    Body: { "passengers": [...] }  (as many as the party size)
+    """
+    entry = WaitlistEntry.objects.filter(trip_id=trip_id, user=request.user, status='offered').first()
+    if entry is None:
+        return Response({
+            'success': False,
+            'message': 'No open seat offer for this trip'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    serializer = WaitlistAcceptSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    booking, error = accept_waitlist_offer(entry.id, request.user, serializer.validated_data['passengers'])
+    if error:
+        return Response({
+            'success': False,
+            'message': error
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'success': True,
+        'message': 'Booking created successfully',
+        'data': BookingDetailSerializer(booking).data
+    }, status=status.HTTP_201_CREATED)
@@ -14,6 +14,7 @@ urlpatterns = [
     # Trip Management
     path('trips/', views.trip_list_management, name='trip-list'),
     path('trips/<int:trip_id>/toggle-status/', views.toggle_trip_status, name='toggle-trip-status'),
+    path('seat-counters/', views.seat_counter_drift, name='seat-counter-drift'),
     
     # Route Management
     path('routes/', views.route_list_management, name='route-list'),
@@ -27,4 +28,8 @@ urlpatterns = [
     path('voyage/trips/<int:trip_id>/seats/', views.voyage_trip_seats, name='voyage-trip-seats'),
     path('voyage/trips/<int:trip_id>/passengers/', views.voyage_trip_passengers, name='voyage-trip-passengers'),
     path('voyage/create-booking/', views.voyage_create_booking, name='voyage-create-booking'),
+    path('voyage/trips/<int:trip_id>/manifest.<str:export_format>', views.trip_passenger_manifest, name='voyage-trip-manifest'),
+    path('voyage/manifest.<str:export_format>', views.station_day_manifest, name='voyage-station-day-manifest'),
+    path('voyage/cancel-day/', views.cancel_service_day, name='voyage-cancel-day'),
+    path('voyage/cancellations/', views.service_day_cancellations, name='voyage-cancellations'),
 ]
\ No newline at end of file
@@ -5,7 +5,9 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from django.db.models import Sum, Count, Q, Avg
+from django.db import transaction
+from django.db.models import Sum, Count, Q, Avg, F
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from datetime import timedelta, datetime
 
@@ -257,18 +259,31 @@ def toggle_trip_status(request, trip_id):
     Activate/deactivate trip
     POST /api/v1/dashboard/trips/<id>/toggle-status/
     """
+    from apps.bookings.services.trip_cancellation_service import cancel_trip
+    
     try:
         trip = Trip.objects.get(id=trip_id)
         
-        if trip.status == 'active':
+        if trip.status != 'cancelled':
+            # Bookings are cancelled, refunded and notified in the background
+            cancellation, error = cancel_trip(trip, request.user, request.data.get('reason', ''))
+            if error:
+                return Response({
+                    'success': False,
+                    'message': error
+                }, status=status.HTTP_400_BAD_REQUEST)
             trip.status = 'cancelled'
             message = 'Trip deactivated successfully'
+        elif hasattr(trip, 'cancellation'):
+            return Response({
+                'success': False,
+                'message': 'Trip bookings were cancelled and refunded, it cannot be reactivated'
+            }, status=status.HTTP_400_BAD_REQUEST)
         else:
-            trip.status = 'active'
+            trip.status = 'scheduled'
+            trip.save()
             message = 'Trip activated successfully'
         
-        trip.save()
-        
         return Response({
             'success': True,
             'message': message,
@@ -498,8 +513,10 @@ def voyage_trip_seats(request, trip_id):
 @permission_classes([IsAuthenticated, IsAdminUser])
 def voyage_create_booking(request):
     from apps.bookings.models import Booking, Passenger, Seat
+    from apps.bookings.utils import claim_seats
+    from apps.bookings.services.booking_services import generate_booking_reference
+    from apps.bookings.services.fulfilment_service import enqueue_booking_fulfilment
     from apps.payments.models import Payment
-    import secrets
     
     trip_id = request.data.get('trip_id')
     passenger_data = request.data.get('passenger')
@@ -519,56 +536,67 @@ def voyage_create_booking(request):
             'message': 'Trip not found'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    seats = Seat.objects.filter(id__in=seat_ids, trip=trip, is_available=True)
+    seat_numbers = list(
+        Seat.objects.filter(id__in=seat_ids, trip=trip, is_available=True).values_list('seat_number', flat=True)
+    )
     
-    if len(seats) != len(seat_ids):
+    if len(seat_numbers) != len(seat_ids):
         return Response({
             'success': False,
             'message': 'Some seats are not available'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    booking_reference = f"NVT{secrets.token_hex(4).upper()}"
-    total_amount = trip.price * len(seats)
-    
-    booking = Booking.objects.create(
-        trip=trip,
-        user=request.user,
-        booking_reference=booking_reference,
-        total_passengers=len(seats),
-        ticket_price=trip.price,
-        total_amount=total_amount,
-        booking_status='confirmed',
-        payment_status='completed',
-        contact_phone=passenger_data.get('phone'),
-        contact_email=passenger_data.get('email', '')
-    )
-    
-    for seat in seats:
-        Passenger.objects.create(
+    booking_reference = generate_booking_reference()
+    total_amount = trip.price * len(seat_numbers)
+    
+    with transaction.atomic():
+        booking = Booking.objects.create(
+            trip=trip,
+            user=request.user,
+            booking_reference=booking_reference,
+            total_passengers=len(seat_numbers),
+            ticket_price=trip.price,
+            total_amount=total_amount,
+            booking_status='confirmed',
+            payment_status='paid',
+            contact_phone=passenger_data.get('phone'),
+            contact_email=passenger_data.get('email', '')
+        )
+        
+        for seat_number in seat_numbers:
+            Passenger.objects.create(
+                booking=booking,
+                first_name=passenger_data.get('first_name'),
+                last_name=passenger_data.get('last_name'),
+                phone=passenger_data.get('phone'),
+                email=passenger_data.get('email', ''),
+                id_number=passenger_data.get('id_number', ''),
+                seat_number=seat_number
+            )
+        
+        # Seats and counter change together; a seat sold online meanwhile fails the sale
+        _, lost = claim_seats(trip.id, seat_numbers, booking=booking)
+        decremented = not lost and Trip.objects.filter(
+            pk=trip.id,
+            available_seats__gte=len(seat_numbers)
+        ).update(available_seats=F('available_seats') - len(seat_numbers))
+        if not decremented:
+            transaction.set_rollback(True)
+            return Response({
+                'success': False,
+                'message': 'Some seats are not available'
+            }, status=status.HTTP_409_CONFLICT)
+        
+        Payment.objects.create(
             booking=booking,
-            first_name=passenger_data.get('first_name'),
-            last_name=passenger_data.get('last_name'),
-            phone=passenger_data.get('phone'),
-            email=passenger_data.get('email', ''),
-            id_number=passenger_data.get('id_number', ''),
-            seat_number=seat.seat_number
+            amount=total_amount,
+            payment_method='cash',
+            status='completed'
         )
-        seat.is_available = False
-        seat.save()
-    
-    trip.available_seats -= len(seats)
-    trip.save()
-    
-    Payment.objects.create(
-        booking=booking,
-        amount=total_amount,
-        payment_method='cash',
-        status='completed'
-    )
-    
     
+    # QR data is returned to the counter; the email goes through the job worker
     booking.generate_and_save_qr()
-    booking.send_confirmation_email()
+    enqueue_booking_fulfilment(booking)
     
     return Response({
         'success': True,
@@ -631,8 +659,230 @@ def voyage_trip_passengers(request, trip_id):
             'passengers': passengers_data,
         }
     })
-#class PassengerManifestView(APIView):
-    """Download passenger manifests for trips"""
-    #pass
+
+
+MANIFEST_FORMATS = ('csv', 'pdf')
+
+
+def _manifest_response(trips, trip_ids, export_format, filename):
+    """CSV is streamed row by row, PDF is drawn page by page then sent"""
+    from apps.bookings.services.manifest_service import stream_manifest_csv, generate_manifest_pdf
+
+    if export_format == 'csv':
+        response = StreamingHttpResponse(
+            stream_manifest_csv(trip_ids),
+            content_type='text/csv; charset=utf-8'
+        )
+    else:
+        pdf, _ = generate_manifest_pdf(trips, title=filename)
+        response = HttpResponse(pdf.getvalue(), content_type='application/pdf')
+
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def trip_passenger_manifest(request, trip_id, export_format):
+    """
+    Download the passenger manifest of a trip
+    GET /api/v1/dashboard/voyage/trips/<id>/manifest.csv
+    GET /api/v1/dashboard/voyage/trips/<id>/manifest.pdf
+    """
+    if export_format not in MANIFEST_FORMATS:
+        return Response({
+            'success': False,
+            'message': 'Format must be csv or pdf'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    trip = Trip.objects.filter(id=trip_id).select_related(
+        'route__origin_city',
+        'route__destination_city',
+        'route__bus_company',
+        'departure_station'
+    ).first()
+    if trip is None:
+        return Response({
+            'success': False,
+            'message': 'Trip not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    filename = f"manifest_{trip.departure_date.isoformat()}_{trip.departure_time.strftime('%H%M')}_trip{trip.id}"
+    return _manifest_response([trip], [trip.id], export_format, filename)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def station_day_manifest(request, export_format):
+    """
+    Download the manifests of all departures of a day, one section per trip
+    GET /api/v1/dashboard/voyage/manifest.csv?date=YYYY-MM-DD&station=<id>
+    GET /api/v1/dashboard/voyage/manifest.pdf?date=YYYY-MM-DD&station=<id>
+    """
+    from apps.bookings.services.manifest_service import station_day_trips
+
+    if export_format not in MANIFEST_FORMATS:
+        return Response({
+            'success': False,
+            'message': 'Format must be csv or pdf'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    date_param = request.GET.get('date')
+    if date_param:
+        try:
+            target_date = datetime.strptime(date_param, '%Y-%m-%d').date()
+        except ValueError:
+            return Response({
+                'success': False,
+                'message': 'Invalid date format. Use YYYY-MM-DD'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        target_date = timezone.now().date()
+
+    station_id = request.GET.get('station')
+    if station_id and not station_id.isdigit():
+        return Response({
+            'success': False,
+            'message': 'Invalid station'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    trips = station_day_trips(target_date, station_id)
+    filename = f"manifest_{target_date.isoformat()}" + (f"_station{station_id}" if station_id else '')
+
+    # CSV: the passenger query filters on the trips subquery, nothing is loaded up front
+    trip_ids = trips.values('id')
+    return _manifest_response(trips, trip_ids, export_format, filename)
+
+def _parse_day(request, params):
+    """Date of a day of service (today by default), or None if invalid"""
+    date_param = params.get('date')
+    if not date_param:
+        return timezone.now().date()
+    try:
+        return datetime.strptime(date_param, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def cancel_service_day(request):
+    """
+    Cancel all departures of a day, optionally from one station
+    POST /api/v1/dashboard/voyage/cancel-day/
+    Body: {"date": "YYYY-MM-DD", "station": <id>, "reason": "..."}
+    """
+    from apps.bookings.serializers import TripCancellationSerializer
+    from apps.bookings.services import trip_cancellation_service
+
+    target_date = _parse_day(request, request.data)
+    if target_date is None:
+        return Response({
+            'success': False,
+            'message': 'Invalid date format. Use YYYY-MM-DD'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    station_id = str(request.data.get('station') or '')
+    if station_id and not station_id.isdigit():
+        return Response({
+            'success': False,
+            'message': 'Invalid station'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    cancellations, errors = trip_cancellation_service.cancel_service_day(
+        target_date,
+        request.user,
+        request.data.get('reason', ''),
+        station_id or None
+    )
+
+    return Response({
+        'success': bool(cancellations) or not errors,
+        'message': f'{len(cancellations)} trip(s) cancelled',
+        'data': {
+            'date': target_date.isoformat(),
+            'cancellations': TripCancellationSerializer(cancellations, many=True).data,
+            'errors': errors
+        }
+    }, status=status.HTTP_202_ACCEPTED if cancellations else status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def service_day_cancellations(request):
+    """
+    Progress of the trip cancellations of a day
+    GET /api/v1/dashboard/voyage/cancellations/?date=YYYY-MM-DD&station=<id>
+    """
+    from apps.bookings.models import TripCancellation
+    from apps.bookings.serializers import TripCancellationSerializer
+
+    target_date = _parse_day(request, request.GET)
+    if target_date is None:
+        return Response({
+            'success': False,
+            'message': 'Invalid date format. Use YYYY-MM-DD'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    cancellations = TripCancellation.objects.filter(trip__departure_date=target_date)
+    station_id = request.GET.get('station')
+    if station_id and station_id.isdigit():
+        cancellations = cancellations.filter(trip__departure_station_id=station_id)
+    cancellations = list(cancellations.order_by('trip__departure_time', 'trip_id'))
+
+    totals = {
+        field: sum(getattr(cancellation, field) for cancellation in cancellations)
+        for field in ('total_bookings', 'cancelled_bookings', 'refunds_enqueued', 'notifications_sent', 'notifications_failed')
+    }
+    completed = sum(1 for cancellation in cancellations if cancellation.status == 'completed')
+
+    return Response({
+        'success': True,
+        'message': f'{completed}/{len(cancellations)} cancellation(s) completed',
+        'data': {
+            'date': target_date.isoformat(),
+            'trips': len(cancellations),
+            'completed': completed,
+            **totals,
+            'cancellations': TripCancellationSerializer(cancellations, many=True).data
+        }
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def seat_counter_drift(request):
+    """
+    Seat counter drift found by the reconciliation runs
+    GET /api/v1/dashboard/seat-counters/?days=30
+    """
+    from apps.bookings.models import SeatReconciliationRun
+    from apps.bookings.services.seat_reconciliation_service import drift_metrics
+
+    days = request.GET.get('days', '30')
+    days = int(days) if days.isdigit() and int(days) > 0 else 30
+
+    runs = SeatReconciliationRun.objects.order_by('-started_at')[:20]
+
+    return Response({
+        'success': True,
+        'data': {
+            'days': days,
+            'metrics': drift_metrics(days),
+            'runs': [{
+                'id': run.id,
+                'started_at': run.started_at,
+                'dry_run': run.dry_run,
+                'trips_checked': run.trips_checked,
+                'trips_drifted': run.trips_drifted,
+                'drift_rate': run.drift_rate,
+                'seats_drift': run.seats_drift,
+                'oversold_trips': run.oversold_trips,
+                'orphaned_seats': run.orphaned_seats,
+                'trips_fixed': run.trips_fixed,
+                'drifts': run.drifts[:10],
+            } for run in runs]
+        }
+    })
 
 # Create your views here.
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_alter_payment_payment_method'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhooklog',
+            name='event_id',
+            field=models.CharField(blank=True, help_text='Provider event id (Stripe evt_...), retries of an event share it', max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='webhooklog',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='webhooklog',
+            constraint=models.UniqueConstraint(fields=('provider', 'event_id'), name='unique_webhook_event'),
+        ),
+    ]
@@ -1,6 +1,6 @@
 # Backend/apps/payments/models.py
 
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from decimal import Decimal
 
@@ -111,8 +111,57 @@ class Payment(models.Model):
     def __str__(self):
         return f"Payment {self.id} - {self.booking.booking_reference} - {self.status}"
     
+    def covered_bookings(self):
+        """Bookings paid by this payment: every booking of the group for a group payment"""
+        if self.booking.group_id:
+            return list(self.booking.group.bookings.all())
+        return [self.booking]
+    
+    def confirm_bookings(self):
+        """
+        Mark the bookings paid by this payment as paid and confirmed.
+        A booking cancelled before the money arrived (payment deadline
+        passed, trip cancelled) is marked paid and refunded instead.
+        
+        The bookings are locked (id order) and their status read under the
+        lock, so the unpaid booking sweeper or a trip cancellation batch
+        can't cancel one between the check and the save.
+        
+        Returns:
+            list: Booking instances confirmed
+        """
+        from apps.bookings.models import Booking
+        from apps.bookings.services.job_queue import enqueue_jobs
+        
+        covered = Booking.objects.select_for_update()
+        if self.booking.group_id:
+            covered = covered.filter(group_id=self.booking.group_id)
+        else:
+            covered = covered.filter(pk=self.booking_id)
+        
+        bookings = []
+        late = []
+        with transaction.atomic():
+            for booking in covered.order_by('id'):
+                booking.payment_status = 'paid'
+                if booking.booking_status == 'cancelled':
+                    booking.save(update_fields=['payment_status', 'updated_at'])
+                    late.append(booking)
+                    continue
+                booking.booking_status = 'confirmed'
+                booking.save(update_fields=['booking_status', 'payment_status', 'updated_at'])
+                bookings.append(booking)
+            
+            if late:
+                enqueue_jobs('refund_booking', late)
+            
+            if self.booking.group_id:
+                self.booking.group.payment_status = 'paid'
+                self.booking.group.save(update_fields=['payment_status', 'updated_at'])
+        return bookings
+    
     def mark_completed(self):
-        """Mark payment as completed and update booking"""
+        """Mark payment as completed and update booking(s)"""
         from django.utils import timezone
         
         self.status = 'completed'
@@ -120,9 +169,7 @@ class Payment(models.Model):
         self.save()
         
         # Update booking status
-        self.booking.payment_status = 'paid'
-        self.booking.booking_status = 'confirmed'
-        self.booking.save()
+        return self.confirm_bookings()
     
     def mark_failed(self, reason=''):
         """Mark payment as failed"""
@@ -133,17 +180,33 @@ class Payment(models.Model):
 
 
 class WebhookLog(models.Model):
-    """Log webhook events for debugging"""
+    """
+    Raw webhook event, stored once per provider event id when received
+    and processed later by the job worker (see services.ingest_stripe_webhook)
+    """
     
     provider = models.CharField(max_length=50)
+    event_id = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        help_text="Provider event id (Stripe evt_...), retries of an event share it"
+    )
     event_type = models.CharField(max_length=100)
     payload = models.JSONField()
     processed = models.BooleanField(default=False)
+    processed_at = models.DateTimeField(null=True, blank=True)
     error_message = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     
     class Meta:
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['provider', 'event_id'],
+                name='unique_webhook_event'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.provider} - {self.event_type} - {self.created_at}"
\ No newline at end of file
@@ -36,7 +36,8 @@ class PaymentSerializer(serializers.ModelSerializer):
 
 
 class PaymentInitializeSerializer(serializers.Serializer):
-    booking_reference = serializers.CharField(required=True)
+    booking_reference = serializers.CharField(required=False)
+    group_reference = serializers.CharField(required=False, help_text="Pay all bookings of a group booking at once")
     payment_method = serializers.ChoiceField(
         choices=['stripe_card'],
         default='stripe_card'
@@ -65,7 +66,39 @@ class PaymentInitializeSerializer(serializers.Serializer):
         if booking.booking_status == 'cancelled':
             raise serializers.ValidationError("Cannot pay for a cancelled booking")
         
+        # Seats of unpaid bookings are released after the payment deadline
+        if booking.is_payment_expired():
+            raise serializers.ValidationError("This booking has expired, please book again")
+        
+        # Group bookings are paid together
+        if booking.group_id:
+            raise serializers.ValidationError("This booking is part of a group booking, pay with group_reference")
+        
         return value
+    
+    def validate_group_reference(self, value):
+        from apps.bookings.models import BookingGroup
+        
+        request = self.context.get('request')
+        group = BookingGroup.objects.filter(group_reference=value, user=request.user).first()
+        if group is None:
+            raise serializers.ValidationError("Group booking not found")
+        
+        if group.payment_status == 'paid':
+            raise serializers.ValidationError("This group booking has already been paid")
+        
+        if group.bookings.filter(booking_status='cancelled').exists():
+            raise serializers.ValidationError("Cannot pay for a group booking with cancelled bookings")
+        
+        if any(booking.is_payment_expired() for booking in group.bookings.all()):
+            raise serializers.ValidationError("This group booking has expired, please book again")
+        
+        return value
+    
+    def validate(self, data):
+        if bool(data.get('booking_reference')) == bool(data.get('group_reference')):
+            raise serializers.ValidationError("Provide either booking_reference or group_reference")
+        return data
 
 
 class PaymentVerifySerializer(serializers.Serializer):
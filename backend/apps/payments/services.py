@@ -3,10 +3,25 @@
 import stripe
 from stripe import StripeError
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from datetime import timedelta
 from decimal import Decimal
 import json
+import logging
 from .models import Payment
 
+logger = logging.getLogger(__name__)
+
+# Stripe accepts 30 minutes to 24 hours; unpaid bookings wait for their checkout to expire
+CHECKOUT_SESSION_TTL = getattr(settings, 'CHECKOUT_SESSION_TTL', timedelta(minutes=30))
+
+
+def checkout_expires_at():
+    """Unix timestamp after which a new checkout session can't be paid (one minute of clock slack)"""
+    return int((timezone.now() + CHECKOUT_SESSION_TTL + timedelta(minutes=1)).timestamp())
+
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
 
@@ -39,6 +54,7 @@ def create_stripe_checkout_session(booking, success_url, cancel_url):
                 'quantity': 1,
             }],
             mode='payment',
+            expires_at=checkout_expires_at(),
             success_url=success_url,
             cancel_url=cancel_url,
             client_reference_id=str(booking.id),
@@ -64,22 +80,94 @@ def create_stripe_checkout_session(booking, success_url, cancel_url):
         return None, None, f"Payment creation failed: {str(e)}"
 
 
+def create_group_checkout_session(group, success_url, cancel_url):
+    """
+    One Stripe checkout for all bookings of a group booking.
+    The payment is attached to the group's first booking and confirms
+    every booking of the group when completed (Payment.confirm_bookings).
+    """
+    payment = None
+    try:
+        bookings = list(group.bookings.select_related(
+            'trip__route__origin_city',
+            'trip__route__destination_city'
+        ).order_by('id'))
+        if not bookings:
+            return None, None, "Group has no booking"
+        
+        payment = Payment.objects.create(
+            booking=bookings[0],
+            user=group.user,
+            payment_method='stripe_card',
+            amount=group.total_amount,
+            currency='XOF',
+            status='pending',
+            metadata={'group_reference': group.group_reference}
+        )
+        
+        # One line item per trip, shown on the Stripe page
+        line_items = [{
+            'price_data': {
+                'currency': 'xof',
+                'unit_amount': int(booking.total_amount * 100),
+                'product_data': {
+                    'name': f'Bus Tickets x{booking.total_passengers} - {booking.trip.route.origin_city.name} to {booking.trip.route.destination_city.name}',
+                    'description': f'Booking Reference: {booking.booking_reference}',
+                    'images': [],
+                },
+            },
+            'quantity': 1,
+        } for booking in bookings]
+        
+        checkout_session = stripe.checkout.Session.create(
+            payment_method_types=['card'],
+            line_items=line_items,
+            mode='payment',
+            expires_at=checkout_expires_at(),
+            success_url=success_url,
+            cancel_url=cancel_url,
+            client_reference_id=group.group_reference,
+            metadata={
+                'group_reference': group.group_reference,
+                'booking_id': bookings[0].id,
+                'user_id': group.user_id,
+            }
+        )
+        
+        payment.stripe_checkout_session_id = checkout_session.id
+        payment.payment_url = checkout_session.url
+        payment.status = 'processing'
+        payment.save()
+        
+        return payment, checkout_session.url, None
+        
+    except StripeError as e:
+        if payment:
+            payment.mark_failed(str(e))
+        return None, None, str(e)
+    except Exception as e:
+        return None, None, f"Payment creation failed: {str(e)}"
+
+
 def verify_stripe_payment(session_id):
     try:
         session = stripe.checkout.Session.retrieve(session_id)
         
         if session.payment_status == 'paid':
-            payment = Payment.objects.filter(
-                stripe_checkout_session_id=session_id
-            ).first()
-            
-            if payment:
-                payment.stripe_payment_intent_id = session.payment_intent
-                payment.transaction_id = session.payment_intent
-                payment.mark_completed()
-                return True, "Payment verified successfully"
-            
-            return False, "Payment record not found"
+            with transaction.atomic():
+                # The webhook worker may be confirming the same payment
+                payment = Payment.objects.select_for_update().filter(
+                    stripe_checkout_session_id=session_id
+                ).first()
+                
+                if payment is None:
+                    return False, "Payment record not found"
+                
+                if payment.status != 'completed':
+                    payment.stripe_payment_intent_id = session.payment_intent
+                    payment.transaction_id = session.payment_intent
+                    payment.mark_completed()
+            return True, "Payment verified successfully"
         
         return False, f"Payment not completed. Status: {session.payment_status}"
         
@@ -87,62 +175,255 @@ def verify_stripe_payment(session_id):
         return False, str(e)
 
 
-def handle_stripe_webhook(payload, sig_header):
-    from .models import WebhookLog
-    
-    webhook_secret = settings.STRIPE_WEBHOOK_SECRET
-    
-    if not webhook_secret:
-        try:
-            event = json.loads(payload)
-        except Exception as e:
-            return False, f"Invalid payload: {str(e)}"
+def find_booking_payment(booking):
+    """
+    Completed payment of a booking: its own payment, or the consolidated
+    payment of its group
+
+    Returns:
+        Payment instance or None
+    """
+    condition = Q(booking=booking)
+    if booking.group_id:
+        condition |= Q(booking__group_id=booking.group_id, metadata__group_reference__isnull=False)
+    return Payment.objects.filter(condition, status__in=['completed', 'refunded']).order_by('-completed_at').first()
+
+
+def refund_booking_payment(booking):
+    """
+    Refund the amount paid for one booking.
+    Card payments are refunded through Stripe (idempotency key per booking,
+    so a retried job never refunds twice); other methods are recorded for
+    the operator to refund by hand.
+
+    Returns:
+        tuple: (bool refunded, message)
+    """
+    payment = find_booking_payment(booking)
+    if payment is None:
+        return False, "No completed payment"
+
+    if booking.booking_reference in payment.metadata.get('refunds', {}):
+        return True, "Already refunded"
+
+    refund = {
+        'amount': str(booking.total_amount),
+        'refunded_at': timezone.now().isoformat(),
+    }
+    if payment.payment_method == 'stripe_card' and payment.stripe_payment_intent_id:
+        stripe_refund = stripe.Refund.create(
+            payment_intent=payment.stripe_payment_intent_id,
+            amount=int(booking.total_amount * 100),
+            metadata={'booking_reference': booking.booking_reference},
+            idempotency_key=f"refund-{booking.booking_reference}"
+        )
+        refund['refund_id'] = stripe_refund.id
     else:
+        refund['manual'] = True
+
+    with transaction.atomic():
+        # Refund jobs of a group's bookings update the same payment
+        payment = Payment.objects.select_for_update().get(pk=payment.pk)
+        refunds = payment.metadata.setdefault('refunds', {})
+        refunds[booking.booking_reference] = refund
+
+        # Manual refunds stay on the payment until the operator has paid them back
+        refunded = sum(Decimal(item['amount']) for item in refunds.values() if not item.get('manual'))
+        if refunded >= payment.amount:
+            payment.status = 'refunded'
+        payment.save(update_fields=['metadata', 'status', 'updated_at'])
+
+        if refund.get('manual'):
+            return False, f"Manual refund required ({payment.get_payment_method_display()})"
+
+        booking.payment_status = 'refunded'
+        booking.save(update_fields=['payment_status', 'updated_at'])
+
+        if booking.group_id and payment.status == 'refunded':
+            booking.group.payment_status = 'refunded'
+            booking.group.save(update_fields=['payment_status', 'updated_at'])
+
+    return True, "Refund issued"
+
+
+def refund_booking(job, timings):
+    """
+    Job handler: refund a booking cancelled with its trip.
+    Stripe errors raise so the queue retries with backoff.
+
+    Args:
+        job: BackgroundJob instance (job.booking is the cancelled booking)
+        timings: StageTimings filled with per-stage durations
+    """
+    booking = job.booking
+    if booking is None or booking.payment_status != 'paid':
+        return
+
+    with timings.stage('refund'):
+        refunded, message = refund_booking_payment(booking)
+
+    if refunded:
+        logger.info(f"💸 Booking {booking.booking_reference} refunded: {message}")
+    else:
+        logger.warning(f"Booking {booking.booking_reference} not refunded: {message}")
+
+
+def construct_stripe_event(payload, sig_header):
+    """
+    Verify the Stripe signature and parse the event.
+    The signature is always checked: a missing secret or signature is an
+    error. Only tests may skip it, through STRIPE_WEBHOOK_ALLOW_UNSIGNED.
+
+    Returns:
+        tuple: (event dict or None, error_message or None)
+    """
+    if getattr(settings, 'STRIPE_WEBHOOK_ALLOW_UNSIGNED', False):
         try:
-            event = stripe.Webhook.construct_event(
-                payload, sig_header, webhook_secret
-            )
+            return json.loads(payload), None
         except ValueError as e:
-            return False, f"Invalid payload: {str(e)}"
-        except StripeError as e:
-            return False, f"Invalid signature: {str(e)}"
+            return None, f"Invalid payload: {str(e)}"
+    
+    webhook_secret = settings.STRIPE_WEBHOOK_SECRET
+    if not webhook_secret:
+        return None, "STRIPE_WEBHOOK_SECRET is not configured"
+    if not sig_header:
+        return None, "Missing Stripe-Signature header"
     
     try:
-        webhook_log = WebhookLog.objects.create(
-            provider='stripe',
-            event_type=event['type'],
-            payload=event
-        )
+        stripe.Webhook.construct_event(payload, sig_header, webhook_secret)
+    except ValueError as e:
+        return None, f"Invalid payload: {str(e)}"
+    except StripeError as e:
+        return None, f"Invalid signature: {str(e)}"
+    
+    # Signature checked: keep the raw event as plain JSON
+    return json.loads(payload), None
+
+
+def ingest_stripe_webhook(payload, sig_header):
+    """
+    Fast acknowledgement of a Stripe webhook: verify it, store the raw
+    event once per event id and queue its processing. Nothing else runs
+    in the request, so Stripe gets its 200 in a couple of queries.
+    
+    The event row and its job are inserted in one transaction; a retry
+    of an event already stored hits the unique (provider, event_id)
+    constraint and is ignored.
+    
+    Returns:
+        tuple: (WebhookLog or None, created bool, error_message or None)
+    """
+    from django.db import IntegrityError
+    from apps.bookings.services.job_queue import enqueue_job
+    from .models import WebhookLog
+    
+    event, error = construct_stripe_event(payload, sig_header)
+    if error:
+        return None, False, error
+    
+    event_id = event.get('id')
+    if not event_id:
+        return None, False, "Event has no id"
+    
+    try:
+        with transaction.atomic():
+            webhook_log = WebhookLog.objects.create(
+                provider='stripe',
+                event_id=event_id,
+                event_type=event.get('type', ''),
+                payload=event
+            )
+            enqueue_job('process_webhook', payload={'webhook_log_id': webhook_log.id})
+    except IntegrityError:
+        return WebhookLog.objects.filter(provider='stripe', event_id=event_id).first(), False, None
+    
+    return webhook_log, True, None
+
+
+def apply_stripe_event(event):
+    """
+    Apply a Stripe event to payments and bookings.
+    Runs inside the caller's transaction; events already applied (payment
+    no longer waiting) are no-ops.
+    
+    Returns:
+        str: What was done
+    """
+    from apps.bookings.services.fulfilment_service import enqueue_booking_fulfilment
+    
+    event_type = event['type']
+    data = event['data']['object']
+    
+    if event_type == 'checkout.session.completed':
+        payment = Payment.objects.select_for_update().filter(
+            stripe_checkout_session_id=data['id']
+        ).first()
+        if payment is None:
+            logger.warning(f"Payment not found for session {data['id']}")
+            return f"Payment not found for session {data['id']}"
+        if payment.status not in ('pending', 'processing'):
+            return f"Payment {payment.id} already {payment.status}"
         
-        if event['type'] == 'checkout.session.completed':
-            session = event['data']['object']
-            
-            payment = Payment.objects.filter(
-                stripe_checkout_session_id=session['id']
-            ).first()
-            
-            if payment:
-                payment.stripe_payment_intent_id = session.get('payment_intent')
-                payment.transaction_id = session.get('payment_intent')
-                payment.mark_completed()
-                webhook_log.processed = True
-                webhook_log.save()
-                
-                return True, "Payment completed"
+        payment.stripe_payment_intent_id = data.get('payment_intent')
+        payment.transaction_id = data.get('payment_intent') or ''
+        paid_bookings = payment.mark_completed()
         
-        elif event['type'] == 'payment_intent.payment_failed':
-            payment_intent = event['data']['object']
-            
-            payment = Payment.objects.filter(
-                stripe_payment_intent_id=payment_intent['id']
+        # QR code and email are handled by the job worker
+        for paid_booking in paid_bookings:
+            enqueue_booking_fulfilment(paid_booking)
+        return f"Payment {payment.id} completed, {len(paid_bookings)} booking(s) confirmed"
+    
+    if event_type == 'checkout.session.expired':
+        updated = Payment.objects.filter(
+            stripe_checkout_session_id=data['id'],
+            status__in=['pending', 'processing']
+        ).update(status='cancelled', updated_at=timezone.now())
+        return f"{updated} payment(s) cancelled (checkout expired)"
+    
+    if event_type == 'payment_intent.payment_failed':
+        payment = Payment.objects.select_for_update().filter(
+            stripe_payment_intent_id=data['id']
+        ).first()
+        if payment is None or payment.status == 'completed':
+            return "No pending payment for intent"
+        payment.mark_failed((data.get('last_payment_error') or {}).get('message', 'Payment failed'))
+        return f"Payment {payment.id} failed"
+    
+    return f"Event {event_type} ignored"
+
+
+def process_webhook_event(job, timings):
+    """
+    Job handler: process a stored webhook event exactly once.
+    
+    The event row is locked and its effects are committed in the same
+    transaction as the processed flag, so duplicate jobs and retries after
+    a crash never apply an event twice.
+    
+    Args:
+        job: BackgroundJob instance (payload: {'webhook_log_id'})
+        timings: StageTimings filled with per-stage durations
+    """
+    from .models import WebhookLog
+    
+    try:
+        with transaction.atomic():
+            webhook_log = WebhookLog.objects.select_for_update().filter(
+                pk=job.payload['webhook_log_id']
             ).first()
+            if webhook_log is None or webhook_log.processed:
+                return
             
-            if payment:
-                payment.mark_failed(payment_intent.get('last_payment_error', {}).get('message', 'Payment failed'))
-                webhook_log.processed = True
-                webhook_log.save()
-        
-        return True, f"Webhook {event['type']} received"
-        
+            with timings.stage('apply'):
+                message = apply_stripe_event(webhook_log.payload)
+            
+            webhook_log.processed = True
+            webhook_log.processed_at = timezone.now()
+            webhook_log.error_message = ''
+            webhook_log.save(update_fields=['processed', 'processed_at', 'error_message'])
     except Exception as e:
-        return False, f"Webhook processing failed: {str(e)}"
\ No newline at end of file
+        # Effects were rolled back; keep the reason next to the event
+        WebhookLog.objects.filter(pk=job.payload['webhook_log_id']).update(error_message=str(e))
+        raise
+    
+    logger.info(f"✅ Webhook {webhook_log.event_id} ({webhook_log.event_type}): {message}")
@@ -1,3 +1,79 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.bookings.models import BackgroundJob, Booking
+from apps.bookings.tests import BookingTestMixin
+from apps.payments.models import Payment, WebhookLog
+
+
+WEBHOOK_URL = '/api/v1/payments/webhook/stripe/'
+
+
+class StripeWebhookSignatureTests(TestCase):
+    """Unsigned or forged webhook events never reach the job queue"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.body = json.dumps({
+            'id': 'evt_forged',
+            'type': 'checkout.session.completed',
+            'data': {'object': {'id': 'cs_forged'}}
+        })
+
+    def post(self, **headers):
+        return self.client.post(WEBHOOK_URL, self.body, content_type='application/json', **headers)
+
+    @override_settings(STRIPE_WEBHOOK_SECRET='', DEBUG=True)
+    def test_rejected_without_secret_even_in_debug(self):
+        self.assertEqual(self.post().status_code, 400)
+        self.assertFalse(WebhookLog.objects.exists())
+
+    @override_settings(STRIPE_WEBHOOK_SECRET='whsec_test')
+    def test_rejected_without_signature(self):
+        self.assertEqual(self.post().status_code, 400)
+        self.assertFalse(WebhookLog.objects.exists())
+
+    @override_settings(STRIPE_WEBHOOK_SECRET='whsec_test')
+    def test_rejected_with_bad_signature(self):
+        self.assertEqual(self.post(HTTP_STRIPE_SIGNATURE='t=1,v1=forged').status_code, 400)
+        self.assertFalse(WebhookLog.objects.exists())
+
+    @override_settings(STRIPE_WEBHOOK_ALLOW_UNSIGNED=True)
+    def test_unsigned_path_for_tests_only(self):
+        self.assertEqual(self.post().status_code, 200)
+        self.assertEqual(WebhookLog.objects.filter(event_id='evt_forged').count(), 1)
+
+
+class ConfirmBookingsTests(BookingTestMixin, TestCase):
+    """A payment landing after the booking was cancelled never revives it"""
+
+    def test_booking_cancelled_after_payment_read_is_refunded(self):
+        trip = self.make_trip()
+        booking = self.make_booking(trip, self.make_user())
+        payment = Payment.objects.create(booking=booking, user=booking.user, amount=booking.total_amount, status='processing')
+        payment.booking  # cached, like a worker that read it before the sweeper ran
+
+        # Unpaid booking sweeper (bulk UPDATE) cancels it meanwhile
+        Booking.objects.filter(pk=booking.pk).update(booking_status='cancelled')
+
+        confirmed = payment.mark_completed()
+
+        booking.refresh_from_db()
+        self.assertEqual(confirmed, [])
+        self.assertEqual(booking.booking_status, 'cancelled')
+        self.assertEqual(booking.payment_status, 'paid')
+        self.assertTrue(BackgroundJob.objects.filter(job_type='refund_booking').exists())
+
+    def test_pending_booking_is_confirmed(self):
+        trip = self.make_trip()
+        booking = self.make_booking(trip, self.make_user())
+        payment = Payment.objects.create(booking=booking, user=booking.user, amount=booking.total_amount, status='processing')
+
+        confirmed = payment.mark_completed()
+
+        booking.refresh_from_db()
+        self.assertEqual([b.id for b in confirmed], [booking.id])
+        self.assertEqual(booking.booking_status, 'confirmed')
+        self.assertEqual(booking.payment_status, 'paid')
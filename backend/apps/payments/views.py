@@ -7,12 +7,9 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.http import HttpResponse
-from django.conf import settings
-from django.utils import timezone
-import stripe
 import logging
 
-from .models import Payment, WebhookLog
+from .models import Payment
 from .serializers import (
     PaymentSerializer,
     PaymentInitializeSerializer,
@@ -20,50 +17,66 @@ from .serializers import (
 )
 from .services import (
     create_stripe_checkout_session,
+    create_group_checkout_session,
     verify_stripe_payment,
-    handle_stripe_webhook
+    ingest_stripe_webhook
 )
-from apps.bookings.models import Booking
+from apps.bookings.models import Booking, BookingGroup
+from apps.bookings.utils import IdempotencyMixin
+from apps.bookings.services.fulfilment_service import enqueue_booking_fulfilment
+from apps.bookings.services.stats_service import get_user_stats
 
 logger = logging.getLogger(__name__)
 
 
-class PaymentInitializeView(generics.CreateAPIView):
+class PaymentInitializeView(IdempotencyMixin, generics.CreateAPIView):
     """
     Initialize payment and create Stripe checkout session
     POST /api/payments/initialize/
+    Send an Idempotency-Key header to make retries safe
     """
     serializer_class = PaymentInitializeSerializer
     permission_classes = [IsAuthenticated]
+    idempotency_scope = 'payment_initialize'
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        booking_reference = serializer.validated_data['booking_reference']
+        booking_reference = serializer.validated_data.get('booking_reference')
+        group_reference = serializer.validated_data.get('group_reference')
         success_url = serializer.validated_data['success_url']
         cancel_url = serializer.validated_data['cancel_url']
         
-        # Get booking
-        booking = get_object_or_404(
-            Booking, 
-            booking_reference=booking_reference,
-            user=request.user  # Ensure user owns the booking
-        )
-        
-        # Check if booking is already paid
-        if booking.payment_status == 'paid':
-            return Response({
-                'success': False,
-                'message': 'Booking already paid'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Create Stripe checkout session
-        payment, checkout_url, error = create_stripe_checkout_session(
-            booking=booking,
-            success_url=success_url,
-            cancel_url=cancel_url
-        )
+        if group_reference:
+            # One consolidated payment for every booking of the group
+            group = get_object_or_404(BookingGroup, group_reference=group_reference, user=request.user)
+            payment, checkout_url, error = create_group_checkout_session(
+                group=group,
+                success_url=success_url,
+                cancel_url=cancel_url
+            )
+        else:
+            # Get booking
+            booking = get_object_or_404(
+                Booking, 
+                booking_reference=booking_reference,
+                user=request.user  # Ensure user owns the booking
+            )
+            
+            # Check if booking is already paid
+            if booking.payment_status == 'paid':
+                return Response({
+                    'success': False,
+                    'message': 'Booking already paid'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Create Stripe checkout session
+            payment, checkout_url, error = create_stripe_checkout_session(
+                booking=booking,
+                success_url=success_url,
+                cancel_url=cancel_url
+            )
         
         if error:
             return Response({
@@ -119,23 +132,31 @@ def verify_payment_view(request):
     """
     Verify payment status after user returns from Stripe
     POST /api/payments/verify/
-    Body: { "booking_reference": "NVT-..." }
+    Body: { "booking_reference": "NVT-..." } or { "group_reference": "GRP-..." }
     """
     booking_reference = request.data.get('booking_reference')
+    group_reference = request.data.get('group_reference')
     
-    if not booking_reference:
+    if not booking_reference and not group_reference:
         return Response({
             'success': False,
-            'message': 'booking_reference is required'
+            'message': 'booking_reference or group_reference is required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Get booking
-    try:
-        booking = Booking.objects.get(
+    # Get booking (a group payment is attached to the group's first booking)
+    if group_reference:
+        booking = Booking.objects.filter(
+            group__group_reference=group_reference,
+            user=request.user
+        ).order_by('id').first()
+        booking_reference = group_reference
+    else:
+        booking = Booking.objects.filter(
             booking_reference=booking_reference,
             user=request.user
-        )
-    except Booking.DoesNotExist:
+        ).first()
+    
+    if booking is None:
         return Response({
             'success': False,
             'message': 'Booking not found'
@@ -179,14 +200,11 @@ def verify_payment_view(request):
         payment.refresh_from_db()
         booking.refresh_from_db()
         
-        # Generate QR code if not exists
-        if not booking.qr_code_data:
-            booking.generate_and_save_qr()
+        # QR code and confirmation email are sent by the job worker
+        for paid_booking in payment.covered_bookings():
+            enqueue_booking_fulfilment(paid_booking)
         
-        # Send confirmation email
-        booking.send_confirmation_email()
-        
-        logger.info(f"✅ Payment verified and email sent for booking {booking_reference}")
+        logger.info(f"✅ Payment verified, fulfilment queued for booking {booking_reference}")
         
         return Response({
             'success': True,
@@ -213,90 +231,24 @@ def verify_payment_view(request):
 @permission_classes([AllowAny])
 def stripe_webhook(request):
     """
-    Handle Stripe webhook events
+    Receive Stripe webhook events
     POST /api/payments/webhook/stripe/
     
+    The event is verified, stored once per event id and acknowledged;
+    the job worker applies it (fast 200 for Stripe, retries deduplicated).
+    
     Note: For local testing without webhook, use verify_payment_view instead
     """
     payload = request.body
     sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
     
-    try:
-        event = stripe.Webhook.construct_event(
-            payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
-        )
-    except ValueError as e:
-        logger.error(f"❌ Invalid webhook payload: {e}")
-        return HttpResponse(status=400)
-    except stripe.error.SignatureVerificationError as e:
-        logger.error(f"❌ Invalid webhook signature: {e}")
+    webhook_log, created, error = ingest_stripe_webhook(payload, sig_header)
+    if error:
+        logger.error(f"❌ Invalid webhook: {error}")
         return HttpResponse(status=400)
     
-    # Log webhook
-    webhook_log = WebhookLog.objects.create(
-        provider='stripe',
-        event_type=event['type'],
-        payload=event
-    )
-    
-    # Handle checkout.session.completed
-    if event['type'] == 'checkout.session.completed':
-        session = event['data']['object']
-        session_id = session['id']
-        
-        try:
-            # ✅ FIX: Search by stripe_checkout_session_id (not stripe_payment_intent_id)
-            payment = Payment.objects.get(
-                stripe_checkout_session_id=session_id,
-                status='pending'
-            )
-            
-            # Update payment status
-            payment.stripe_payment_intent_id = session.get('payment_intent')
-            payment.status = 'completed'
-            payment.completed_at = timezone.now()
-            payment.save()
-            
-            # Update booking status
-            booking = payment.booking
-            booking.payment_status = 'paid'
-            booking.booking_status = 'confirmed'
-            booking.save()
-            
-            # Generate QR code and send email
-            if not booking.qr_code_data:
-                booking.generate_and_save_qr()
-            booking.send_confirmation_email()
-            
-            # Mark webhook as processed
-            webhook_log.processed = True
-            webhook_log.save()
-            
-            logger.info(f"✅ Webhook processed: Payment completed for booking {booking.booking_reference}")
-            
-        except Payment.DoesNotExist:
-            logger.error(f"❌ Payment not found for session {session_id}")
-            webhook_log.error_message = f"Payment not found for session {session_id}"
-            webhook_log.save()
-    
-    elif event['type'] == 'payment_intent.payment_failed':
-        payment_intent = event['data']['object']
-        
-        try:
-            payment = Payment.objects.get(
-                stripe_payment_intent_id=payment_intent['id']
-            )
-            
-            payment.status = 'failed'
-            payment.save()
-            
-            webhook_log.processed = True
-            webhook_log.save()
-            
-            logger.warning(f"⚠️ Payment failed for payment {payment.id}")
-            
-        except Payment.DoesNotExist:
-            logger.error(f"❌ Payment not found for intent {payment_intent['id']}")
+    if not created:
+        logger.info(f"Webhook {webhook_log.event_id if webhook_log else ''} already received, ignored")
     
     return HttpResponse(status=200)
 
@@ -305,15 +257,15 @@ def stripe_webhook(request):
 @permission_classes([IsAuthenticated])
 def payment_stats_view(request):
     """Get user's payment statistics"""
-    user = request.user
-    payments = Payment.objects.filter(user=user)
+    # One row, kept up to date on booking/payment changes
+    user_stats = get_user_stats(request.user)
     
     stats = {
-        'total_payments': payments.count(),
-        'completed': payments.filter(status='completed').count(),
-        'pending': payments.filter(status='pending').count(),
-        'failed': payments.filter(status='failed').count(),
-        'total_spent': sum(p.amount for p in payments.filter(status='completed'))
+        'total_payments': user_stats.total_payments,
+        'completed': user_stats.completed_payments,
+        'pending': user_stats.pending_payments,
+        'failed': user_stats.failed_payments,
+        'total_spent': user_stats.payments_spent
     }
     
     return Response({
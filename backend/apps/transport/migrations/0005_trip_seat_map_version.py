@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transport', '0004_trip_seat_layout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='seat_map_version',
+            field=models.PositiveBigIntegerField(default=0, help_text='Incremented on every seat state change (seat map change feed)'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transport', '0005_trip_seat_map_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='boarded_count',
+            field=models.PositiveIntegerField(default=0, help_text='Passengers checked in at boarding (updated with each scan)'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transport', '0006_trip_boarded_count'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='trip',
+            name='seat_map_version',
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='seat_map_reset_version',
+            field=models.PositiveBigIntegerField(default=0, help_text='Seat version of the last seat map regeneration (change feed clients holding an older version reload the map)'),
+        ),
+    ]
@@ -145,6 +145,10 @@ class Trip(models.Model):
         validators=[MinValueValidator(0)],
         help_text="Number of available seats"
     )
+    boarded_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Passengers checked in at boarding (updated with each scan)"
+    )
     
     # Pricing and bus details
     price = models.DecimalField(
@@ -211,6 +215,10 @@ class Trip(models.Model):
         default='3x2',
         help_text="Configuration des sièges du bus"
     )
+    seat_map_reset_version = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Seat version of the last seat map regeneration (change feed clients holding an older version reload the map)"
+    )
     
     # Metadata
     is_template_generated = models.BooleanField(
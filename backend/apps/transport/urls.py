@@ -33,6 +33,10 @@ urlpatterns = [
          views.TripDetailView.as_view(), 
          name='trip-detail'),
     
+    path('trips/<int:pk>/cancellation/', 
+         views.trip_cancellation_status, 
+         name='trip-cancellation'),
+    
     # Bulk trip creation
     path('trips/bulk/', 
          views.TripBulkCreateView.as_view(), 
@@ -182,7 +182,7 @@ class TripDetailView(generics.RetrieveUpdateDestroyAPIView):
         return TripDetailSerializer
     
     def perform_destroy(self, instance):
-        """Soft delete - set status to cancelled"""
+        """Cancel the trip; its bookings are cancelled, refunded and notified in the background"""
         # Check if user owns this trip
         if not (self.request.user.is_authenticated and 
                 hasattr(self.request.user, 'company') and 
@@ -190,8 +190,34 @@ class TripDetailView(generics.RetrieveUpdateDestroyAPIView):
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("You don't have permission to cancel this trip")
         
-        instance.status = 'cancelled'
-        instance.save()
+        from rest_framework.exceptions import ValidationError
+        from apps.bookings.services.trip_cancellation_service import cancel_trip
+        
+        cancellation, error = cancel_trip(instance, self.request.user, self.request.data.get('reason', ''))
+        if error:
+            raise ValidationError({'error': error})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsCompanyUser])
+def trip_cancellation_status(request, pk):
+    """
+    Progress of the cancellation of one of the company's trips
+    GET /api/v1/transport/trips/<id>/cancellation/
+    """
+    from apps.bookings.models import TripCancellation
+    from apps.bookings.serializers import TripCancellationSerializer
+    
+    cancellation = TripCancellation.objects.filter(
+        trip_id=pk,
+        trip__route__bus_company=request.user.company
+    ).first()
+    if cancellation is None:
+        return Response(
+            {'error': 'Trip is not cancelled'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(TripCancellationSerializer(cancellation).data)
 
 
 class TripBulkCreateView(generics.CreateAPIView):
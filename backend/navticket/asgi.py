@@ -3,6 +3,15 @@ ASGI config for navticket project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project with uvicorn (in requirements.txt) so the async seat feed
+views (long-poll and server-sent events) wait without holding a worker
+thread:
+
+    uvicorn navticket.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+
+Under a WSGI server (navticket.wsgi, runserver) every waiting long-poll or
+open stream keeps one worker busy for up to 25 s / 60 s.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -115,6 +115,8 @@ DATABASES = {
 STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY', '')
 STRIPE_PUBLISHABLE_KEY = os.getenv('STRIPE_PUBLISHABLE_KEY', '')
 STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET', '')
+# Tests only: accept unsigned webhook events (never read from the environment)
+STRIPE_WEBHOOK_ALLOW_UNSIGNED = False
 
 
 # Email Configuration
@@ -126,6 +128,12 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')  
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@navticket.com')
 
+# Bulk sends (reminders, cancellations): messages per SMTP connection,
+# connections open at once and provider quota in messages/second (0 = none)
+EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', 50))
+EMAIL_BATCH_CONCURRENCY = int(os.getenv('EMAIL_BATCH_CONCURRENCY', 2))
+EMAIL_RATE_LIMIT = float(os.getenv('EMAIL_RATE_LIMIT', 0))
+
 
 COMPANY_NAME = 'Navticket'
 COMPANY_SUPPORT_EMAIL = 'support@navticket.com'
@@ -168,6 +176,10 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Media files (generated e-tickets cache)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -258,6 +270,12 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',  # booking / payment retries (apps/bookings/utils/idempotency.py)
+]
+
+# Let the SPA see that a response was replayed from an idempotency key
+CORS_EXPOSE_HEADERS = [
+    'idempotent-replayed',
 ]
 
 
@@ -274,4 +292,15 @@ X_FRAME_OPTIONS = 'DENY'
 # ============================================================
 SUPABASE_URL = os.environ.get('SUPABASE_URL')
 SUPABASE_ANON_KEY = os.environ.get('SUPABASE_ANON_KEY')
-SUPABASE_SERVICE_ROLE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
\ No newline at end of file
+SUPABASE_SERVICE_ROLE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+
+
+# ============================================================
+# BOARDING (QR SCANNERS)
+# ============================================================
+# Shared with scanner devices to verify offline boarding manifests
+# (falls back to a key derived from SECRET_KEY in development)
+BOARDING_MANIFEST_KEY = os.environ.get('BOARDING_MANIFEST_KEY', '')
+
+# Signs the compact ticket tokens printed in QR codes (verified offline by scanners)
+TICKET_TOKEN_KEY = os.environ.get('TICKET_TOKEN_KEY', '')